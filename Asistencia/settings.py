@@ -63,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'signature.middleware.logging_middleware.RequestLoggingMiddleware',
+    'signature.middleware.query_profiler.QueryProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'Asistencia.urls'
@@ -89,12 +90,55 @@ WSGI_APPLICATION = 'Asistencia.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql para producción; sqlite (por defecto) para desarrollo
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # Con DB_POOL cada proceso reparte conexiones de un pool de psycopg
+    # (requiere psycopg[pool]); sin él, conexiones persistentes por hilo que
+    # duran DB_CONN_MAX_AGE segundos. Django no permite combinar ambos
+    DB_POOL = os.getenv('DB_POOL', 'True') == 'True'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'asistencia'),
+            'USER': os.getenv('DB_USER', 'asistencia'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+                } if DB_POOL else False,
+            },
+        }
+    }
+else:
+    # WAL deja leer mientras alguien escribe; synchronous=NORMAL solo
+    # sincroniza el disco en los checkpoints. Las transacciones parten con
+    # BEGIN IMMEDIATE (así dos escritores no chocan al subir de lectura a
+    # escritura, que el busy timeout no resuelve) y esperan hasta
+    # DB_TIMEOUT segundos antes de "database is locked"
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': int(os.getenv('DB_TIMEOUT', 20)),
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    f"PRAGMA mmap_size={int(os.getenv('DB_MMAP_SIZE', 256 * 1024 * 1024))};"
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -115,6 +159,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hasher de contraseñas: PASSWORD_HASHER elige con cuál se guardan las nuevas
+# (pbkdf2, argon2 con argon2-cffi o bcrypt con bcrypt); los demás quedan
+# para verificar hashes antiguos. El costo de cada uno se configura aparte
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'signature.hashers.PBKDF2PasswordHasher',
+    'argon2': 'signature.hashers.Argon2PasswordHasher',
+    'bcrypt': 'signature.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 1_500_000))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', 102_400))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', 8))
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 12))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -133,21 +195,32 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Archivos subidos (cargas masivas en espera de procesarse)
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Los registros pasan por una cola acotada (LOG_QUEUE_SIZE) y un hilo aparte
+# los escribe, así el disco no está en el camino del request. El archivo
+# queda en JSON (un registro por línea) y solo la consola lleva colores.
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10_000))
+
+# Fracción de lecturas exitosas (GET/HEAD/OPTIONS) que se registran; los
+# errores y las escrituras se registran siempre
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', 0.1))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            '()': 'signature.middleware.logging_formatters.NoColorFormatter',
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
+        'json': {
+            '()': 'signature.middleware.logging_formatters.JsonFormatter',
         },
-        'simple': {
+        'color': {
+            '()': 'signature.middleware.logging_formatters.ColorFormatter',
             'format': '{levelname} {message}',
             'style': '{',
         },
@@ -158,24 +231,30 @@ LOGGING = {
             # Rotación para evitar archivos muy grandes
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(LOG_DIR, 'api_requests.log'),
-            'formatter': 'verbose',
+            'formatter': 'json',
             'maxBytes': 5 * 1024 * 1024,  # 5MB
             'backupCount': 5,
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple'
+            'formatter': 'color'
+        },
+        'queue': {
+            'class': 'signature.middleware.logging_handlers.BoundedQueueHandler',
+            'queue': {'()': 'queue.Queue', 'maxsize': LOG_QUEUE_SIZE},
+            'handlers': ['file', 'console'],
+            'respect_handler_level': True,
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'api': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
         },
         'django.server': {
@@ -186,5 +265,99 @@ LOGGING = {
 }
 AUTH_USER_MODEL = 'signature.PermissionUser'
 
+# Todos los listados se paginan por cursor (?cursor=...&page_size=...)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'signature.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'signature.pagination.IdCursorPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', 50)),
+}
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 500))
+
+# Caché de tokens de CachedTokenAuthentication: LRU por proceso y, si se
+# indica un alias de CACHES, un segundo nivel compartido entre procesos
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 1024))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 60))
+AUTH_TOKEN_SHARED_CACHE = os.getenv('AUTH_TOKEN_SHARED_CACHE', '')
+
+# Caché de respuestas de lectura del catálogo (carreras y asignaturas, ver
+# signature.response_cache); RESPONSE_CACHE='' lo desactiva. locmem solo
+# sirve con un proceso: con varios, usar un caché compartido para que todos
+# vean la misma generación, p. ej.
+# RESPONSE_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# y RESPONSE_CACHE_LOCATION=/var/tmp/asistencia, o
+# django.core.cache.backends.redis.RedisCache y redis://localhost:6379
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'catalog')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': os.getenv('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'catalog'),
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TTL', 24 * 3600)),
+    },
+    # Avance de los trabajos de importación (IMPORT_PROGRESS_CACHE)
+    'progress': {
+        'BACKEND': os.getenv('IMPORT_PROGRESS_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('IMPORT_PROGRESS_CACHE_LOCATION', 'progress'),
+    },
+}
+
+# Qué hacer cuando una vista supera su presupuesto de consultas SQL
+# (query_budgets / @query_budget): 'warn' lo registra, 'raise' falla el request
+QUERY_BUDGET_ACTION = os.getenv('QUERY_BUDGET_ACTION', 'warn')
+
 EMAIL_ADDRESS = os.getenv('EMAIL_ADDRESS')
 EMAIL_APP_PASSWORD = os.getenv('EMAIL_APP_PASSWORD')
+
+# Conexión SMTP que usa signature.mailer (una sola, reutilizada por la cola)
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_HOST_USER = EMAIL_ADDRESS or ''
+EMAIL_HOST_PASSWORD = EMAIL_APP_PASSWORD or ''
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 30))
+DEFAULT_FROM_EMAIL = EMAIL_ADDRESS
+
+# Cola de correos salientes: reintentos con backoff exponencial a partir de
+# MAIL_RETRY_DELAY segundos. Con MAIL_QUEUE_EAGER se envía dentro del request
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 5))
+MAIL_RETRY_DELAY = int(os.getenv('MAIL_RETRY_DELAY', 60))
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 100))
+# Correos por request en /sendEmailBatch/ (archivos x destinatarios)
+MAIL_BATCH_MAX_MESSAGES = int(os.getenv('MAIL_BATCH_MAX_MESSAGES', 200))
+MAIL_QUEUE_EAGER = os.getenv('MAIL_QUEUE_EAGER', 'False') == 'True'
+# Segundos que un correo puede quedar en 'sending' sin que su worker lo
+# renueve antes de volver a la cola (el worker murió a mitad del envío)
+MAIL_SENDING_LEASE = int(os.getenv('MAIL_SENDING_LEASE', 600))
+
+# Validación de destinatarios de /sendEmail/ (signature.recipients). Los
+# resultados se cachean; la red (MX + sondeo SMTP) tiene un plazo total
+RECIPIENT_RESOLVER = os.getenv('RECIPIENT_RESOLVER', 'signature.recipients.NetworkResolver')
+RECIPIENT_VALIDATION_DEADLINE = float(os.getenv('RECIPIENT_VALIDATION_DEADLINE', 3))
+RECIPIENT_CACHE_TTL = int(os.getenv('RECIPIENT_CACHE_TTL', 7 * 24 * 3600))
+RECIPIENT_NEGATIVE_TTL = int(os.getenv('RECIPIENT_NEGATIVE_TTL', 3600))
+RECIPIENT_MX_TTL = int(os.getenv('RECIPIENT_MX_TTL', 24 * 3600))
+
+# Procesos usados para hashear contraseñas en la carga masiva de usuarios
+# (0 = uno por CPU)
+IMPORT_HASH_WORKERS = int(os.getenv('IMPORT_HASH_WORKERS', 0))
+
+# Máximo de filas aceptadas en los CSV/XLSX de carga masiva
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', 100_000))
+
+# Hilos que procesan los trabajos de /api/import-jobs/. Con IMPORT_JOBS_EAGER
+# el trabajo se ejecuta dentro del mismo request (útil para tests)
+IMPORT_JOB_WORKERS = int(os.getenv('IMPORT_JOB_WORKERS', 2))
+IMPORT_JOBS_EAGER = os.getenv('IMPORT_JOBS_EAGER', 'False') == 'True'
+# Alias de CACHES con el avance de los trabajos en curso. Con varios procesos
+# (o para recover_import_jobs) tiene que ser compartido: configurar
+# IMPORT_PROGRESS_CACHE_BACKEND/LOCATION como RESPONSE_CACHE_*
+IMPORT_PROGRESS_CACHE = os.getenv('IMPORT_PROGRESS_CACHE', 'progress')
+# Segundos sin avance tras los que recover_import_jobs da por muerto un
+# trabajo 'running' y retoma uno que sigue 'pending'
+IMPORT_JOB_STALE_AFTER = int(os.getenv('IMPORT_JOB_STALE_AFTER', 300))
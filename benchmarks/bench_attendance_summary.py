@@ -0,0 +1,76 @@
+"""
+Attendance rates per subject computed on every request with COUNT over all
+AttendanceRecord rows, against reading the AttendanceSummary counters, and
+the cost of rebuilding the summary with the pandas groupby.
+
+    python benchmarks/bench_attendance_summary.py
+"""
+import datetime
+import random
+
+from setup_django import setup, timed
+
+setup()
+
+from django.db.models import Count, Q, Sum  # noqa: E402
+from signature.attendance import COUNTERS, STATUS_FIELDS, rebuild_summary  # noqa: E402
+from signature.models import (AttendanceRecord, AttendanceSession, AttendanceSummary,  # noqa: E402
+                              Major, Student, Subject)
+
+STUDENTS = 3_000
+SUBJECTS = 60
+SESSIONS = 30
+CLASS_SIZE = 80
+REPEAT = 20
+
+
+def populate():
+    major = Major.objects.create(name='CARRERA', faculty='BENCH')
+    students = Student.objects.bulk_create([
+        Student(rut=str(10_000_000 + n), dv='0', first_name='A', second_name='B',
+                last_name='C', second_last_name='D', major=major) for n in range(STUDENTS)])
+    subjects = Subject.objects.bulk_create([Subject(name=f'RAMO {n}') for n in range(SUBJECTS)])
+    sessions = AttendanceSession.objects.bulk_create([
+        AttendanceSession(subject=subject, date=datetime.date(2025, 3, 1) + datetime.timedelta(days=day))
+        for subject in subjects for day in range(SESSIONS)])
+    rosters = {subject.id: random.sample(students, CLASS_SIZE) for subject in subjects}
+    AttendanceRecord.objects.bulk_create([
+        AttendanceRecord(session=session, student=student, status=random.choice('PPPPATJ'))
+        for session in sessions for student in rosters[session.subject_id]
+    ], batch_size=10_000)
+
+
+def rates_from_records():
+    return list(AttendanceRecord.objects.values('session__subject').annotate(
+        **{field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()}))
+
+
+def rates_from_summary():
+    return list(AttendanceSummary.objects.values('subject').annotate(
+        **{counter: Sum(counter) for counter in COUNTERS}))
+
+
+def main():
+    populate()
+    print(f"{AttendanceRecord.objects.count()} records")
+    with timed("rebuild_summary (pandas groupby)"):
+        rows = rebuild_summary()
+    print(f"{'':<45} {rows} summary rows")
+    with timed(f"per-subject rates from records x{REPEAT}"):
+        for _ in range(REPEAT):
+            rates_from_records()
+    with timed(f"per-subject rates from summary x{REPEAT}"):
+        for _ in range(REPEAT):
+            rates_from_summary()
+    subject = Subject.objects.first()
+    with timed(f"one subject's students from records x{REPEAT}"):
+        for _ in range(REPEAT):
+            list(AttendanceRecord.objects.filter(session__subject=subject).values('student').annotate(
+                **{field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()}))
+    with timed(f"one subject's students from summary x{REPEAT}"):
+        for _ in range(REPEAT):
+            list(AttendanceSummary.objects.filter(subject=subject).values('student', *COUNTERS))
+
+
+if __name__ == '__main__':
+    main()
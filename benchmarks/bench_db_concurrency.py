@@ -0,0 +1,93 @@
+"""
+Concurrent reads during a bulk upload on a SQLite file: READERS threads
+keep listing a major's students while import_students loads a large CSV in
+one transaction. Compares the old configuration (rollback journal, 5 s
+busy timeout) against the one in settings (WAL, synchronous=NORMAL, mmap,
+BEGIN IMMEDIATE, 20 s timeout).
+
+    python benchmarks/bench_db_concurrency.py
+"""
+import copy
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from setup_django import setup
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+setup(DB_PATH)
+
+from django.conf import settings  # noqa: E402
+from django.db import OperationalError, connection, connections  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from signature.importers import STUDENT_COLUMNS, import_students  # noqa: E402
+from signature.ingest import UploadReader  # noqa: E402
+from signature.models import Major, Student  # noqa: E402
+
+READERS = 4
+ROWS = 100_000
+
+
+def build_csv(rows):
+    lines = ["Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido"]
+    lines += [f"{5_000_000 + n},JUAN,PEDRO,PEREZ,SOTO" for n in range(rows)]
+    return "\n".join(lines).encode('utf-8')
+
+
+SCENARIOS = [
+    ("rollback journal, 5s timeout (before)", {'init_command': 'PRAGMA journal_mode=DELETE'}),
+    ("WAL + IMMEDIATE, settings (after)", copy.deepcopy(settings.DATABASES['default']['OPTIONS'])),
+]
+
+
+def reader(major_id, done, latencies, errors):
+    while not done.is_set():
+        start = time.perf_counter()
+        try:
+            list(Student.objects.filter(major_id=major_id).order_by('last_name')[:50])
+            Student.objects.filter(major_id=major_id).count()
+        except OperationalError:
+            errors.append(1)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    connection.close()
+
+
+def run(label, options, upload, major):
+    connections.close_all()
+    connections.settings['default']['OPTIONS'] = options
+    Student.objects.all().delete()
+
+    done = threading.Event()
+    latencies, errors = [], []
+    threads = [threading.Thread(target=reader, args=(major.id, done, latencies, errors))
+               for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    try:
+        report = import_students(UploadReader(upload, STUDENT_COLUMNS), major.id)
+        imported = 'ok' if report.ok else 'failed'
+    except OperationalError as e:
+        imported = f'failed ({e})'
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else float('nan')
+    print(f"{label}\n    import {imported} in {elapsed:.2f}s, {len(latencies)} reads, "
+          f"{len(errors)} 'database is locked', read p99 {p99:.1f} ms")
+
+
+def main():
+    major = Major.objects.create(name='BENCH', faculty='BENCH')
+    upload = SimpleUploadedFile('bench.csv', build_csv(ROWS))
+    for label, options in SCENARIOS:
+        run(label, options, upload, major)
+
+
+if __name__ == '__main__':
+    main()
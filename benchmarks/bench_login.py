@@ -0,0 +1,99 @@
+"""
+Login cost: one password hash per configured hasher and cost (argon2 and
+bcrypt are skipped when their library is not installed), then /login/
+latency percentiles for a professor whose majors hold a large roster, with
+the old nested UserSerializer payload against SessionUserSerializer.
+
+    python benchmarks/bench_login.py
+"""
+import logging
+import statistics
+import time
+
+from setup_django import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import check_password, make_password  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from signature.models import Major, PermissionUser, Student, Subject  # noqa: E402
+from signature.serializers import UserSerializer  # noqa: E402
+
+HASHER_COSTS = [
+    ('signature.hashers.PBKDF2PasswordHasher', 'PASSWORD_PBKDF2_ITERATIONS', [600_000, 1_500_000]),
+    ('signature.hashers.Argon2PasswordHasher', 'PASSWORD_ARGON2_TIME_COST', [2, 3]),
+    ('signature.hashers.BCryptSHA256PasswordHasher', 'PASSWORD_BCRYPT_ROUNDS', [10, 12]),
+]
+HASHES = 5
+MAJORS = 4
+SUBJECTS_PER_MAJOR = 10
+STUDENTS_PER_SUBJECT = 60
+LOGINS = 50
+
+
+def bench_hashers():
+    for path, setting, costs in HASHER_COSTS:
+        name = path.rsplit('.', 1)[1]
+        for cost in costs:
+            with override_settings(PASSWORD_HASHERS=[path], **{setting: cost}):
+                try:
+                    encoded = make_password('bench-password')
+                except ValueError as e:
+                    print(f"{name}: skipped ({e})")
+                    break
+                start = time.perf_counter()
+                for _ in range(HASHES):
+                    check_password('bench-password', encoded)
+                per_hash = (time.perf_counter() - start) / HASHES * 1e3
+            print(f"{f'{name} {setting}={cost}':<70} {per_hash:8.1f} ms/hash")
+
+
+def build_roster(user):
+    rut = 30_000_000
+    for m in range(MAJORS):
+        major = Major.objects.create(name=f'MAJOR {m}', faculty='BENCH')
+        user.majors.add(major)
+        for s in range(SUBJECTS_PER_MAJOR):
+            subject = Subject.objects.create(name=f'SUBJECT {m}-{s}')
+            subject.major.add(major)
+            students = []
+            for _ in range(STUDENTS_PER_SUBJECT):
+                rut += 1
+                students.append(Student(rut=str(rut), dv='0', first_name='A', second_name='B',
+                                        last_name='C', second_last_name='D', major=major))
+            subject.students.add(*Student.objects.bulk_create(students))
+
+
+def bench_login(label):
+    client = APIClient()
+    client.post(reverse('login'), {'username': 'bench', 'password': 'bench'}, format='json')  # warm-up
+    timings = []
+    for _ in range(LOGINS):
+        start = time.perf_counter()
+        response = client.post(reverse('login'), {'username': 'bench', 'password': 'bench'}, format='json')
+        timings.append((time.perf_counter() - start) * 1e3)
+        assert response.status_code == 200, response.content
+    p50 = statistics.median(timings)
+    p99 = statistics.quantiles(timings, n=100)[98]
+    print(f"{label:<45} p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  {len(response.content):8d} bytes")
+
+
+def main():
+    logging.disable(logging.WARNING)  # one request log line per login would dominate the output
+    bench_hashers()
+
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1_000  # measure the response, not the hash
+    user = PermissionUser.objects.create_user(username='bench', password='bench')
+    build_roster(user)
+    bench_login("login, SessionUserSerializer")
+
+    import signature.views
+    signature.views.SessionUserSerializer = UserSerializer
+    bench_login("login, nested UserSerializer (before)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Query plans and timings of the hot lookups (RUT, major name, major code and
+the roster of a major sorted by last name) with the indexes of migration
+0011 and, for comparison, after dropping them again.
+
+    python benchmarks/bench_lookup_plans.py
+"""
+import random
+import time
+
+from setup_django import setup
+
+setup()
+
+from django.db import connection, models  # noqa: E402
+from signature.models import Major, MajorCode, Student  # noqa: E402
+
+STUDENTS = 200_000
+MAJORS = 200
+REPEAT = 200
+
+
+def populate():
+    majors = Major.objects.bulk_create([
+        Major(name=f'CARRERA {i}', faculty='BENCH') for i in range(MAJORS)])
+    MajorCode.objects.bulk_create([
+        MajorCode(code=f'COD{i}_{j}', major=major)
+        for i, major in enumerate(majors) for j in range(2)])
+    ruts = random.sample(range(5_000_000, 25_000_000), STUDENTS)
+    Student.objects.bulk_create([
+        Student(rut=str(rut), dv='0', first_name='A', second_name='B',
+                last_name=random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') * 3,
+                second_last_name='D', major=random.choice(majors))
+        for rut in ruts
+    ], batch_size=5_000)
+    return [str(rut) for rut in random.sample(ruts, 500)], majors[MAJORS // 2]
+
+
+def queries(ruts, major):
+    return [
+        ('rut IN (500)', lambda: Student.objects.filter(rut__in=ruts).values_list('rut', flat=True)),
+        ('major by name', lambda: Major.objects.filter(name=major.name)),
+        ('major code', lambda: MajorCode.objects.filter(code='COD100_1')),
+        ('roster by last name', lambda: Student.objects.filter(major=major).order_by('last_name')[:100]),
+    ]
+
+
+def report(title, ruts, major):
+    print(f"\n== {title}")
+    for label, build in queries(ruts, major):
+        plan = build().explain().replace('\n', ' | ')
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            list(build())
+        elapsed = (time.perf_counter() - start) / REPEAT * 1000
+        print(f"{label:<22} {elapsed:8.3f} ms   {plan}")
+
+
+def drop_indexes():
+    constraints, indexes = Student._meta.constraints, Student._meta.indexes
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.remove_index(Student, index)
+        # SQLite elimina un UNIQUE rehaciendo la tabla desde Meta, así que
+        # Meta tiene que dejar de declararlo antes
+        Student._meta.constraints = Student._meta.indexes = []
+        for constraint in constraints:
+            editor.remove_constraint(Student, constraint)
+        for model, name in ((Major, 'name'), (MajorCode, 'code')):
+            old_field = model._meta.get_field(name)
+            new_field = models.CharField(max_length=old_field.max_length)
+            new_field.set_attributes_from_name(name)
+            new_field.model = model
+            editor.alter_field(model, old_field, new_field)
+
+
+def main():
+    random.seed(1)
+    ruts, major = populate()
+    report("with the indexes of 0011", ruts, major)
+    drop_indexes()
+    report("without them (before 0011)", ruts, major)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Peak Python memory and time to render the attendance register of a large
+section: a regular openpyxl workbook built in memory (what the frontend
+did with the nested SubjectSerializer payload) against signature.registers
+(write-only sheet spilled to a temp file, streamed in chunks).
+
+    python benchmarks/bench_register.py
+"""
+import datetime
+import tracemalloc
+from io import BytesIO
+
+from setup_django import setup, timed
+
+setup()
+
+from openpyxl import Workbook  # noqa: E402
+from signature.registers import REGISTER_COLUMNS, register_rows, write_register  # noqa: E402
+
+STUDENTS = 20_000
+DATE = datetime.date(2025, 5, 14)
+
+
+def students():
+    for n in range(STUDENTS):
+        yield (str(10_000_000 + n), '0', 'NOMBRE', 'SEGUNDO', 'APELLIDO', 'MATERNO')
+
+
+def in_memory():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append([title for title, _ in REGISTER_COLUMNS])
+    for row in register_rows(students(), 'MATEMATICAS', DATE, '1'):
+        sheet.append(row)
+    output = BytesIO()
+    workbook.save(output)
+    return len(output.getvalue())
+
+
+def streamed():
+    return sum(len(chunk) for chunk in write_register(register_rows(students(), 'MATEMATICAS', DATE, '1')))
+
+
+def measure(label, render):
+    with timed(label):
+        size = render()
+    # tracemalloc slows the run down several times, so memory is measured separately
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'':<45} {size / 2**20:6.1f} MiB xlsx, peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    measure(f"in-memory workbook, {STUDENTS} rows", in_memory)
+    measure(f"write-only + streamed, {STUDENTS} rows", streamed)
@@ -0,0 +1,94 @@
+"""
+Cost of the request log on the request thread: the previous pipeline
+(colorama string, NoColorFormatter compiling its regex per record and a
+synchronous RotatingFileHandler) against the current RequestLoggingMiddleware
+(plain message + fields, BoundedQueueHandler, JSON written by the listener
+thread), logging every GET and sampling 10% of them.
+
+    python benchmarks/bench_request_logging.py
+"""
+import logging
+import re
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import Queue
+
+from setup_django import setup
+
+setup()
+
+from colorama import Fore, Style  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.urls import resolve  # noqa: E402
+from signature.middleware.logging_formatters import JsonFormatter  # noqa: E402
+from signature.middleware.logging_handlers import BoundedQueueHandler  # noqa: E402
+from signature.middleware.logging_middleware import RequestLoggingMiddleware  # noqa: E402
+
+REQUESTS = 20_000
+
+
+class LegacyNoColorFormatter(logging.Formatter):
+    def format(self, record):
+        message = super().format(record)
+        ansi_escape = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+        return ansi_escape.sub('', message)
+
+
+def legacy_log(logger, request, response, duration):
+    logger.log(logging.INFO, (
+        f"{Fore.GREEN}{request.method}{Style.RESET_ALL} {request.path} - "
+        f"{Fore.GREEN}{response.status_code}{Style.RESET_ALL} "
+        f"User: {Fore.BLUE}anonymous{Style.RESET_ALL} ({duration:.2f}s) (User)"
+    ))
+    logger.info("Operation: Retrieved Major ")
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers, logger.propagate = [handler], False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def run(label, log_request):
+    request = RequestFactory().get('/api/majors/')
+    request.user = AnonymousUser()
+    request.resolver_match = resolve('/api/majors/')
+    response = HttpResponse()
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        log_request(request, response)
+    per_request = (time.perf_counter() - start) / REQUESTS * 1e6
+    print(f"{label:<45} {per_request:8.1f} µs/request")
+
+
+def main():
+    logs = Path(tempfile.mkdtemp())
+
+    file_handler = RotatingFileHandler(logs / 'legacy.log', maxBytes=5 * 2**20, backupCount=5)
+    file_handler.setFormatter(LegacyNoColorFormatter('{levelname} {asctime} {module} {message}', style='{'))
+    legacy = make_logger('bench.legacy', file_handler)
+    run("before: colorama + regex + sync file", lambda req, res: legacy_log(legacy, req, res, 0.01))
+
+    file_handler = RotatingFileHandler(logs / 'json.log', maxBytes=5 * 2**20, backupCount=5)
+    file_handler.setFormatter(JsonFormatter())
+    queue_handler = BoundedQueueHandler(Queue(maxsize=10_000))
+    listener = QueueListener(queue_handler.queue, file_handler)
+    listener.start()
+    make_logger('api', queue_handler)
+    response = HttpResponse()
+    middleware = RequestLoggingMiddleware(lambda request: response)
+    for rate in (1, 0.1):
+        settings.REQUEST_LOG_SAMPLE_RATE = rate
+        run(f"after: queue + JSON, {rate:.0%} of GETs", lambda req, res: middleware(req))
+    listener.stop()
+    print(f"{'':<45} dropped {queue_handler.dropped} records")
+
+
+if __name__ == '__main__':
+    main()
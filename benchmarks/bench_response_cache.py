@@ -0,0 +1,68 @@
+"""
+GET /api/majors/ over a full catalog: rebuilt on every request (cache
+disabled), served from the response cache, and answered 304 Not Modified
+from the client's ETag.
+
+    python benchmarks/bench_response_cache.py
+"""
+import logging
+import time
+
+from setup_django import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from signature.models import Major, PermissionUser, Student, Subject  # noqa: E402
+
+MAJORS = 10
+SUBJECTS_PER_MAJOR = 10
+STUDENTS_PER_SUBJECT = 40
+REQUESTS = 50
+
+
+def build_catalog():
+    rut = 30_000_000
+    for m in range(MAJORS):
+        major = Major.objects.create(name=f'MAJOR {m}', faculty='BENCH')
+        for s in range(SUBJECTS_PER_MAJOR):
+            subject = Subject.objects.create(name=f'SUBJECT {m}-{s}')
+            subject.major.add(major)
+            students = []
+            for _ in range(STUDENTS_PER_SUBJECT):
+                rut += 1
+                students.append(Student(rut=str(rut), dv='0', first_name='A', second_name='B',
+                                        last_name='C', second_last_name='D', major=major))
+            subject.students.add(*Student.objects.bulk_create(students))
+
+
+def run(label, client, **headers):
+    url = reverse('majors-list') + '?page_size=500'
+    response = client.get(url)  # warm-up, fills the cache
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = client.get(url, **headers)
+    per_request = (time.perf_counter() - start) / REQUESTS * 1e3
+    print(f"{label:<45} {per_request:8.2f} ms/request  {response.status_code}  {len(response.content):8d} bytes")
+    return response
+
+
+def main():
+    logging.disable(logging.WARNING)  # one request log line per GET would dominate the output
+    build_catalog()
+    user = PermissionUser.objects.create_user(username='bench', password='bench')
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+    settings.RESPONSE_CACHE = ''
+    run("no cache", client)
+    settings.RESPONSE_CACHE = 'catalog'
+    etag = run("cached", client)['ETag']
+    run("If-None-Match (304)", client, HTTP_IF_NONE_MATCH=etag)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Fetching the roster of a large shared course: GET /api/subjects/<id>/ (the
+nested SubjectSerializer payload, built in memory) against the streamed
+/api/subjects/<id>/roster/ in NDJSON and CSV. Reports time to first byte,
+total time and peak Python memory.
+
+    python benchmarks/bench_roster.py
+"""
+import logging
+import time
+import tracemalloc
+
+from setup_django import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from signature.models import Major, PermissionUser, Student, Subject  # noqa: E402
+
+STUDENTS = 20_000
+
+
+def build_subject():
+    major = Major.objects.create(name='BENCH', faculty='BENCH')
+    subject = Subject.objects.create(name='MATEMATICAS')
+    subject.major.add(major)
+    students = Student.objects.bulk_create([
+        Student(rut=str(30_000_000 + n), dv='0', first_name='NOMBRE', second_name='SEGUNDO',
+                last_name='APELLIDO', second_last_name='MATERNO', major=major)
+        for n in range(STUDENTS)
+    ], batch_size=5_000)
+    subject.students.add(*students)
+    return subject
+
+
+def fetch(client, url, params):
+    start = time.perf_counter()
+    response = client.get(url, params)
+    if response.streaming:
+        chunks = iter(response.streaming_content)
+        size = len(next(chunks))
+        first_byte = time.perf_counter() - start
+        size += sum(len(chunk) for chunk in chunks)
+    else:
+        size = len(response.content)
+        first_byte = time.perf_counter() - start
+    return first_byte, time.perf_counter() - start, size
+
+
+def measure(label, client, url, params=None):
+    first_byte, total, size = fetch(client, url, params)
+    # tracemalloc slows the run down several times, so memory is measured separately
+    tracemalloc.start()
+    fetch(client, url, params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} TTFB {first_byte * 1e3:8.1f} ms  total {total * 1e3:8.1f} ms  "
+          f"{size / 2**20:6.2f} MiB  peak {peak / 2**20:7.1f} MiB")
+
+
+def main():
+    logging.disable(logging.WARNING)  # keep the query budget warnings out of the table
+    settings.RESPONSE_CACHE = ''
+    subject = build_subject()
+    user = PermissionUser.objects.create_user(username='bench', password='bench', is_superuser=True)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+    measure("subject detail (nested)", client, reverse('subjects-detail', kwargs={'pk': subject.id}))
+    roster = reverse('subjects-roster', kwargs={'pk': subject.id})
+    measure("roster ndjson", client, roster)
+    measure("roster csv", client, roster, {'fmt': 'csv'})
+
+
+if __name__ == '__main__':
+    main()
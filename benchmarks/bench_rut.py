@@ -0,0 +1,49 @@
+"""
+Computing RUT check digits: the per-character string loop the serializers
+used to carry, the scalar signature.rut.check_digit and the vectorized
+signature.rut.check_digits over a whole column, plus the import-sized
+batches of 500 the CSV importer feeds it.
+
+    python benchmarks/bench_rut.py
+"""
+import random
+
+from setup_django import setup, timed
+
+setup()
+
+from signature.rut import check_digit, check_digits  # noqa: E402
+
+RUTS = 1_000_000
+IMPORT_BATCH = 500
+
+
+def string_loop(rut):
+    total = 0
+    multiplier = 2
+    for digit in reversed(rut):
+        total += int(digit) * multiplier
+        multiplier = multiplier + 1 if multiplier < 7 else 2
+    dv = 11 - total % 11
+    return {11: '0', 10: 'K'}.get(dv, str(dv))
+
+
+def main():
+    rng = random.Random(0)
+    ruts = [str(rng.randrange(1_000_000, 30_000_000)) for _ in range(RUTS)]
+
+    with timed(f"string loop ({RUTS:,} RUTs)"):
+        expected = [string_loop(rut) for rut in ruts]
+    with timed("check_digit, one call per RUT"):
+        scalar = [check_digit(rut) for rut in ruts]
+    with timed("check_digits, one call for the column"):
+        vectorized = check_digits(ruts).tolist()
+    with timed(f"check_digits, batches of {IMPORT_BATCH}"):
+        batched = [dv for start in range(0, RUTS, IMPORT_BATCH)
+                   for dv in check_digits(ruts[start:start + IMPORT_BATCH]).tolist()]
+
+    assert expected == scalar == vectorized == batched
+
+
+if __name__ == '__main__':
+    main()
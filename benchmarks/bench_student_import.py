@@ -0,0 +1,54 @@
+"""
+Times the bulk student import behind uploadStudentCSV, reading the upload
+with the streaming UploadReader, and reports the peak Python memory used.
+
+    python benchmarks/bench_student_import.py
+"""
+import random
+import tracemalloc
+
+from setup_django import setup, timed
+
+setup()
+
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from signature.importers import STUDENT_COLUMNS, import_students  # noqa: E402
+from signature.ingest import UploadReader  # noqa: E402
+from signature.models import Major, Student  # noqa: E402
+
+NAMES = ['JUAN', 'PEDRO', 'MARIA', 'JOSEFA', 'DIEGO', 'CAMILA', 'ANA']
+SURNAMES = ['PEREZ', 'SOTO', 'MUÑOZ', 'ROJAS', 'DIAZ', 'CONTRERAS']
+
+
+def build_csv(rows):
+    ruts = random.sample(range(5_000_000, 25_000_000), rows)
+    lines = ["Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido"]
+    for rut in ruts:
+        lines.append(
+            f"{rut},{random.choice(NAMES)},{random.choice(NAMES)},"
+            f"{random.choice(SURNAMES)},{random.choice(SURNAMES)}")
+    return "\n".join(lines).encode('utf-8')
+
+
+def main():
+    random.seed(1)
+    major = Major.objects.create(name='BENCH', faculty='BENCH')
+    for rows in (2_000, 20_000, 100_000):
+        upload = SimpleUploadedFile('bench.csv', build_csv(rows))
+
+        Student.objects.all().delete()
+        with timed(f"import_students ({rows:,} rows)"):
+            report = import_students(UploadReader(upload, STUDENT_COLUMNS), major.id)
+        assert report.ok and report.created == rows, report.errors[:5]
+
+        # tracemalloc ralentiza bastante, así que la memoria se mide aparte
+        Student.objects.all().delete()
+        tracemalloc.start()
+        import_students(UploadReader(upload, STUDENT_COLUMNS), major.id)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'':<45} peak {peak / 2**20:6.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-request cost of authenticating a token: DRF's stock TokenAuthentication
+(authtoken_token JOIN user on every request) against
+CachedTokenAuthentication (in-process LRU, and the shared cache level on top
+of Django's local-memory backend).
+
+    python benchmarks/bench_token_auth.py
+"""
+import time
+
+from setup_django import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from rest_framework.authentication import TokenAuthentication  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from signature.authentication import CachedTokenAuthentication, token_cache  # noqa: E402
+from signature.models import PermissionUser  # noqa: E402
+
+REQUESTS = 20_000
+
+
+def run(label, authentication, key):
+    request = Request(RequestFactory().get('/api/majors/', HTTP_AUTHORIZATION=f'Token {key}'))
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            authentication.authenticate(request)
+        per_request = (time.perf_counter() - start) / REQUESTS * 1e6
+    print(f"{label:<45} {per_request:8.1f} µs/request {queries:6d} queries")
+
+
+def main():
+    user = PermissionUser.objects.create_user(username='bench', password='bench')
+    key = Token.objects.create(user=user).key
+
+    run("TokenAuthentication", TokenAuthentication(), key)
+    run("CachedTokenAuthentication (LRU)", CachedTokenAuthentication(), key)
+    settings.AUTH_TOKEN_SHARED_CACHE = 'default'
+    settings.AUTH_TOKEN_CACHE_SIZE = 0  # no local LRU, shared level only
+    token_cache.clear()
+    run("CachedTokenAuthentication (shared cache only)", CachedTokenAuthentication(), key)
+
+
+if __name__ == '__main__':
+    main()
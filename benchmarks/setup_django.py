@@ -0,0 +1,35 @@
+"""
+Shared bootstrap for the benchmark scripts in this folder.
+
+The benchmarks run against a throwaway SQLite database built straight from
+the models (the seed migrations are skipped), so they never touch db.sqlite3.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup(db_name=':memory:'):
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Asistencia.settings')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_name
+    settings.MIGRATION_MODULES = {'signature': None}
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    yield
+    print(f"{label:<45} {time.perf_counter() - start:8.3f}s")
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class SignatureConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'signature'
+
+    def ready(self):
+        from signature.middleware.logging_handlers import start_queue_listeners
+        start_queue_listeners()
+
+        from signature.authentication import connect_signals
+        connect_signals()
+
+        from signature.response_cache import connect_signals as connect_response_cache_signals
+        connect_response_cache_signals()
@@ -0,0 +1,97 @@
+import pandas as pd
+from django.db import connection, transaction
+from .models import AttendanceRecord, AttendanceSummary
+
+# Columna de AttendanceSummary que cuenta cada estado de AttendanceRecord
+STATUS_FIELDS = {
+    AttendanceRecord.PRESENT: 'present',
+    AttendanceRecord.ABSENT: 'absent',
+    AttendanceRecord.LATE: 'late',
+    AttendanceRecord.EXCUSED: 'excused',
+}
+COUNTERS = list(STATUS_FIELDS.values())
+
+
+def attendance_rate(present, absent, late, excused):
+    """
+    Porcentaje de asistencia: presentes y atrasados sobre las clases que
+    cuentan (las justificadas no). None si todavía no hay clases que cuenten.
+    """
+    held = present + absent + late
+    if not held:
+        return None
+    return round(100 * (present + late) / held, 1)
+
+
+def apply_changes(subject_id, changes):
+    """
+    Actualiza los contadores de ``subject_id`` con ``changes``, tuplas
+    ``(student_id, estado_anterior, estado_nuevo)`` donde None es "sin marca".
+    Todas las filas se suman con un solo INSERT ... ON CONFLICT DO UPDATE,
+    sin leer el resumen antes, así dos tomas de asistencia simultáneas no se
+    pisan. Los estados anteriores deben leerse con la clase bloqueada
+    (``select_for_update``), si no dos tomas de la misma clase restarían
+    el mismo estado anterior.
+    """
+    deltas = {}
+    for student_id, old, new in changes:
+        if old == new:
+            continue
+        row = deltas.setdefault(student_id, dict.fromkeys(COUNTERS, 0))
+        if old:
+            row[STATUS_FIELDS[old]] -= 1
+        if new:
+            row[STATUS_FIELDS[new]] += 1
+
+    rows = [(student_id, subject_id, *row.values())
+            for student_id, row in deltas.items() if any(row.values())]
+    if not rows:
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(AttendanceSummary._meta.db_table)
+    columns = ['student_id', 'subject_id', *COUNTERS]
+    updates = ', '.join(f'{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}' for c in COUNTERS)
+    batch_size = (connection.features.max_query_params or 999) // len(columns)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES {placeholders} "
+                f"ON CONFLICT ({qn('student_id')}, {qn('subject_id')}) DO UPDATE SET {updates}",
+                [value for row in batch for value in row],
+            )
+
+
+def summary_frame(records):
+    """
+    Cuenta los estados por (student_id, subject_id) con un groupby de pandas
+    sobre ``records``, tuplas ``(student_id, subject_id, status)``.
+    """
+    frame = pd.DataFrame.from_records(records, columns=['student_id', 'subject_id', 'status'])
+    counts = frame.groupby(['student_id', 'subject_id', 'status']).size().unstack(fill_value=0)
+    return counts.reindex(columns=list(STATUS_FIELDS), fill_value=0).rename(columns=STATUS_FIELDS)
+
+
+def rebuild_summary(subject_ids=None):
+    """
+    Recalcula AttendanceSummary desde AttendanceRecord (todas las asignaturas
+    o solo ``subject_ids``) y devuelve cuántas filas quedaron.
+    """
+    records = AttendanceRecord.objects.values_list('student_id', 'session__subject_id', 'status')
+    summaries = AttendanceSummary.objects.all()
+    if subject_ids:
+        records = records.filter(session__subject_id__in=subject_ids)
+        summaries = summaries.filter(subject_id__in=subject_ids)
+
+    counts = summary_frame(records.iterator(chunk_size=10_000))
+    rows = [
+        AttendanceSummary(student_id=student_id, subject_id=subject_id, **dict(zip(COUNTERS, values)))
+        for (student_id, subject_id), values in zip(counts.index.tolist(), counts.to_numpy().tolist())
+    ]
+    with transaction.atomic():
+        summaries.delete()
+        AttendanceSummary.objects.bulk_create(rows, batch_size=5_000)
+    return len(rows)
@@ -0,0 +1,138 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """
+    LRU en memoria con vencimiento: ``AUTH_TOKEN_CACHE_SIZE`` entradas que
+    duran ``AUTH_TOKEN_CACHE_TTL`` segundos. Con ``AUTH_TOKEN_SHARED_CACHE``
+    (un alias de CACHES) los procesos comparten además un segundo nivel.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = settings.AUTH_TOKEN_SHARED_CACHE
+        return caches[alias] if alias else None
+
+    def shared_key(self, key):
+        return f'auth-token:{key}'
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        if self.shared is not None:
+            value = self.shared.get(self.shared_key(key))
+            if value is not None:
+                self._store(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), value, settings.AUTH_TOKEN_CACHE_TTL)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self.shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication sin la consulta a authtoken_token + usuario en cada
+    request: el par (usuario, token) queda en ``token_cache``. Cambiar o
+    borrar un token o un usuario lo invalida (ver ``invalidate_token`` e
+    ``invalidate_user``); en otros procesos sin caché compartido la entrada
+    vieja dura a lo más ``AUTH_TOKEN_CACHE_TTL``.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        # Copia: el mismo objeto no debe compartirse entre requests
+        return copy.copy(user), token
+
+
+def majors_key(key):
+    """Entrada de ``token_cache`` con las carreras del usuario (ver ``scoping.major_ids``)."""
+    return f'{key}:majors'
+
+
+def forget_token(key):
+    token_cache.delete(key)
+    token_cache.delete(majors_key(key))
+
+
+def forget_users(user_ids, majors_only=False):
+    # Un usuario tiene a lo más un token (OneToOne)
+    for key in Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True):
+        if majors_only:
+            token_cache.delete(majors_key(key))
+        else:
+            forget_token(key)
+
+
+def invalidate_token(sender, instance, **kwargs):
+    forget_token(instance.key)
+
+
+def invalidate_user(sender, instance, **kwargs):
+    forget_users([instance.pk])
+
+
+def invalidate_user_majors(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # major.users.clear(): post_clear ya no dice a qué usuarios afectó
+        instance._cleared_user_ids = list(instance.users.values_list('pk', flat=True))
+    elif action.startswith('post_'):
+        user_ids = [instance.pk] if not reverse else (
+            pk_set if pk_set is not None else instance.__dict__.pop('_cleared_user_ids', []))
+        forget_users(user_ids, majors_only=True)
+
+
+def connect_signals():
+    post_save.connect(invalidate_token, sender=Token, dispatch_uid='token_cache_token_save')
+    post_delete.connect(invalidate_token, sender=Token, dispatch_uid='token_cache_token_delete')
+    # Borrar un usuario borra su token en cascada, y eso ya llama a invalidate_token
+    post_save.connect(invalidate_user, sender=get_user_model(), dispatch_uid='token_cache_user_save')
+    m2m_changed.connect(invalidate_user_majors, sender=get_user_model().majors.through,
+                        dispatch_uid='token_cache_user_majors')
@@ -0,0 +1,62 @@
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# Los hashers de Django con el costo tomado de settings en vez de fijo en la
+# clase. El nombre del algoritmo es el mismo, así que los hashes existentes
+# siguen sirviendo y, si el costo cambia, Django los rehashea al iniciar
+# sesión (must_update).
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Requiere ``argon2-cffi``."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """Requiere ``bcrypt``."""
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+# Lo que define cómo se hashea, para pasarlo a procesos que hashean en
+# paralelo (ver importers.hash_passwords)
+HASH_SETTINGS = ['PASSWORD_HASHERS', 'PASSWORD_PBKDF2_ITERATIONS', 'PASSWORD_ARGON2_TIME_COST',
+                 'PASSWORD_ARGON2_MEMORY_COST', 'PASSWORD_ARGON2_PARALLELISM', 'PASSWORD_BCRYPT_ROUNDS']
+
+
+def current_hash_settings():
+    return {name: getattr(settings, name) for name in HASH_SETTINGS}
+
+
+def init_worker(hash_settings):
+    """
+    Inicializador de un proceso que hashea: inicia Django y aplica los
+    ajustes del proceso padre, que pueden diferir del entorno (tests,
+    override_settings). Vive aquí porque este módulo no importa modelos.
+    """
+    django.setup()
+    for name, value in hash_settings.items():
+        setattr(settings, name, value)
+    hashers.get_hashers.cache_clear()
+    hashers.get_hashers_by_algorithm.cache_clear()
@@ -0,0 +1,406 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+from signature.hashers import current_hash_settings, init_worker
+from signature.ingest import batched
+from signature.rut import check_digits
+from .models import Major, MajorCode, Student, Subject
+from .response_cache import invalidate as invalidate_responses
+from .serializers import name_regex
+
+User = get_user_model()
+
+# Cantidad de filas por INSERT / por consulta IN. SQLite acepta como máximo
+# 999 parámetros en versiones antiguas, así que nos quedamos bajo ese límite.
+BATCH_SIZE = 500
+
+# Un archivo de 100k filas malas no debe generar una respuesta de 100k errores
+MAX_REPORTED_ERRORS = 1000
+
+STUDENT_COLUMNS = ['Rut', 'Nombre', 'Segundo_Nombre',
+                   'Apellido', 'Segundo_Apellido']
+
+ENROLLMENT_COLUMNS = ['Rut']
+
+USER_COLUMNS = ['Usuario', 'Contraseña', 'Nombre_Carrera', 'Codigo_Carrera']
+
+# Igual que UserSerializer.validate_username
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9]+$')
+
+# Bajo esta cantidad de contraseñas no vale la pena levantar procesos
+PARALLEL_HASH_MIN = 16
+
+# Contraseñas por tarea del pool: pocas, para que el avance (que en un
+# trabajo de importación es también su latido) llegue seguido
+HASH_CHUNK_SIZE = 32
+
+# Columna del CSV -> (campo del modelo, descripción para los errores)
+STUDENT_NAME_FIELDS = [
+    ('Nombre', 'first_name', 'nombre'),
+    ('Segundo_Nombre', 'second_name', 'segundo nombre'),
+    ('Apellido', 'last_name', 'apellido'),
+    ('Segundo_Apellido', 'second_last_name', 'segundo apellido'),
+]
+
+
+class ImportReport:
+    """Collects the outcome of a bulk import, one entry per rejected row."""
+
+    def __init__(self, key='rut'):
+        self.key = key
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row, value, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, self.key: value, 'error': message})
+
+    @property
+    def ok(self):
+        return not self.error_count
+
+    def as_dict(self):
+        return {'created': self.created, 'error_count': self.error_count, 'errors': self.errors}
+
+
+class EnrollmentReport:
+    """Outcome of a bulk enrollment, grouped by what happened to each RUT."""
+
+    def __init__(self):
+        self.enrolled = []
+        self.already_enrolled = []
+        self.rejected = []
+
+    def reject(self, rut, message):
+        self.rejected.append({'rut': rut, 'error': message})
+
+    def as_dict(self):
+        return {
+            'enrolled': self.enrolled,
+            'already_enrolled': self.already_enrolled,
+            'rejected': self.rejected,
+        }
+
+
+class EnrollmentError(Exception):
+    """The whole enrollment is invalid (unknown subject, wrong major...)."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def existing_ruts(ruts):
+    """Returns the subset of ``ruts`` already stored, in a single IN query."""
+    return set(Student.objects.filter(rut__in=ruts).values_list('rut', flat=True))
+
+
+def hash_passwords(passwords, progress=None):
+    """
+    Hashes ``passwords`` with the configured hasher, spreading the work over
+    a process pool since PBKDF2/argon2 are CPU bound and dominate user imports.
+    Starting the pool is costly, so callers pass every password at once.
+    ``progress`` is called with the number hashed so far, every few hashes.
+    """
+    workers = min(settings.IMPORT_HASH_WORKERS or os.cpu_count() or 1, len(passwords))
+    chunksize = max(1, min(len(passwords) // (workers * 4), HASH_CHUNK_SIZE))
+    if workers <= 1 or len(passwords) < PARALLEL_HASH_MIN:
+        return list(report_every(map(make_password, passwords), chunksize, progress))
+
+    # Sin fork(): el proceso ya tiene hilos (logging, trabajos de importación)
+    # y un hijo podría heredar un lock tomado. Cada worker inicia Django con
+    # los ajustes de hash de este proceso, no los del entorno.
+    context = multiprocessing.get_context('forkserver')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                             initargs=(current_hash_settings(),)) as pool:
+        hashes = pool.map(make_password, passwords, chunksize=chunksize)
+        return list(report_every(hashes, chunksize, progress))
+
+
+def report_every(items, size, progress):
+    """Yields ``items``, calling ``progress(count)`` every ``size`` items and at the end."""
+    count = 0
+    for count, item in enumerate(items, start=1):
+        yield item
+        if progress and count % size == 0:
+            progress(count)
+    if progress and count % size:
+        progress(count)
+
+
+def validate_student_row(line, row, major_id, report, dv):
+    """
+    Returns an unsaved Student for ``row`` or None after reporting why not.
+    ``dv`` is the check digit of the row's RUT, '' if the RUT is malformed.
+    """
+    rut = row['Rut']
+    if not dv:
+        report.add_error(line, rut, "El RUT solo debe contener números")
+        return None
+
+    if row.get('DV') and row['DV'].upper() != dv:
+        report.add_error(line, rut, "El RUT no es válido")
+        return None
+
+    names = {}
+    for column, field, label in STUDENT_NAME_FIELDS:
+        value = row[column].upper()
+        if not value:
+            report.add_error(
+                line, rut, f"El {label} del estudiante {rut} no puede estar vacío")
+            return None
+        if not name_regex.regex.match(value):
+            report.add_error(
+                line, rut, f"El {label} del estudiante {rut} solo puede contener letras y espacios")
+            return None
+        names[field] = value
+
+    return Student(rut=rut, dv=dv, major_id=major_id, **names)
+
+
+def import_students(rows, major_id, progress=None, majors=None):
+    """
+    Crea en bloque los estudiantes de un archivo para la carrera ``major_id``.
+
+    ``rows`` son pares ``(línea, fila)`` como los entrega ``UploadReader``,
+    con las columnas de ``STUDENT_COLUMNS``; si traen ``DV`` se valida contra
+    el RUT, si no se calcula. Se procesan en lotes de ``BATCH_SIZE`` (una
+    consulta IN y un ``bulk_create`` por lote) dentro de una sola transacción,
+    que se revierte completa si alguna fila tiene errores. ``progress`` se
+    llama tras cada lote con la cantidad de filas leídas. ``majors`` limita
+    las carreras aceptadas (las del usuario, ver ``signature.scoping``).
+    """
+    report = ImportReport()
+    majors = Major.objects.all() if majors is None else majors
+
+    try:
+        major_id = int(major_id)
+    except (TypeError, ValueError):
+        major_id = None
+    if major_id is None or not majors.filter(id=major_id).exists():
+        report.add_error(None, None, "Carrera no encontrada")
+        return report
+
+    # Un RUT repetido en el archivo se toma una sola vez (primera aparición)
+    seen = set()
+    processed = 0
+    try:
+        with transaction.atomic():
+            for batch in batched(rows, BATCH_SIZE):
+                processed += len(batch)
+                batch = [(line, row) for line, row in batch
+                         if row['Rut'] not in seen and not seen.add(row['Rut'])]
+                ruts = [row['Rut'] for _, row in batch]
+                already_stored = existing_ruts(ruts)
+                # Los DV de todo el lote en una sola llamada vectorizada
+                dvs = check_digits(ruts).tolist()
+
+                students = []
+                for (line, row), dv in zip(batch, dvs):
+                    if row['Rut'] in already_stored:
+                        report.add_error(line, row['Rut'], f"El estudiante {row['Rut']} ya existe")
+                        continue
+                    student = validate_student_row(line, row, major_id, report, dv)
+                    if student is not None:
+                        students.append(student)
+
+                # Tras el primer error se sigue validando para el reporte, sin insertar
+                if report.ok:
+                    Student.objects.bulk_create(students)
+                    report.created += len(students)
+                    # bulk_create no emite post_save
+                    invalidate_responses()
+                if progress:
+                    progress(processed)
+
+            if not report.ok:
+                report.created = 0
+                transaction.set_rollback(True)
+    except IntegrityError:
+        # Otra carga insertó alguno de estos RUT después de la consulta IN;
+        # la restricción unique_student_rut_dv lo detiene y se revierte todo
+        report.created = 0
+        report.add_error(None, None, "Otra carga creó algunos de estos estudiantes al mismo tiempo, intente nuevamente")
+
+    return report
+
+
+def enroll_students(rows, subject_id, major_id, progress=None, subjects=None, majors=None):
+    """
+    Inscribe en bloque los RUT de ``rows`` en la asignatura ``subject_id``.
+
+    La asignatura y su relación con la carrera se revisan una sola vez; por
+    cada lote los estudiantes se resuelven con una consulta IN y las filas
+    nuevas de la tabla intermedia se insertan con un único ``bulk_create``.
+    ``subjects`` y ``majors`` limitan las asignaturas y carreras aceptadas.
+    """
+    try:
+        subject_id, major_id = int(subject_id), int(major_id)
+    except (TypeError, ValueError):
+        raise EnrollmentError("Los IDs de carrera y asignatura deben ser números", 400)
+
+    subjects = Subject.objects.all() if subjects is None else subjects
+    if not subjects.filter(id=subject_id).exists():
+        raise EnrollmentError("Materia no encontrada", 404)
+    if majors is not None and not majors.filter(id=major_id).exists():
+        raise EnrollmentError("Carrera no encontrada", 404)
+    if not Subject.major.through.objects.filter(subject_id=subject_id, major_id=major_id).exists():
+        raise EnrollmentError("La materia no pertenece a la carrera", 400)
+
+    Enrollment = Subject.students.through
+    report = EnrollmentReport()
+    seen = set()
+    processed = 0
+
+    with transaction.atomic():
+        for batch in batched(rows, BATCH_SIZE):
+            processed += len(batch)
+            ruts = []
+            for _, row in batch:
+                rut = row['Rut']
+                if rut and rut not in seen:
+                    seen.add(rut)
+                    ruts.append(rut)
+
+            students = {
+                rut: (student_id, student_major_id, first_name)
+                for rut, student_id, student_major_id, first_name in Student.objects.filter(
+                    rut__in=ruts).values_list('rut', 'id', 'major_id', 'first_name')
+            }
+
+            candidates = {}
+            for rut in ruts:
+                if rut not in students:
+                    report.reject(rut, f"El estudiante con RUT {rut} no fue encontrado")
+                    continue
+                student_id, student_major_id, first_name = students[rut]
+                if student_major_id != major_id:
+                    report.reject(rut, f"El estudiante {first_name} no pertenece a la carrera")
+                    continue
+                candidates[student_id] = rut
+
+            enrolled_ids = set(Enrollment.objects.filter(
+                subject_id=subject_id, student_id__in=list(candidates)).values_list('student_id', flat=True))
+
+            new_rows = []
+            for student_id, rut in candidates.items():
+                if student_id in enrolled_ids:
+                    report.already_enrolled.append(rut)
+                else:
+                    report.enrolled.append(rut)
+                    new_rows.append(Enrollment(subject_id=subject_id, student_id=student_id))
+
+            Enrollment.objects.bulk_create(new_rows, ignore_conflicts=True)
+            if new_rows:
+                # bulk_create no emite m2m_changed
+                invalidate_responses()
+            if progress:
+                progress(processed)
+
+    return report
+
+
+def major_lookups(majors=None):
+    """Name -> id and code -> id maps for ``majors`` (default all), two queries in total."""
+    majors = Major.objects.all() if majors is None else majors
+    by_name = {name.upper(): major_id for major_id, name in majors.values_list('id', 'name')}
+    by_code = dict(MajorCode.objects.filter(
+        major__in=majors).values_list('code', 'major_id'))
+    return by_name, by_code
+
+
+def provision_users(rows, progress=None, majors=None):
+    """
+    Crea en bloque los usuarios de un archivo con ``USER_COLUMNS``.
+
+    Cada usuario puede aparecer en varias filas, una por carrera, así que las
+    filas se agrupan por usuario en una sola pasada. Las carreras se buscan
+    por nombre y, si no, por código usando mapas cargados una vez; las
+    contraseñas se hashean en paralelo y usuarios, carreras y tokens se
+    insertan por lotes con ``bulk_create`` en una sola transacción.
+    ``majors`` limita las carreras aceptadas: una fuera de ellas se informa
+    igual que una que no existe.
+    """
+    report = ImportReport(key='username')
+    by_name, by_code = major_lookups(majors)
+
+    users = {}
+    count = 0
+    for count, (line, row) in enumerate(rows, start=1):
+        if progress and count % BATCH_SIZE == 0:
+            progress(count)
+        username = row['Usuario']
+        if username not in users:
+            users[username] = {'line': line, 'password': row['Contraseña'],
+                               'majors': [], 'unknown_major': False}
+        entry = users[username]
+
+        major, code = row['Nombre_Carrera'], row['Codigo_Carrera']
+        major_id = by_name.get(major.upper(), by_code.get(code))
+        if major_id is None:
+            report.add_error(line, username, f"Major {major} with code {code} does not exist")
+            entry['unknown_major'] = True
+        elif major_id not in entry['majors']:
+            entry['majors'].append(major_id)
+
+    # Ya se leyeron todas las filas; hashear e insertar vuelve a informar el
+    # mismo total, para que el trabajo no parezca detenido
+    if progress:
+        progress(count)
+
+    taken = set()
+    for batch in batched(users, BATCH_SIZE):
+        taken.update(User.objects.filter(
+            username__in=batch).values_list('username', flat=True))
+
+    for username, entry in users.items():
+        line = entry['line']
+        if entry['unknown_major']:
+            continue
+        if not username:
+            report.add_error(line, username, "El nombre de usuario es obligatorio.")
+        elif not USERNAME_PATTERN.match(username) or len(username) > 150:
+            report.add_error(line, username, "El nombre de usuario solo puede contener letras y números.")
+        elif username in taken:
+            report.add_error(line, username, f"El usuario {username} ya existe")
+        elif not entry['password']:
+            report.add_error(line, username, "La contraseña es obligatoria.")
+        elif not entry['majors']:
+            report.add_error(line, username, "El usuario debe tener asignado por lo menos una carrera.")
+
+    if not report.ok:
+        return report
+
+    # Todas de una vez y fuera de la transacción: un solo pool de procesos
+    hashes = hash_passwords([entry['password'] for entry in users.values()],
+                            progress and (lambda _: progress(count)))
+
+    UserMajor = User.majors.through
+    with transaction.atomic():
+        for batch in batched(zip(users.items(), hashes), BATCH_SIZE):
+            new_users = [
+                User(username=username, password=password_hash, is_superuser=False, is_staff=False)
+                for (username, _), password_hash in batch
+            ]
+            User.objects.bulk_create(new_users)
+            UserMajor.objects.bulk_create([
+                UserMajor(permissionuser_id=user.id, major_id=major_id)
+                for user, ((_, entry), _) in zip(new_users, batch)
+                for major_id in entry['majors']
+            ], batch_size=BATCH_SIZE)
+            Token.objects.bulk_create([
+                Token(key=Token.generate_key(), user=user) for user in new_users
+            ])
+            report.created += len(new_users)
+            if progress:
+                progress(count)
+
+    return report
@@ -0,0 +1,111 @@
+import csv
+import io
+from datetime import date, datetime
+from itertools import islice
+from django.conf import settings
+
+XLSX_MAGIC = b'PK\x03\x04'
+
+# Cabeceras alternativas -> nombre que esperan los importadores. Los registros
+# de asistencia que llenan las secretarías usan "RUT (sin puntos)" y "DV".
+COLUMN_ALIASES = {
+    'rut': 'Rut',
+    'rut (sin puntos)': 'Rut',
+    'dv': 'DV',
+}
+
+
+class UploadFormatError(Exception):
+    """The uploaded file cannot be read or does not have the expected shape."""
+
+
+class UploadReader:
+    """
+    Lee un CSV o XLSX subido fila a fila, sin cargarlo completo en memoria.
+
+    Se itera como pares ``(línea, fila)`` donde ``fila`` es un dict
+    columna -> texto, y se corta con error al pasar ``IMPORT_MAX_ROWS``.
+    """
+
+    def __init__(self, upload, expected_columns, max_rows=None):
+        self.upload = upload
+        self.max_rows = max_rows or settings.IMPORT_MAX_ROWS
+
+        upload.seek(0)
+        if upload.name.lower().endswith('.xlsx') or upload.read(4) == XLSX_MAGIC:
+            self._rows = self._xlsx_rows()
+        else:
+            self._rows = self._csv_rows()
+
+        try:
+            _, header = next(self._rows)
+        except StopIteration:
+            raise UploadFormatError("El archivo está vacío")
+        self.columns = [COLUMN_ALIASES.get(name.lower(), name) for name in header]
+
+        if not all(column in self.columns for column in expected_columns):
+            raise UploadFormatError("El CSV no contiene las columnas correctas")
+
+    def _csv_rows(self):
+        self.upload.seek(0)
+        raw = self.upload.file
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        try:
+            first_line = text.readline()
+            text.seek(0)
+            # Excel en español exporta con ';' como separador
+            delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+            reader = csv.reader(text, delimiter=delimiter)
+            for values in reader:
+                if any(value.strip() for value in values):
+                    yield reader.line_num, [value.strip() for value in values]
+        except UnicodeDecodeError:
+            raise UploadFormatError("El archivo debe estar codificado en UTF-8")
+        finally:
+            # No cerrar el archivo subido junto con el wrapper (si el
+            # generador se abandona, Django ya puede haberlo cerrado o, en un
+            # trabajo de importación, borrado)
+            if not raw.closed:
+                text.detach()
+
+    def _xlsx_rows(self):
+        from openpyxl import load_workbook
+
+        self.upload.seek(0)
+        try:
+            workbook = load_workbook(self.upload, read_only=True, data_only=True)
+        except Exception:
+            raise UploadFormatError("El archivo XLSX no se pudo leer")
+        try:
+            sheet = workbook.active
+            for line, values in enumerate(sheet.iter_rows(values_only=True), start=1):
+                values = [cell_to_text(value) for value in values]
+                if any(values):
+                    yield line, values
+        finally:
+            workbook.close()
+
+    def __iter__(self):
+        width = len(self.columns)
+        for count, (line, values) in enumerate(self._rows, start=1):
+            if count > self.max_rows:
+                raise UploadFormatError(
+                    f"El archivo no puede tener más de {self.max_rows} filas")
+            values = values[:width] + [''] * (width - len(values))
+            yield line, dict(zip(self.columns, values))
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def cell_to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%d/%m/%Y')
+    return str(value).strip()
@@ -0,0 +1,142 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils import timezone
+from .importers import (import_students, enroll_students, provision_users, EnrollmentError,
+                        STUDENT_COLUMNS, ENROLLMENT_COLUMNS, USER_COLUMNS)
+from .ingest import UploadReader, UploadFormatError
+from .models import ImportJob
+from .scoping import majors_of, subjects_of
+
+logger = logging.getLogger('api')
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMPORT_JOB_WORKERS, thread_name_prefix='import-job')
+    return _executor
+
+
+def progress_cache():
+    """The IMPORT_PROGRESS_CACHE alias; it must be shared between processes."""
+    return caches[settings.IMPORT_PROGRESS_CACHE]
+
+
+def progress_key(job_id):
+    return f'import-job:{job_id}:rows'
+
+
+def report_progress(job_id, rows):
+    # Expires on its own once the job stops advancing, so it doubles as the
+    # heartbeat recover_stale_jobs looks for
+    progress_cache().set(progress_key(job_id), rows, timeout=settings.IMPORT_JOB_STALE_AFTER)
+
+
+def live_rows_processed(job):
+    """
+    Rows processed so far. While a job runs its progress lives in the cache,
+    because the import transaction hides any write to the job row until it
+    commits.
+    """
+    if job.status == ImportJob.RUNNING:
+        return progress_cache().get(progress_key(job.id), job.rows_processed)
+    return job.rows_processed
+
+
+def enqueue(job):
+    """Schedules ``job`` once the transaction that created it commits."""
+    if settings.IMPORT_JOBS_EAGER:
+        run_job(job.id)
+    else:
+        transaction.on_commit(lambda: get_executor().submit(run_job, job.id))
+
+
+def run_import(job, progress):
+    params = job.params
+    # Las carreras de quien lo encoló se revisan de nuevo al ejecutarlo: pueden
+    # haber cambiado mientras esperaba y el archivo de usuarios no se validó antes
+    majors = majors_of(job.created_by)
+    if job.kind == ImportJob.STUDENTS:
+        rows = UploadReader(job.file, STUDENT_COLUMNS)
+        return import_students(rows, params.get('major_id'), progress, majors=majors)
+    if job.kind == ImportJob.ENROLLMENTS:
+        rows = UploadReader(job.file, ENROLLMENT_COLUMNS)
+        return enroll_students(rows, params.get('subject_id'), params.get('major_id'), progress,
+                               subjects=subjects_of(job.created_by), majors=majors)
+    rows = UploadReader(job.file, USER_COLUMNS)
+    return provision_users(rows, progress, majors=majors)
+
+
+def run_job(job_id):
+    """
+    Runs a pending job and returns True, or False if someone else already
+    took it: the state change is conditional, so a job requeued by
+    recover_stale_jobs while still queued in another process runs once.
+    """
+    if not ImportJob.objects.filter(id=job_id, status=ImportJob.PENDING).update(
+            status=ImportJob.RUNNING, started_at=timezone.now()):
+        return False
+    job = ImportJob.objects.get(id=job_id)
+    report_progress(job.id, 0)
+
+    processed = 0
+
+    def progress(rows):
+        nonlocal processed
+        processed = rows
+        report_progress(job.id, rows)
+
+    try:
+        with job.file.open('rb'):
+            report = run_import(job, progress)
+        job.result = report.as_dict()
+        job.status = ImportJob.COMPLETED if getattr(report, 'ok', True) else ImportJob.FAILED
+    except (UploadFormatError, EnrollmentError) as e:
+        job.status = ImportJob.FAILED
+        job.error = str(e)
+    except Exception as e:
+        logger.exception(f"Import job {job.id} crashed")
+        job.status = ImportJob.FAILED
+        job.error = str(e)
+    finally:
+        job.rows_processed = processed
+        job.finished_at = timezone.now()
+        job.save()
+        job.file.delete(save=False)
+        progress_cache().delete(progress_key(job.id))
+        if not settings.IMPORT_JOBS_EAGER:
+            # Las conexiones son por hilo; no dejarlas abiertas en el pool
+            connections.close_all()
+    return True
+
+
+def recover_stale_jobs():
+    """
+    Jobs lost with the process that ran them (a restart, a crash). A
+    ``running`` job with no progress for IMPORT_JOB_STALE_AFTER seconds is
+    marked failed; a job still ``pending`` after that long is run here.
+    Returns ``(failed, rerun)``.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+
+    failed = 0
+    for job in ImportJob.objects.filter(status=ImportJob.RUNNING, started_at__lt=cutoff):
+        if progress_cache().get(progress_key(job.id)) is not None:
+            continue
+        if ImportJob.objects.filter(id=job.id, status=ImportJob.RUNNING).update(
+                status=ImportJob.FAILED, finished_at=now, file='',
+                error="El trabajo se interrumpió; vuelve a subir el archivo"):
+            job.file.delete(save=False)
+            failed += 1
+
+    pending = ImportJob.objects.filter(status=ImportJob.PENDING, created_at__lt=cutoff).order_by('id')
+    rerun = sum(run_job(job_id) for job_id in pending.values_list('id', flat=True))
+    return failed, rerun
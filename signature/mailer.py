@@ -0,0 +1,235 @@
+import logging
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger('api')
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Errores del destinatario/remitente: reintentar no los arregla
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+# Un solo hilo: una sola conexión SMTP autenticada atiende toda la cola
+_executor = None
+_retry_timer = None
+_timer_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mailer')
+    return _executor
+
+
+def enqueue():
+    """Despacha la cola una vez que se confirma la transacción que encoló los correos."""
+    if settings.MAIL_QUEUE_EAGER:
+        deliver_pending()
+    else:
+        transaction.on_commit(kick)
+
+
+def kick():
+    get_executor().submit(drain)
+
+
+def drain():
+    try:
+        deliver_pending()
+        schedule_retry()
+    except Exception:
+        logger.exception("Mail queue worker crashed")
+    finally:
+        # Las conexiones son por hilo; no dejarlas abiertas en el worker
+        connections.close_all()
+
+
+def schedule_retry():
+    """Programa el siguiente despacho para el reintento más próximo, si hay."""
+    global _retry_timer
+    next_attempt = OutboundEmail.objects.filter(status=OutboundEmail.QUEUED).order_by(
+        'next_attempt_at').values_list('next_attempt_at', flat=True).first()
+    if next_attempt is None:
+        return
+    delay = max((next_attempt - timezone.now()).total_seconds(), 0)
+    with _timer_lock:
+        if _retry_timer is not None:
+            _retry_timer.cancel()
+        _retry_timer = threading.Timer(delay, kick)
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+
+def store_attachment(upload):
+    """
+    Guarda un archivo subido en ``outbox/`` una sola vez (el storage lo copia
+    por chunks, sin cargarlo entero en memoria) y devuelve su nombre, para que
+    varios correos del mismo lote compartan el adjunto.
+    """
+    field = OutboundEmail._meta.get_field('attachment')
+    return field.storage.save(field.generate_filename(None, upload.name), upload)
+
+
+def release_attachment(email):
+    """
+    Borra el adjunto de un correo enviado cuando ningún otro correo que lo
+    comparte lo necesita todavía (en cola, enviándose o fallido). True si lo
+    borró.
+    """
+    name = email.attachment.name
+    sharing = OutboundEmail.objects.filter(attachment=name).exclude(id=email.id)
+    if sharing.exclude(status=OutboundEmail.SENT).exists():
+        return False
+    email.attachment.delete(save=False)
+    sharing.update(attachment='')
+    return True
+
+
+def build_message(email, connection=None, attachments=None):
+    """
+    ``attachments`` (nombre en el storage -> contenido) guarda los adjuntos
+    ya leídos, así un registro compartido por varios destinatarios se lee
+    una sola vez por lote.
+    """
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.recipient],
+        connection=connection,
+    )
+    if email.attachment:
+        attachments = {} if attachments is None else attachments
+        name = email.attachment.name
+        if name not in attachments:
+            with email.attachment.open('rb') as attachment:
+                attachments[name] = attachment.read()
+        message.attach(email.attachment_name or name, attachments[name], XLSX_MIMETYPE)
+    return message
+
+
+def requeue_stale():
+    """
+    Devuelve a la cola los correos que quedaron en ``sending`` más de
+    MAIL_SENDING_LEASE segundos: el proceso que los tomó murió antes de
+    guardar el resultado. Ese intento cuenta para MAIL_MAX_ATTEMPTS, así un
+    correo que tumba al worker no se reintenta para siempre.
+    """
+    now = timezone.now()
+    stale = OutboundEmail.objects.filter(
+        Q(claimed_at__lt=now - timedelta(seconds=settings.MAIL_SENDING_LEASE)) | Q(claimed_at__isnull=True),
+        status=OutboundEmail.SENDING)
+    error = "El envío se interrumpió"
+    stale.filter(attempts__gte=settings.MAIL_MAX_ATTEMPTS - 1).update(
+        status=OutboundEmail.FAILED, attempts=F('attempts') + 1, last_error=error, claimed_at=None)
+    return stale.update(
+        status=OutboundEmail.QUEUED, attempts=F('attempts') + 1, last_error=error,
+        next_attempt_at=now, claimed_at=None)
+
+
+def claim_due(limit):
+    """
+    Marca como ``sending`` hasta ``limit`` correos que ya toca enviar. El
+    cambio de estado es condicional, así que si otro worker (el comando
+    ``send_queued_mail``) toma el mismo correo, solo uno lo envía.
+    """
+    requeue_stale()
+    due = OutboundEmail.objects.filter(
+        status=OutboundEmail.QUEUED, next_attempt_at__lte=timezone.now(),
+    ).order_by('id').values_list('id', flat=True)[:limit]
+
+    claimed = []
+    for email_id in due:
+        if OutboundEmail.objects.filter(id=email_id, status=OutboundEmail.QUEUED).update(
+                status=OutboundEmail.SENDING, claimed_at=timezone.now()):
+            claimed.append(email_id)
+    return OutboundEmail.objects.filter(id__in=claimed).order_by('id')
+
+
+def renew_claim(email):
+    """
+    Renueva el plazo de ``email`` justo antes de enviarlo, así el plazo solo
+    tiene que cubrir un envío y no el lote completo. False si el correo ya
+    no es de este worker (se venció y otro lo volvió a tomar).
+    """
+    now = timezone.now()
+    renewed = OutboundEmail.objects.filter(
+        id=email.id, status=OutboundEmail.SENDING, claimed_at=email.claimed_at,
+    ).update(claimed_at=now)
+    email.claimed_at = now
+    return bool(renewed)
+
+
+def retry_later(email, error):
+    """Backoff exponencial: MAIL_RETRY_DELAY, 2x, 4x... hasta MAIL_MAX_ATTEMPTS."""
+    email.last_error = str(error)
+    if email.attempts >= settings.MAIL_MAX_ATTEMPTS:
+        email.status = OutboundEmail.FAILED
+    else:
+        email.status = OutboundEmail.QUEUED
+        delay = settings.MAIL_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+
+def deliver_pending(limit=None, connection=None):
+    """
+    Envía los correos en cola que ya toca enviar por una sola conexión SMTP,
+    abierta (STARTTLS + login) una vez para todo el lote. Si la conexión se
+    cae, ese correo se reintenta más tarde y la conexión se reabre para el
+    siguiente. Devuelve cuántos quedaron enviados, por reintentar y fallidos.
+    """
+    counts = {'sent': 0, 'retry': 0, 'failed': 0}
+    emails = claim_due(limit or settings.MAIL_BATCH_SIZE)
+    if not emails:
+        return counts
+
+    connection = connection or get_connection()
+    attachments = {}
+    try:
+        for email in emails:
+            if not renew_claim(email):
+                continue
+            email.attempts += 1
+            try:
+                # send_messages() cierra la conexión si la abrió él mismo;
+                # abriéndola antes queda viva para el correo siguiente
+                connection.open()
+                connection.send_messages([build_message(email, connection, attachments)])
+            except PERMANENT_ERRORS as e:
+                email.status = OutboundEmail.FAILED
+                email.last_error = str(e)
+            except (smtplib.SMTPException, OSError) as e:
+                logger.warning(f"Email {email.id} to {email.recipient} failed: {e}")
+                connection.close()
+                retry_later(email, e)
+            else:
+                email.status = OutboundEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                if email.attachment:
+                    name = email.attachment.name
+                    if release_attachment(email):
+                        attachments.pop(name, None)
+            email.claimed_at = None
+            email.save(update_fields=['status', 'attempts', 'next_attempt_at',
+                                      'last_error', 'sent_at', 'attachment', 'claimed_at'])
+
+            if email.status == OutboundEmail.SENT:
+                counts['sent'] += 1
+            elif email.status == OutboundEmail.FAILED:
+                counts['failed'] += 1
+            else:
+                counts['retry'] += 1
+    finally:
+        connection.close()
+
+    return counts
@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from signature.attendance import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = ("Recalcula AttendanceSummary desde los registros de asistencia. Los "
+            "contadores se mantienen solos al marcar; esto corrige desvíos (p. ej. "
+            "tras borrar clases o estudiantes) o carga datos importados por otra vía.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=int, action='append', dest='subjects',
+                            help="Solo esta asignatura (se puede repetir)")
+
+    def handle(self, *args, subjects=None, **options):
+        start = time.perf_counter()
+        rows = rebuild_summary(subjects)
+        self.stdout.write(f"{rows} filas de resumen en {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from signature.jobs import recover_stale_jobs
+
+
+class Command(BaseCommand):
+    help = ("Retoma los trabajos de /api/import-jobs/ que se perdieron con el proceso "
+            "que los ejecutaba: los que quedaron 'running' sin avanzar se marcan "
+            "fallidos y los que siguen 'pending' se ejecutan aquí. Útil al iniciar "
+            "el servidor o desde cron.")
+
+    def handle(self, *args, **options):
+        failed, rerun = recover_stale_jobs()
+        self.stdout.write(f"{failed} trabajos interrumpidos marcados como fallidos, {rerun} pendientes ejecutados")
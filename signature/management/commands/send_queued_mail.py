@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from signature.mailer import deliver_pending
+
+
+class Command(BaseCommand):
+    help = ("Envía los correos en cola de /sendEmail/ que ya toca enviar. Útil desde "
+            "cron o como servicio (--loop) para retomar la cola tras un reinicio.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Seguir revisando la cola cada --interval segundos")
+        parser.add_argument('--interval', type=float, default=30)
+
+    def handle(self, *args, loop=False, interval=30, **options):
+        while True:
+            counts = deliver_pending()
+            if any(counts.values()):
+                self.stdout.write(
+                    f"{counts['sent']} enviados, {counts['retry']} por reintentar, "
+                    f"{counts['failed']} fallidos")
+            if not loop:
+                break
+            time.sleep(interval)
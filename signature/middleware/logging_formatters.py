@@ -1,8 +1,46 @@
-import re
+import json
 import logging
+from datetime import datetime, timezone
+from colorama import Fore, Style
+
+# Atributos propios de LogRecord; el resto son campos pasados con extra=
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+LEVEL_COLORS = {
+    logging.DEBUG: Fore.WHITE,
+    logging.INFO: Fore.GREEN,
+    logging.WARNING: Fore.YELLOW,
+    logging.ERROR: Fore.RED,
+    logging.CRITICAL: Fore.RED,
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Un objeto JSON por línea con la hora, el nivel, el logger, el mensaje y
+    todos los campos pasados con ``extra=`` (status_code, duration_ms...).
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ColorFormatter(logging.Formatter):
+    """Colorea la línea según el nivel; solo para la consola."""
 
-class NoColorFormatter(logging.Formatter):
     def format(self, record):
-        message = super().format(record)
-        ansi_escape = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
-        return ansi_escape.sub('', message)
\ No newline at end of file
+        color = LEVEL_COLORS.get(record.levelno, Fore.WHITE)
+        return f"{color}{super().format(record)}{Style.RESET_ALL}"
@@ -0,0 +1,44 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Deja los registros en una cola acotada y vuelve de inmediato; un
+    ``QueueListener`` en otro hilo los formatea y escribe (archivo, consola).
+
+    Si el escritor no da abasto y la cola se llena, el registro se descarta
+    en vez de bloquear el request. ``dropped`` cuenta los descartados y se
+    agrega como campo ``dropped_records`` a los registros siguientes.
+
+    Se configura con ``dictConfig`` (claves ``queue`` y ``handlers``) y el
+    listener se inicia en ``SignatureConfig.ready()``.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # handle() ya tiene tomado self.lock, así que el contador es seguro
+            self.dropped += 1
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        if self.dropped:
+            record.dropped_records = self.dropped
+        return record
+
+
+def start_queue_listeners():
+    """Inicia (una sola vez) los listeners de los QueueHandler configurados."""
+    for name in logging.getHandlerNames():
+        listener = getattr(logging.getHandlerByName(name), 'listener', None)
+        if listener is not None and listener._thread is None:
+            listener.start()
+            atexit.register(listener.stop)
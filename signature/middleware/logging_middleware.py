@@ -1,14 +1,12 @@
-from signature.serializers import MajorSerializer, StudentSerializer, SubjectSerializer, UserSerializer
-from django.utils.deprecation import MiddlewareMixin
-from colorama import Fore, Style, init
-import logging
 import json
-import time
+import logging
+import random
 import re
-
+import time
+from django.conf import settings
+from django.http import QueryDict
 
 logger = logging.getLogger('api') #Logger configuration
-init() #Colorama initialization
 
 # Words sensitive to reject
 SENSITIVE_KEYS = {'password', 'token', 'authorization', 'auth', 'credentials'}
@@ -17,88 +15,146 @@ SENSITIVE_PATTERNS = [
     re.compile(r'bearer\s+\w+', re.IGNORECASE)
 ]
 
-class RequestLoggingMiddleware(MiddlewareMixin):
-    
-    def __init__(self, get_response=None):
-        super().__init__(get_response)
-        self.sensitive_keys = SENSITIVE_KEYS
-        self.sensitive_patterns = SENSITIVE_PATTERNS
-        
-    def process_request(self, request):
-        request.start_time = time.time()
-        return None
-
-    def process_response(self, request, response):
-        duration = time.time() - getattr(request, 'start_time', time.time())
-        
-        # Obtener información básica del usuario
-        user_info = {
-            'username': 'anonymous',
-            'is_admin': False
-        }
-        
-        if request.user.is_authenticated:
-            user_info.update({
-                'username': str(request.user),
-                'is_admin': request.user.is_staff or request.user.is_superuser
-            })
-        
-        # Detectar operaciones CRUD relevantes
-        operation_log = self.get_operation_details(request, response)
-
-        # Construir mensaje principal
-        log_message = (
-            f"{self.color_method(request.method)} {request.path} - "
-            f"{self.color_status(response.status_code)} "
-            f"User: {Fore.BLUE}{user_info['username']}{Style.RESET_ALL} "
-            f"({duration:.2f}s) "
-            f"({'Admin' if user_info['is_admin'] else 'User'})"
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+OPERATIONS = {
+    'GET': 'Retrieved',
+    'POST': 'Created',
+    'PUT': 'Updated',
+    'PATCH': 'Updated',
+    'DELETE': 'Deleted'
+}
+
+# Solo se guarda el cuerpo de JSON/formularios chicos, nunca los archivos subidos
+LOGGED_BODY_TYPES = ('application/json', 'application/x-www-form-urlencoded')
+MAX_LOGGED_BODY = 4096
+
+
+class RequestLoggingMiddleware:
+    """
+    Un registro por request con método, ruta, status, duración, usuario, IP
+    y la operación sobre el modelo (``Created Student 12345678``).
+
+    Para que el costo sea despreciable con carga:
+
+    - Las lecturas exitosas se muestrean (``REQUEST_LOG_SAMPLE_RATE``); los
+      errores y las escrituras se registran siempre.
+    - El cuerpo solo se guarda en escrituras JSON/formulario pequeñas y se
+      parsea y sanitiza recién al emitir el registro.
+    - El modelo de cada ruta se obtiene del ViewSet resuelto por el URL
+      resolver de Django y se cachea por nombre de ruta.
+
+    Deja ``request.log_sampled`` para que ``QueryProfilerMiddleware`` siga
+    la misma decisión.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.route_models = {}
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        request.log_sampled = (
+            request.method not in SAFE_METHODS
+            or random.random() < settings.REQUEST_LOG_SAMPLE_RATE
         )
-        
-        # Nivel de log basado en status code
-        log_level = self.get_log_level(response.status_code)
-        self.color_level(log_level)
-        # Registrar mensaje principal
-        logger.log(log_level, log_message)
-        
-        # Registrar detalles específicos de operación si existen
-        if operation_log:
-            logger.info(f"Operation: {operation_log}")
-        
+        body = self.capture_body(request) if request.method not in SAFE_METHODS else None
+
+        response = self.get_response(request)
+
+        if request.log_sampled or response.status_code >= 400:
+            self.log(request, response, body, time.perf_counter() - start)
         return response
 
-    def get_operation_details(self, request, response):
-        """Detecta y formatea operaciones específicas en los modelos clave"""
+    def log(self, request, response, body, duration):
+        user = getattr(request, 'user', None)
+        authenticated = user is not None and user.is_authenticated
+        username = str(user) if authenticated else 'anonymous'
+        is_admin = authenticated and (user.is_staff or user.is_superuser)
+        operation = self.get_operation(request, response)
 
-        operation_map = {
-            'GET': 'Retrieved',
-            'POST': 'Created',
-            'PUT': 'Updated',
-            'PATCH': 'Updated',
-            'DELETE': 'Deleted'
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status_code': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'user': username,
+            'is_admin': is_admin,
+            'client_ip': self.get_client_ip(request),
+            'operation': operation,
         }
-        
-        # Detectar modelo afectado
-        model_match = {
-            '/api/subjects/': 'Subject',
-            '/api/students/': 'Student',
-            '/api/majors/': 'Major',
-            '/api/users/': 'User'
-        }
-        
-        if request.method in ["GET"]:
-            for path, model in model_match.items():
-                if request.path.startswith(path):
-                    operation = operation_map.get(request.method)
-                    return f"{operation} {model} "
-        else:
-            for path, model in model_match.items():
-                if request.path.startswith(path):
-                    operation = operation_map.get(request.method)
-                    resource_name = self.get_resource_name(request, response)
-                    return f"{operation} {model} {resource_name}"
-
-        return None 
+        if request.GET:
+            fields['query_params'] = self.sanitize_data(dict(request.GET))
+        if body is not None:
+            fields['request_body'] = self.sanitize_data(self.parse_body(body, request.content_type))
+
+        logger.log(
+            self.get_log_level(response.status_code),
+            "%s %s - %s User: %s (%.2fs) (%s)%s",
+            request.method, request.path, response.status_code, username, duration,
+            'Admin' if is_admin else 'User',
+            f" Operation: {operation}" if operation else "",
+            extra=fields,
+        )
+
+    def capture_body(self, request):
+        """
+        Lee el cuerpo crudo antes de que la vista consuma el stream; no lo
+        parsea. Archivos y cuerpos grandes no se guardan.
+        """
+        if request.content_type not in LOGGED_BODY_TYPES:
+            return None
+        try:
+            if int(request.META.get('CONTENT_LENGTH') or 0) > MAX_LOGGED_BODY:
+                return None
+            return request.body
+        except Exception:
+            return None
+
+    def parse_body(self, body, content_type):
+        """
+        JSON o formulario como dict, para que ``sanitize_data`` oculte los
+        valores por clave. Un cuerpo que no se puede parsear no se guarda:
+        como texto crudo solo se ocultarían los nombres de los campos.
+        """
+        try:
+            if content_type == 'application/json':
+                return json.loads(body)
+            return QueryDict(body, encoding='utf-8').dict()
+        except Exception:
+            return '[cuerpo no válido]'
+
+    def get_operation(self, request, response):
+        """Detecta y formatea operaciones específicas en los modelos clave"""
+        model = self.get_route_model(request)
+        if model is None:
+            return None
+        operation = OPERATIONS.get(request.method)
+        if request.method in SAFE_METHODS:
+            return f"{operation} {model} "
+        return f"{operation} {model} {self.get_resource_name(request, response)}"
+
+    def get_route_model(self, request):
+        """Nombre del modelo del ViewSet de la ruta, cacheado por ``view_name``."""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        try:
+            return self.route_models[match.view_name]
+        except KeyError:
+            pass
+
+        view = getattr(match.func, 'cls', None)
+        model = getattr(getattr(view, 'queryset', None), 'model', None)
+        if model is None:
+            meta = getattr(getattr(view, 'serializer_class', None), 'Meta', None)
+            model = getattr(meta, 'model', None)
+        name = None
+        if model is not None:
+            # PermissionUser se registra como User, igual que la ruta
+            name = 'User' if model._meta.model_name == 'permissionuser' else model.__name__
+        self.route_models[match.view_name] = name
+        return name
 
     def get_resource_name(self, request, response):
         """
@@ -106,36 +162,24 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         """
         preferred_keys = ['username', 'name', 'first_name']
 
-        # Usar el nombre guardado si existe
+        # Usar el nombre guardado por la vista si existe
         if 'RESOURCE_NAME' in request.META:
             return str(request.META['RESOURCE_NAME'])
-        
-        try:
-            if isinstance(response.data, dict):
-                for key in preferred_keys:
-                    if key in response.data:
-                        return str(response.data[key])
-                return f"[Data: {str(response.data)[:50]}...]"
-            else:
-                return f"[{type(response.data).__name__} Data]"
-        except Exception as e:
-            logger.warning(f"Error retrieving resource name: {str(e)}")
-            return "[error retrieving]"
-
-
-    def get_instance_data(self, response, serializer_class):
-        """
-        Extrae y sanitiza datos de la respuesta
-        """
-        try:
-            if response.status_code in [200, 201]:
-                serializer = serializer_class(data=response.data)
-                serializer.is_valid()
-                return self.sanitize_data(serializer.validated_data)
-        except Exception as e:
-            logger.warning(f"Error parsing response data: {str(e)}")
-            
-    
+
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict):
+            for key in preferred_keys:
+                if key in data:
+                    return str(data[key])
+            return f"[Data: {str(data)[:50]}...]"
+        return f"[{type(data).__name__} Data]"
+
+    def get_client_ip(self, request):
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            return x_forwarded_for.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR')
+
     def sanitize_data(self, data):
         """Filters sensitive data from the request"""
         if isinstance(data, dict):
@@ -145,54 +189,25 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         elif isinstance(data, (list, tuple)):
             return [self.sanitize_data(item) for item in data]
         return data
-    
+
     def redact_sensitive(self, key, value):
         """Redact sensitive keys and values"""
         key_str = str(key).lower()
-        if any(sensitive in key_str for sensitive in self.sensitive_keys):
+        if any(sensitive in key_str for sensitive in SENSITIVE_KEYS):
             return '[REDACTED]'
         return self.sanitize_data(value)
-    
+
     def redact_string(self, text):
         """Redact sensitive patterns in strings"""
         text = str(text)
-        for pattern in self.sensitive_patterns:
+        for pattern in SENSITIVE_PATTERNS:
             text = pattern.sub('[REDACTED]', text)
         return text
-    
+
     def get_log_level(self, status_code):
         """Determines the log level based on the status code"""
         if status_code >= 500:
-                return logging.ERROR
+            return logging.ERROR
         elif status_code >= 400:
             return logging.WARNING if status_code not in [404] else logging.INFO
         return logging.INFO
-    
-    def color_method(self, method):
-        """Applies colors based on the HTTP method"""
-        colors = {
-            'GET': Fore.GREEN,
-            'POST': Fore.BLUE,
-            'PUT': Fore.YELLOW,
-            'PATCH': Fore.YELLOW,
-            'DELETE': Fore.RED,
-        }
-        return f"{colors.get(method, Fore.WHITE)}{method}{Style.RESET_ALL}"
-    
-    def color_level(self, level):
-        """Applies colors based on the log level"""
-        if level >= logging.ERROR:
-            return Fore.RED
-        elif level >= logging.WARNING:
-            return Fore.YELLOW
-        return Fore.GREEN
-    
-    def color_status(self, status_code):
-        """Applies colors based on the status code"""
-        if status_code >= 500:
-            return f"{Fore.RED}{status_code}{Style.RESET_ALL}"
-        elif status_code >= 400:
-            return f"{Fore.YELLOW}{status_code}{Style.RESET_ALL}"
-        elif status_code >= 300:
-            return f"{Fore.CYAN}{status_code}{Style.RESET_ALL}"
-        return f"{Fore.GREEN}{status_code}{Style.RESET_ALL}"
\ No newline at end of file
@@ -0,0 +1,149 @@
+import heapq
+import logging
+import re
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('api.queries')
+
+# Cuántas de las consultas más lentas se informan por request
+SLOWEST_COUNT = 3
+
+# A partir de cuántas repeticiones de una misma consulta se avisa (N+1)
+DUPLICATE_WARNING = 10
+
+# "IN (%s, %s, %s)" y literales numéricos no cambian la forma de la consulta
+IN_LIST = re.compile(r'IN \((?:%s|\?)(?:, ?(?:%s|\?))*\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+class QueryBudgetExceeded(Exception):
+    """The view ran more SQL statements than its declared budget."""
+
+
+def query_budget(budget):
+    """
+    Declara el máximo de consultas de una vista basada en función::
+
+        @query_budget(3)
+        @api_view(['POST'])
+        def login(request): ...
+
+    En los ViewSet se usa el atributo ``query_budgets`` (acción -> máximo).
+    """
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def fingerprint(sql):
+    return NUMBER.sub('N', IN_LIST.sub('IN (...)', sql))
+
+
+class QueryProfile:
+    """Execute wrapper que registra cada consulta del request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            self.fingerprints[fingerprint(sql)] += 1
+            entry = (duration, self.count, sql)
+            if len(self.slowest) < SLOWEST_COUNT:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    def has_n_plus_one(self):
+        return any(count >= DUPLICATE_WARNING for count in self.fingerprints.values())
+
+    def as_log_fields(self):
+        return {
+            'db_queries': self.count,
+            'db_time_ms': round(self.duration * 1000, 2),
+            'slow_queries': [
+                {'sql': sql[:300], 'ms': round(duration * 1000, 2)}
+                for duration, _, sql in sorted(self.slowest, reverse=True)
+            ],
+            'duplicate_queries': self.duplicates(),
+        }
+
+
+class QueryProfilerMiddleware:
+    """
+    Mide las consultas SQL de cada request: cantidad, tiempo total, las más
+    lentas y las repetidas (misma consulta salvo parámetros, típico N+1).
+
+    Se informan como campos del registro ``api.queries`` y en la cabecera
+    ``Server-Timing`` (visible en la pestaña Network del navegador). Si la
+    vista declaró un presupuesto y se excede, se registra un warning o, con
+    ``QUERY_BUDGET_ACTION = 'raise'`` (los tests), se lanza
+    ``QueryBudgetExceeded``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = QueryProfile()
+        start = time.perf_counter()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        server_timing = (
+            f'db;dur={profile.duration * 1000:.2f};desc="{profile.count} queries", '
+            f'app;dur={total * 1000:.2f}'
+        )
+        if response.has_header('Server-Timing'):
+            server_timing = f"{response['Server-Timing']}, {server_timing}"
+        response['Server-Timing'] = server_timing
+
+        fields = profile.as_log_fields()
+        budget = getattr(request, 'query_budget', None)
+        fields['db_query_budget'] = budget
+        over_budget = budget is not None and profile.count > budget
+
+        if over_budget and settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(
+                f"{request.method} {request.path} ran {profile.count} queries, budget is {budget}")
+
+        # Los requests normales siguen el muestreo de RequestLoggingMiddleware
+        warn = over_budget or profile.has_n_plus_one()
+        if warn or getattr(request, 'log_sampled', True):
+            logger.log(
+                logging.WARNING if warn else logging.INFO,
+                "%s %s %d queries in %.2fms%s", request.method, request.path,
+                profile.count, fields['db_time_ms'],
+                f" (over budget of {budget})" if over_budget else "", extra=fields,
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = self.get_budget(request, view_func)
+
+    def get_budget(self, request, view_func):
+        budget = getattr(view_func, 'query_budget', None)
+        # ViewSet: as_view() deja la clase y el mapeo método -> acción
+        budgets = getattr(getattr(view_func, 'cls', None), 'query_budgets', None)
+        actions = getattr(view_func, 'actions', None)
+        if budgets and actions:
+            budget = budgets.get(actions.get(request.method.lower()), budget)
+        return budget
@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signature', '0010_importjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='major',
+            name='name',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='majorcode',
+            name='code',
+            field=models.CharField(max_length=15, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['major', 'last_name'], name='student_major_last_name_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.UniqueConstraint(fields=('rut', 'dv'), name='unique_student_rut_dv'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_summary(apps, schema_editor):
+    AttendanceRecord = apps.get_model('signature', 'AttendanceRecord')
+    AttendanceSummary = apps.get_model('signature', 'AttendanceSummary')
+    counts = {}
+    for student_id, subject_id, status in AttendanceRecord.objects.values_list(
+            'student_id', 'session__subject_id', 'status').iterator():
+        row = counts.setdefault((student_id, subject_id), dict.fromkeys('PATJ', 0))
+        row[status] += 1
+    AttendanceSummary.objects.bulk_create([
+        AttendanceSummary(student_id=student_id, subject_id=subject_id, present=row['P'],
+                          absent=row['A'], late=row['T'], excused=row['J'])
+        for (student_id, subject_id), row in counts.items()
+    ], batch_size=5_000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signature', '0013_attendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('excused', models.IntegerField(default=0)),
+                ('student', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='signature.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='signature.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject'), name='unique_attendance_summary')],
+            },
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, UserManager
 
 # Create your models here.
@@ -6,7 +7,7 @@ from django.contrib.auth.models import AbstractUser, UserManager
 
 class MajorCode(models.Model):
     # Las carreras tienen más de un código por alguna razón, culpen a la U
-    code = models.CharField(max_length=15)
+    code = models.CharField(max_length=15, unique=True)
     major = models.ForeignKey(
         'Major',
         on_delete=models.CASCADE,
@@ -19,7 +20,7 @@ class MajorCode(models.Model):
 
 
 class Major(models.Model):
-    name = models.CharField(max_length=50)
+    name = models.CharField(max_length=50, db_index=True)
     faculty = models.CharField(max_length=50)
 
     def __str__(self):
@@ -35,6 +36,18 @@ class Student(models.Model):
     second_last_name = models.CharField(max_length=200)
     major = models.ForeignKey(Major, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            # También sirve de índice para las búsquedas por rut (rut__in)
+            models.UniqueConstraint(
+                fields=['rut', 'dv'], name='unique_student_rut_dv'),
+        ]
+        indexes = [
+            # Nóminas de una carrera ordenadas por apellido
+            models.Index(fields=['major', 'last_name'],
+                         name='student_major_last_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name}"
 
@@ -78,3 +91,200 @@ class PermissionUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class ImportJob(models.Model):
+    """Carga masiva de un CSV/XLSX que se procesa en segundo plano."""
+
+    STUDENTS = 'students'
+    ENROLLMENTS = 'enrollments'
+    USERS = 'users'
+    KIND_CHOICES = [
+        (STUDENTS, 'Estudiantes'),
+        (ENROLLMENTS, 'Inscripción de asignatura'),
+        (USERS, 'Usuarios'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En proceso'),
+        (COMPLETED, 'Completado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    file = models.FileField(upload_to='imports/')
+    params = models.JSONField(default=dict)
+    created_by = models.ForeignKey(
+        'PermissionUser',
+        on_delete=models.SET_NULL,
+        related_name='import_jobs',
+        null=True,
+    )
+    rows_processed = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """Correo en cola; signature.mailer lo envía reutilizando una conexión SMTP."""
+
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'En cola'),
+        (SENDING, 'Enviando'),
+        (SENT, 'Enviado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    attachment = models.FileField(upload_to='outbox/', blank=True)
+    attachment_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Con los reintentos se posterga (backoff exponencial)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Cuándo un worker lo tomó (``sending``); vencido MAIL_SENDING_LEASE se
+    # devuelve a la cola, por si el proceso murió a mitad del envío
+    claimed_at = models.DateTimeField(null=True)
+    created_by = models.ForeignKey(
+        'PermissionUser',
+        on_delete=models.SET_NULL,
+        related_name='outbound_emails',
+        null=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            # El worker busca los correos en cola que ya toca enviar
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient} #{self.id} ({self.status})"
+
+
+class AttendanceSession(models.Model):
+    """Una clase de una asignatura en un día."""
+
+    # Lo indexa la restricción única (subject, date)
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='attendance_sessions',
+        db_index=False,
+    )
+    date = models.DateField()
+    created_by = models.ForeignKey(
+        'PermissionUser',
+        on_delete=models.SET_NULL,
+        related_name='attendance_sessions',
+        null=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['subject', 'date'], name='unique_attendance_session'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} {self.date}"
+
+
+class AttendanceRecord(models.Model):
+    PRESENT = 'P'
+    ABSENT = 'A'
+    LATE = 'T'
+    EXCUSED = 'J'
+    STATUS_CHOICES = [
+        (PRESENT, 'Presente'),
+        (ABSENT, 'Ausente'),
+        (LATE, 'Atrasado'),
+        (EXCUSED, 'Justificado'),
+    ]
+
+    # Lo indexa la restricción única (session, student)
+    session = models.ForeignKey(
+        AttendanceSession,
+        on_delete=models.CASCADE,
+        related_name='records',
+        db_index=False,
+    )
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='attendance_records',
+    )
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES)
+
+    class Meta:
+        constraints = [
+            # Una marca por estudiante y clase; es también la clave del upsert
+            # de la toma de asistencia y el índice de la nómina de una clase
+            models.UniqueConstraint(
+                fields=['session', 'student'], name='unique_attendance_record'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} {self.session} ({self.status})"
+
+
+class AttendanceSummary(models.Model):
+    """
+    Contadores de asistencia por estudiante y asignatura. Se actualizan en
+    cada marca (signature.attendance) para no contar AttendanceRecord en cada
+    consulta; ``manage.py rebuild_attendance_summary`` los recalcula.
+    """
+
+    # Lo indexa la restricción única (student, subject)
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='attendance_summaries',
+        db_index=False,
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='attendance_summaries',
+    )
+    # IntegerField y no PositiveIntegerField: el upsert trae deltas negativos
+    # al desmarcar, y SQLite revisa el CHECK de la fila propuesta antes de
+    # resolver el conflicto
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    excused = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'subject'], name='unique_attendance_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} {self.subject}"
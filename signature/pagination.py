@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Paginación por cursor sobre ``id``: cada página es un
+    ``WHERE id > <cursor> ORDER BY id LIMIT n``, así que pedir la página 500
+    cuesta lo mismo que pedir la primera (no hay OFFSET) y el orden no cambia
+    aunque se inserten filas entre una página y otra.
+
+    El tamaño por defecto es ``PAGE_SIZE`` y el cliente puede pedir otro con
+    ``?page_size=`` hasta ``API_MAX_PAGE_SIZE``.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
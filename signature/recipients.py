@@ -0,0 +1,122 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from validate_email.dns_check import dns_check
+from validate_email.domainlist_check import domainlist_check
+from validate_email.email_address import EmailAddress
+from validate_email.exceptions import (
+    AddressNotDeliverableError, DomainNotFoundError,
+    EmailValidationError, NoMXError, NoValidMXError)
+from validate_email.regex_check import regex_check
+from validate_email.smtp_check import smtp_check
+
+logger = logging.getLogger('api')
+
+# Respuestas que no cambian al reintentar; se guardan como negativas
+DEFINITE_ERRORS = (AddressNotDeliverableError, DomainNotFoundError, NoMXError, NoValidMXError)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='recipients')
+    return _executor
+
+
+class NetworkResolver:
+    """
+    Resolver por defecto: registros MX por DNS y sondeo SMTP (RCPT TO sin
+    enviar el mensaje) con py3-validate-email.
+
+    Un resolver es cualquier clase con ``mx_hosts(address, timeout)`` y
+    ``probe(address, hosts, timeout)`` sobre un ``EmailAddress``. Ambos
+    levantan ``EmailValidationError`` si la dirección no sirve; ``probe``
+    devuelve True si algún servidor la acepta y False si ninguno respondió
+    a tiempo. Se elige con ``RECIPIENT_RESOLVER``.
+    """
+
+    def mx_hosts(self, address, timeout):
+        return dns_check(email_address=address, timeout=timeout)
+
+    def probe(self, address, hosts, timeout):
+        sender = EmailAddress(settings.EMAIL_ADDRESS) if settings.EMAIL_ADDRESS else None
+        return smtp_check(email_address=address, mx_records=hosts, timeout=timeout,
+                          helo_host=address.domain, from_address=sender)
+
+
+def get_resolver():
+    return import_string(settings.RECIPIENT_RESOLVER)()
+
+
+def address_key(address):
+    return f'recipient:address:{address.ace.lower()}'
+
+
+def mx_key(address):
+    return f'recipient:mx:{address.ace_domain.lower()}'
+
+
+def check_recipient(recipient, resolver=None):
+    """
+    Valida ``recipient`` antes de encolar un correo. Devuelve True si existe,
+    False si no existe y None si no se pudo saber dentro del plazo.
+
+    Formato y lista negra se revisan localmente. Lo que requiere red (MX del
+    dominio y sondeo SMTP) se cachea: las direcciones válidas por
+    ``RECIPIENT_CACHE_TTL``, las inválidas por ``RECIPIENT_NEGATIVE_TTL`` y los
+    MX por ``RECIPIENT_MX_TTL``, así que reenviar a la misma coordinación no
+    toca la red. Toda la validación de red tiene un plazo total de
+    ``RECIPIENT_VALIDATION_DEADLINE`` segundos; si se cumple, la consulta
+    termina en segundo plano y deja su resultado en el caché.
+    """
+    try:
+        address = EmailAddress(recipient)
+        regex_check(email_address=address)
+        domainlist_check(email_address=address)
+    except EmailValidationError:
+        return False
+
+    cached = cache.get(address_key(address))
+    if cached is not None:
+        return cached
+
+    resolver = resolver or get_resolver()
+    deadline = settings.RECIPIENT_VALIDATION_DEADLINE
+    future = get_executor().submit(resolve_recipient, resolver, address, time.monotonic() + deadline)
+    try:
+        return future.result(timeout=deadline)
+    except TimeoutError:
+        logger.warning(f"Recipient validation for {recipient} exceeded {deadline}s")
+        return None
+
+
+def resolve_recipient(resolver, address, deadline_at):
+    """Consulta MX y SMTP con el tiempo que queda hasta ``deadline_at``."""
+    try:
+        hosts = cache.get(mx_key(address))
+        if hosts is None:
+            hosts = resolver.mx_hosts(address, max(deadline_at - time.monotonic(), 0.1))
+            cache.set(mx_key(address), hosts, settings.RECIPIENT_MX_TTL)
+        if not hosts:
+            raise NoMXError
+        accepted = resolver.probe(address, hosts, max(deadline_at - time.monotonic(), 0.1))
+    except DEFINITE_ERRORS as e:
+        logger.info(f"Recipient {address} rejected: {e}")
+        if isinstance(e, (DomainNotFoundError, NoMXError, NoValidMXError)):
+            cache.set(mx_key(address), [], settings.RECIPIENT_NEGATIVE_TTL)
+        cache.set(address_key(address), False, settings.RECIPIENT_NEGATIVE_TTL)
+        return False
+    except EmailValidationError as e:
+        # Timeouts, greylisting, TLS: no dicen nada de la dirección
+        logger.info(f"Recipient {address} is ambiguous: {e}")
+        return None
+
+    if not accepted:
+        return None
+    cache.set(address_key(address), True, settings.RECIPIENT_CACHE_TTL)
+    return True
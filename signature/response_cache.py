@@ -0,0 +1,107 @@
+import functools
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from .models import Major, MajorCode, Student, Subject
+from .scoping import scope_key
+
+# Las respuestas cacheadas llevan la generación en la llave: subirla deja
+# todas las anteriores sin uso (vencen solas con el TIMEOUT del caché)
+GENERATION_KEY = 'catalog:generation'
+
+
+def get_cache():
+    """El caché ``RESPONSE_CACHE`` (un alias de CACHES) o None si está desactivado."""
+    alias = settings.RESPONSE_CACHE
+    return caches[alias] if alias else None
+
+
+def generation(cache):
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        # Si la llave se perdió, partir de un valor que no repita generaciones viejas
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def bump(cache):
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate(**kwargs):
+    """
+    Invalida todas las respuestas cacheadas. Dentro de una transacción sube la
+    generación ahora y otra vez al hacer commit, así una lectura concurrente
+    que alcance a cachear los datos anteriores al commit no sobrevive.
+    """
+    cache = get_cache()
+    if cache is None:
+        return
+    bump(cache)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: bump(cache), robust=True)
+
+
+def invalidate_relation(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate()
+
+
+def response_key(cache, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'catalog:{generation(cache)}:{scope_key(request)}:{request.accepted_renderer.format}:{path}'
+
+
+def cached_response(view):
+    """
+    Cachea la respuesta 200 ya renderizada de una acción GET con un ETag
+    (hash del contenido). Si el cliente manda ese ETag en ``If-None-Match``
+    se responde 304 sin cuerpo. Cada conjunto de carreras visibles (ver
+    ``signature.scoping``) tiene su propia copia. Lo invalida cualquier
+    cambio en carreras, asignaturas, estudiantes o códigos de carrera (ver
+    ``connect_signals``).
+    """
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_cache()
+        if cache is None:
+            return view(self, request, *args, **kwargs)
+
+        key = response_key(cache, request)
+        entry = cache.get(key)
+        response = None
+        if entry is None:
+            response = self.finalize_response(request, view(self, request, *args, **kwargs), *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.render()
+            entry = (quote_etag(hashlib.md5(response.content).hexdigest()),
+                     response['Content-Type'], response.content)
+            cache.set(key, entry)
+
+        etag, content_type, content = entry
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    return wrapper
+
+
+def connect_signals():
+    for model in (Major, Subject, Student, MajorCode):
+        post_save.connect(invalidate, sender=model, dispatch_uid=f'response_cache_{model.__name__}_save')
+        post_delete.connect(invalidate, sender=model, dispatch_uid=f'response_cache_{model.__name__}_delete')
+    for through in (Subject.major.through, Subject.students.through):
+        m2m_changed.connect(invalidate_relation, sender=through, dispatch_uid=f'response_cache_{through.__name__}')
@@ -0,0 +1,41 @@
+import csv
+import json
+from itertools import islice
+
+ROSTER_FIELDS = ('id', 'rut', 'dv', 'first_name', 'second_name', 'last_name', 'second_last_name', 'major_id')
+
+ROSTER_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class Echo:
+    """Buffer de csv.writer que devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(ROSTER_FIELDS, row)), ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    # BOM: sin él Excel abre los tildes mal
+    yield '\ufeff' + writer.writerow(ROSTER_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_roster(rows, fmt, lines_per_chunk=500):
+    """
+    Codifica ``rows`` (tuplas con ``ROSTER_FIELDS``) como NDJSON o CSV y las
+    entrega de a ``lines_per_chunk`` líneas, para no escribir al socket una
+    vez por estudiante. Solo hay un bloque en memoria a la vez.
+    """
+    lines = ndjson_lines(rows) if fmt == 'ndjson' else csv_lines(rows)
+    while chunk := ''.join(islice(lines, lines_per_chunk)):
+        yield chunk.encode('utf-8')
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Dígito verificador del RUT (módulo 11): los dígitos, desde el último, se
+# multiplican por 2, 3, 4, 5, 6, 7, 2, 3, ... y el DV es 11 - (suma % 11),
+# con 11 -> '0' y 10 -> 'K'. Como (-suma) % 11 ya da 0..10, basta indexar
+# CHECK_DIGITS.
+CHECK_DIGITS = '0123456789K'
+
+# El RUT más largo que se acepta (sin puntos ni DV)
+MAX_DIGITS = 9
+
+_CHECK_DIGITS = np.array(list(CHECK_DIGITS))
+
+
+def is_well_formed(rut):
+    return rut.isascii() and rut.isdigit() and len(rut) <= MAX_DIGITS
+
+
+def check_digit(rut):
+    """DV ('0'..'9' o 'K') de ``rut``, un string de solo dígitos."""
+    if not is_well_formed(rut):
+        raise ValueError(f"RUT inválido: {rut!r}")
+    number = int(rut)
+    total = 0
+    factor = 2
+    while number:
+        number, digit = divmod(number, 10)
+        total += digit * factor
+        factor = factor + 1 if factor < 7 else 2
+    return CHECK_DIGITS[-total % 11]
+
+
+def is_valid_rut(rut, dv):
+    """True si ``dv`` (mayúscula o minúscula) es el DV de ``rut``."""
+    return is_well_formed(rut) and check_digit(rut) == str(dv).upper()
+
+
+def check_digits(ruts):
+    """
+    DV de cada RUT de ``ruts`` en una sola pasada de NumPy, sin recorrerlos en
+    Python: los strings se leen como una matriz de códigos Unicode (una fila
+    por RUT) y la suma ponderada es una multiplicación de matrices. Los RUT
+    que no son solo dígitos (o tienen más de ``MAX_DIGITS``) quedan en ''.
+    """
+    ruts = np.asarray(ruts, dtype=np.str_)
+    if not ruts.size:
+        return np.empty(0, dtype='<U1')
+
+    codes = ruts.view(np.uint32).reshape(ruts.size, -1).astype(np.int64)
+    lengths = np.char.str_len(ruts)
+    columns = np.arange(codes.shape[1])
+    inside = columns < lengths[:, None]
+    digits = np.where(inside, codes - ord('0'), 0)
+
+    well_formed = (lengths > 0) & (lengths <= MAX_DIGITS) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    # Posición contada desde el último dígito, que lleva factor 2
+    position = lengths[:, None] - 1 - columns
+    factors = np.where(inside, 2 + position % 6, 0)
+    totals = (digits * factors).sum(axis=1)
+    return np.where(well_formed, _CHECK_DIGITS[-totals % 11], '')
+
+
+def valid_ruts(ruts, dvs):
+    """Arreglo booleano: si cada ``dvs[i]`` es el DV de ``ruts[i]``."""
+    expected = check_digits(ruts)
+    dvs = np.char.upper(np.asarray(dvs, dtype=np.str_))
+    return (expected != '') & (expected == dvs)
@@ -0,0 +1,119 @@
+from rest_framework.authtoken.models import Token
+from .authentication import majors_key, token_cache
+from .models import AttendanceRecord, AttendanceSession, AttendanceSummary, Major, PermissionUser, Student, Subject
+
+# Un coordinador solo ve las carreras de PermissionUser.majors (y sus
+# asignaturas y estudiantes); los superusuarios ven todo. El filtro va en el
+# queryset, así lo que no le corresponde nunca sale de la base de datos.
+
+
+def major_ids(request):
+    """
+    ids de las carreras de ``request.user``, o None si no tiene restricción
+    (superusuario o sin request). Se consultan una vez por request y, con
+    token, una vez por entrada de ``token_cache``: cambiar las carreras del
+    usuario la invalida.
+    """
+    if request is None or request.user.is_superuser:
+        return None
+    user = request.user
+    ids = getattr(user, '_major_ids', None)
+    if ids is None:
+        key = majors_key(request.auth.key) if isinstance(request.auth, Token) else None
+        ids = token_cache.get(key) if key else None
+        if ids is None:
+            ids = tuple(sorted(user.majors.values_list('id', flat=True)))
+            if key:
+                token_cache.set(key, ids)
+        user._major_ids = ids
+    return ids
+
+
+def majors_of(user):
+    """
+    Carreras que puede usar ``user``, para lo que corre sin request (los
+    trabajos de importación). Sin usuario, ninguna.
+    """
+    if user is None:
+        return Major.objects.none()
+    return Major.objects.all() if user.is_superuser else user.majors.all()
+
+
+def subjects_of(user):
+    """Asignaturas de las carreras de ``majors_of(user)``."""
+    if user is not None and user.is_superuser:
+        return Subject.objects.all()
+    return Subject.objects.filter(id__in=Subject.major.through.objects.filter(
+        major__in=majors_of(user)).values('subject_id'))
+
+
+def scope_key(request):
+    """Parte de la llave de caché que distingue lo que ve cada usuario."""
+    ids = major_ids(request)
+    return 'all' if ids is None else ','.join(map(str, ids))
+
+
+def scoped_majors(request, queryset=None):
+    queryset = Major.objects.all() if queryset is None else queryset
+    ids = major_ids(request)
+    return queryset if ids is None else queryset.filter(id__in=ids)
+
+
+def scoped_subjects(request, queryset=None):
+    queryset = Subject.objects.all() if queryset is None else queryset
+    ids = major_ids(request)
+    if ids is None:
+        return queryset
+    # Subconsulta en vez de major__in para no repetir asignaturas de varias carreras
+    return queryset.filter(id__in=Subject.major.through.objects.filter(
+        major_id__in=ids).values('subject_id'))
+
+
+def scoped_students(request, queryset=None):
+    queryset = Student.objects.all() if queryset is None else queryset
+    ids = major_ids(request)
+    return queryset if ids is None else queryset.filter(major_id__in=ids)
+
+
+def scoped_users(request, queryset=None):
+    """Un coordinador solo se ve a sí mismo; un superusuario ve a todos."""
+    queryset = PermissionUser.objects.all() if queryset is None else queryset
+    if request is None or request.user.is_superuser:
+        return queryset
+    return queryset.filter(id=request.user.id)
+
+
+def scoped_sessions(request, queryset=None):
+    """Clases de las asignaturas que ve el usuario."""
+    queryset = AttendanceSession.objects.all() if queryset is None else queryset
+    if major_ids(request) is None:
+        return queryset
+    return queryset.filter(subject__in=scoped_subjects(request))
+
+
+def scoped_records(request, queryset=None):
+    """Marcas de asistencia de los estudiantes de las carreras del usuario."""
+    queryset = AttendanceRecord.objects.all() if queryset is None else queryset
+    ids = major_ids(request)
+    return queryset if ids is None else queryset.filter(student__major_id__in=ids)
+
+
+def scoped_summaries(request, queryset=None):
+    queryset = AttendanceSummary.objects.all() if queryset is None else queryset
+    ids = major_ids(request)
+    return queryset if ids is None else queryset.filter(student__major_id__in=ids)
+
+
+SCOPES = {
+    Major: scoped_majors,
+    Subject: scoped_subjects,
+    Student: scoped_students,
+    AttendanceSession: scoped_sessions,
+    AttendanceRecord: scoped_records,
+    AttendanceSummary: scoped_summaries,
+}
+
+
+def scope_for(model):
+    """La función de este módulo que filtra querysets de ``model``, o None."""
+    return SCOPES.get(model)
@@ -1,5 +1,12 @@
+from contextlib import contextmanager
 from django.core.validators import RegexValidator
-from .models import Major, Subject, Student
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from .models import Major, Subject, Student, ImportJob, OutboundEmail, AttendanceSession, AttendanceRecord, AttendanceSummary
+from .attendance import apply_changes, attendance_rate
+from .rut import is_valid_rut
+from .scoping import scope_for, scoped_majors, scoped_records, scoped_sessions, scoped_students, scoped_subjects
 from rest_framework import serializers
 import re 
 
@@ -25,33 +32,214 @@ dv_regex = RegexValidator(
     message="Digito verificador inválido"
 )
 
-class StudentSerializer(serializers.ModelSerializer):
+@contextmanager
+def unique_student(message="El estudiante ya existe"):
+    """
+    Convierte la violación de ``unique_student_rut_dv`` en un error de
+    validación. La base de datos es la que garantiza que no se repita el RUT,
+    así no hay una consulta previa ni una carrera entre dos requests.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as e:
+        # SQLite informa las columnas, PostgreSQL el nombre de la restricción
+        if 'unique_student_rut_dv' in str(e) or 'signature_student.rut' in str(e):
+            raise serializers.ValidationError({'rut': [message]})
+        raise
+
+
+def parse_field_paths(value):
+    """
+    Convierte "id,name,subjects.name" en {'id': {}, 'name': {}, 'subjects': {'name': {}}}.
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def nested_serializer(field):
+    """The serializer behind a nested field (``many=True`` or not), or None."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+class DynamicFieldsMixin:
+    """
+    Lets the client choose what gets serialized:
+
+    - ``?fields=id,name,subjects.name`` keeps only those fields (per level).
+    - ``?expand=subjects,subjects.students`` only includes those nested
+      relations; any other nested serializer is dropped.
+    - ``?depth=N`` drops nested serializers deeper than N levels.
+
+    Without parameters the output is the same as before. Only applies when
+    serializing (not when validating input), and ``prefetches_for`` builds
+    the prefetches from whatever is left, so dropped relations are not
+    queried either.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or 'data' in kwargs:
+            return
+
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get('fields')
+        expand = params.get('expand')
+        depth = params.get('depth')
+        if fields is None and expand is None and depth is None:
+            return
+
+        if depth is not None:
+            try:
+                depth = int(depth)
+            except ValueError:
+                raise serializers.ValidationError({"depth": "Debe ser un número entero"})
+
+        prune_fields(
+            self,
+            parse_field_paths(fields) if fields is not None else None,
+            parse_field_paths(expand) if expand is not None else None,
+            depth,
+        )
+
+
+def prune_fields(serializer, fields, expand, depth):
+    for name, field in list(serializer.fields.items()):
+        if fields and name not in fields:
+            serializer.fields.pop(name)
+            continue
+
+        nested = nested_serializer(field)
+        if nested is None:
+            continue
+
+        requested = bool(fields and fields.get(name))
+        if (depth is not None and depth <= 0) or (
+                expand is not None and name not in expand and not requested):
+            serializer.fields.pop(name)
+            continue
+
+        prune_fields(
+            nested,
+            (fields or {}).get(name) or None,
+            expand.get(name, {}) if expand is not None else None,
+            depth - 1 if depth is not None else None,
+        )
+
+
+def prefetches_for(serializer, request=None):
+    """
+    Prefetch objects for every relation the (possibly pruned) serializer
+    will read: nested serializers recursively, and lists of primary keys
+    with only the ``pk`` column. Nested querysets go through
+    ``signature.scoping`` for ``request``, so rows outside the user's majors
+    are not fetched.
+    """
+    model = serializer.Meta.model
+    prefetches = []
+    for field in serializer.fields.values():
+        if field.write_only or not field.source or '.' in field.source:
+            continue
+
+        nested = nested_serializer(field)
+        if nested is not None:
+            queryset = nested.Meta.model.objects.prefetch_related(*prefetches_for(nested, request))
+            scope = scope_for(nested.Meta.model)
+            if scope is not None:
+                queryset = scope(request, queryset)
+        elif isinstance(field, serializers.ManyRelatedField):
+            related_model = model._meta.get_field(field.source).related_model
+            queryset = related_model.objects.only('pk')
+        else:
+            continue
+        prefetches.append(Prefetch(field.source, queryset=queryset))
+    return prefetches
+
+
+class ScopedListSerializer(serializers.ListSerializer):
+    """
+    Relación anidada que solo muestra lo que ve el usuario del request. Lo
+    normal es que ya venga filtrada en el Prefetch de ``prefetches_for``; si
+    no hubo prefetch (la respuesta de un PUT, que DRF arma sin el caché de
+    prefetch) se filtra aquí.
+    """
+
+    def get_attribute(self, instance):
+        related = super().get_attribute(instance)
+        scope = scope_for(self.child.Meta.model)
+        if scope is None or self.source in getattr(instance, '_prefetched_objects_cache', {}):
+            return related
+        return scope(self.context.get('request'), related.all())
+
+
+class ScopedRelationsMixin:
+    """
+    Deja como opciones de los campos de relación escribibles solo las
+    carreras, asignaturas y estudiantes que ve el usuario del request, así
+    las rutas estándar (POST, PUT, PATCH) no pueden asignar uno ajeno.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        for field in fields.values():
+            relation = getattr(field, 'child_relation', field)
+            queryset = getattr(relation, 'queryset', None)
+            scope = scope_for(queryset.model) if queryset is not None else None
+            if scope is not None:
+                relation.queryset = scope(request, queryset)
+        return fields
+
+
+class StudentSerializer(ScopedRelationsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     subjects = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Subject.objects.all())
 
     class Meta:
         model = Student
         fields = '__all__'
+        list_serializer_class = ScopedListSerializer
+        # Sin UniqueTogetherValidator: la restricción se valida al guardar
+        validators = []
 
+    def create(self, validated_data):
+        with unique_student():
+            return super().create(validated_data)
 
-class SubjectSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        with unique_student():
+            return super().update(instance, validated_data)
+
+
+class SubjectSerializer(ScopedRelationsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     students = StudentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Subject
         fields = ('id', 'name', 'major', 'students',)
+        list_serializer_class = ScopedListSerializer
 
 
-class MajorSerializer(serializers.ModelSerializer):
+class MajorSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     subjects = SubjectSerializer(many=True, read_only=True)
 
     class Meta:
         model = Major
         fields = ('id', 'name', 'faculty', 'subjects',)
+        list_serializer_class = ScopedListSerializer
 
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ScopedRelationsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
     major_ids = serializers.PrimaryKeyRelatedField(
         source='majors',
@@ -65,6 +253,14 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta(object):
         model = User
         fields = ('id', 'username', 'password', 'majors', 'major_ids', 'is_superuser')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        # Solo un superusuario puede dar o quitar permisos de superusuario
+        if 'is_superuser' in fields and not (request and request.user.is_superuser):
+            fields['is_superuser'].read_only = True
+        return fields
     
     def create(self, validated_data):
         majors = validated_data.pop('majors', [])
@@ -135,12 +331,28 @@ class UserSerializer(serializers.ModelSerializer):
         
         return value
 
+class SessionUserSerializer(serializers.ModelSerializer):
+    """
+    Usuario en la respuesta de /login/ y /signup/: solo los ids de sus
+    carreras (una consulta), no el árbol carreras → asignaturas →
+    estudiantes de UserSerializer, que crece con la matrícula.
+    """
+    major_ids = serializers.SerializerMethodField()
+
+    class Meta(object):
+        model = User
+        fields = ('id', 'username', 'major_ids', 'is_superuser')
+
+    def get_major_ids(self, user):
+        return list(user.majors.order_by('id').values_list('id', flat=True))
+
+
 class DeleteStudentSerializer(serializers.Serializer):
     student_id = serializers.IntegerField()
 
     def validate(self, data):
         try:
-            student = Student.objects.get(id=data['student_id'])
+            student = scoped_students(self.context.get('request')).get(id=data['student_id'])
         except Student.DoesNotExist:
             raise serializers.ValidationError("Estudiante no encontrado")
 
@@ -174,70 +386,32 @@ class CreateStudentSerializer(serializers.Serializer):
     major_id = serializers.IntegerField()
 
     def validate(self, data):
-        # Validación RUT + DV único (mejorada con un solo query)
-        if Student.objects.filter(rut=data['rut'], dv=data['dv'].upper()).exists():
-            raise serializers.ValidationError("El estudiante ya existe")
-
         # Validación de existencia de carrera
         try:
-            major = Major.objects.get(id=data['major_id'])
+            major = scoped_majors(self.context.get('request')).get(id=data['major_id'])
         except Major.DoesNotExist:
             raise serializers.ValidationError("Carrera no encontrada")
 
         # Validación de RUT chileno
-        if not self.is_valid_rut(data['rut'], data['dv']):
+        if not is_valid_rut(data['rut'], data['dv']):
             raise serializers.ValidationError("El RUT no es válido")
 
         data['dv'] = data['dv'].upper()
         self.major = major
         return data
 
-    def is_valid_rut(self, rut, dv):
-        """
-        Valida un RUT chileno según el algoritmo estándar.
-        
-        Args:
-            rut: String con el número de RUT sin puntos ni guión
-            dv: String con el dígito verificador (puede ser 'k' o 'K')
-        
-        Returns:
-            Boolean indicando si el RUT es válido
-        """
-        # Normalizar el dígito verificador
-        dv = dv.upper()
-        
-        # Invertir el RUT para aplicar el algoritmo
-        rut_reversed = rut[::-1]
-        
-        # Aplicar la multiplicación por la secuencia 2,3,4,5,6,7,2,3,...
-        factors = [2, 3, 4, 5, 6, 7]
-        result = 0
-        
-        for i, digit in enumerate(rut_reversed):
-            result += int(digit) * factors[i % 6]
-        
-        # Calcular el dígito verificador esperado
-        remainder = result % 11
-        expected_dv = str(11 - remainder)
-        
-        # Ajustar casos especiales
-        if expected_dv == '11':
-            expected_dv = '0'
-        elif expected_dv == '10':
-            expected_dv = 'K'
-        
-        # Comparar con el dígito verificador proporcionado
-        return expected_dv == dv
     def save(self):
-        Student.objects.create(
-            first_name=self.validated_data['first_name'],
-            second_name=self.validated_data.get('second_name'),
-            last_name=self.validated_data['last_name'],
-            second_last_name=self.validated_data.get('second_last_name'),
-            rut=self.validated_data['rut'],
-            dv=self.validated_data['dv'],
-            major=self.major
-        )
+        # RUT + DV único lo valida la restricción unique_student_rut_dv
+        with unique_student():
+            Student.objects.create(
+                first_name=self.validated_data['first_name'],
+                second_name=self.validated_data.get('second_name'),
+                last_name=self.validated_data['last_name'],
+                second_last_name=self.validated_data.get('second_last_name'),
+                rut=self.validated_data['rut'],
+                dv=self.validated_data['dv'],
+                major=self.major
+            )
 
 
 class UpdateStudentSerializer(serializers.Serializer):
@@ -265,23 +439,17 @@ class UpdateStudentSerializer(serializers.Serializer):
     major_id = serializers.IntegerField()
 
     def validate_id(self, value):
-        if not Student.objects.filter(id=value).exists():
+        if not scoped_students(self.context.get('request')).filter(id=value).exists():
             raise serializers.ValidationError("Estudiante no encontrado.")
         return value
 
-    def validate_rut(self, value):
-        student_id = self.initial_data.get('id')
-        if Student.objects.filter(rut=value).exclude(id=student_id).exists():
-            raise serializers.ValidationError("Ya existe otro estudiante con este RUT.")
-        return value
-
     def validate_dv(self, value):
         # Normalizar DV a mayúsculas
         return value.upper()
 
     def validate_major_id(self, value):
         try:
-            self.major = Major.objects.get(id=value)  # Guardamos en instancia para reutilizar
+            self.major = scoped_majors(self.context.get('request')).get(id=value)  # Guardamos en instancia para reutilizar
         except Major.DoesNotExist:
             raise serializers.ValidationError("Carrera no encontrada.")
         return value
@@ -289,48 +457,11 @@ class UpdateStudentSerializer(serializers.Serializer):
     def validate(self, data):
         # Validar que el RUT y DV correspondan a un RUT chileno válido
         if 'rut' in data and 'dv' in data:
-            if not self.is_valid_rut(data['rut'], data['dv']):
+            if not is_valid_rut(data['rut'], data['dv']):
                 raise serializers.ValidationError("El RUT no es válido")
         
         return data
 
-    def is_valid_rut(self, rut, dv):
-        """
-        Valida un RUT chileno según el algoritmo estándar.
-        
-        Args:
-            rut: String con el número de RUT sin puntos ni guión
-            dv: String con el dígito verificador (puede ser 'k' o 'K')
-        
-        Returns:
-            Boolean indicando si el RUT es válido
-        """
-        # Normalizar el dígito verificador
-        dv = dv.upper()
-        
-        # Invertir el RUT para aplicar el algoritmo
-        rut_reversed = rut[::-1]
-        
-        # Aplicar la multiplicación por la secuencia 2,3,4,5,6,7,2,3,...
-        factors = [2, 3, 4, 5, 6, 7]
-        result = 0
-        
-        for i, digit in enumerate(rut_reversed):
-            result += int(digit) * factors[i % 6]
-        
-        # Calcular el dígito verificador esperado
-        remainder = result % 11
-        expected_dv = str(11 - remainder)
-        
-        # Ajustar casos especiales
-        if expected_dv == '11':
-            expected_dv = '0'
-        elif expected_dv == '10':
-            expected_dv = 'K'
-        
-        # Comparar con el dígito verificador proporcionado
-        return expected_dv == dv
-    
     def update(self, instance, validated_data):
         instance.first_name = validated_data['first_name']
         instance.second_name = validated_data.get('second_name', instance.second_name)
@@ -339,12 +470,13 @@ class UpdateStudentSerializer(serializers.Serializer):
         instance.rut = validated_data['rut']
         instance.dv = validated_data['dv']
         instance.major = self.major  # Usamos el objeto ya validado
-        instance.save()
+        with unique_student("Ya existe otro estudiante con este RUT."):
+            instance.save()
         return instance
 
     def save(self):
         # Obtener instancia del estudiante
-        instance = Student.objects.get(id=self.validated_data['id'])
+        instance = scoped_students(self.context.get('request')).get(id=self.validated_data['id'])
         return self.update(instance, self.validated_data)  
 
 class SubjectEnrollmentSerializer(serializers.Serializer):
@@ -354,12 +486,12 @@ class SubjectEnrollmentSerializer(serializers.Serializer):
 
     def validate(self, data):
         try:
-            student = Student.objects.get(id=data['student_id'])
+            student = scoped_students(self.context.get('request')).get(id=data['student_id'])
         except Student.DoesNotExist:
             raise serializers.ValidationError("Estudiante no encontrado")
 
         try:
-            subject = Subject.objects.get(id=data['subject_id'])
+            subject = scoped_subjects(self.context.get('request')).get(id=data['subject_id'])
         except Subject.DoesNotExist:
             raise serializers.ValidationError("Materia no encontrada")
 
@@ -379,12 +511,12 @@ class UnenrollSubjectSerializer(serializers.Serializer):
 
     def validate(self, data):
         try:
-            student = Student.objects.get(id=data['student_id'])
+            student = scoped_students(self.context.get('request')).get(id=data['student_id'])
         except Student.DoesNotExist:
             raise serializers.ValidationError("Estudiante no encontrado")
         
         try:
-            subject = Subject.objects.get(id=data['subject_id'])
+            subject = scoped_subjects(self.context.get('request')).get(id=data['subject_id'])
         except Subject.DoesNotExist:
             raise serializers.ValidationError("Materia no encontrada")
 
@@ -397,3 +529,176 @@ class UnenrollSubjectSerializer(serializers.Serializer):
     
     def save(self):
         self.student.subjects.remove(self.subject)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    major_id = serializers.IntegerField(write_only=True, required=False)
+    subject_id = serializers.IntegerField(write_only=True, required=False)
+    rows_processed = serializers.SerializerMethodField()
+    throughput = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = ('id', 'kind', 'status', 'file', 'major_id', 'subject_id', 'rows_processed',
+                  'throughput', 'result', 'error', 'created_at', 'started_at', 'finished_at')
+        read_only_fields = ('status', 'result', 'error',
+                            'created_at', 'started_at', 'finished_at')
+        extra_kwargs = {'file': {'write_only': True}}
+
+    def validate(self, data):
+        kind = data['kind']
+        if kind in (ImportJob.STUDENTS, ImportJob.ENROLLMENTS) and not data.get('major_id'):
+            raise serializers.ValidationError({"major_id": "El ID de la carrera no puede estar vacío"})
+        if kind == ImportJob.ENROLLMENTS and not data.get('subject_id'):
+            raise serializers.ValidationError({"subject_id": "El ID de la asignatura no puede estar vacío"})
+
+        # Se revisan al encolar, para responder 400, y otra vez al ejecutarlo (ver run_import)
+        request = self.context.get('request')
+        if kind in (ImportJob.STUDENTS, ImportJob.ENROLLMENTS) and \
+                not scoped_majors(request).filter(id=data['major_id']).exists():
+            raise serializers.ValidationError({"major_id": "Carrera no encontrada"})
+        if kind == ImportJob.ENROLLMENTS and not scoped_subjects(request).filter(id=data['subject_id']).exists():
+            raise serializers.ValidationError({"subject_id": "Materia no encontrada"})
+        return data
+
+    def create(self, validated_data):
+        params = {key: validated_data.pop(key)
+                  for key in ('major_id', 'subject_id') if key in validated_data}
+        return ImportJob.objects.create(params=params, **validated_data)
+
+    def get_rows_processed(self, obj):
+        from .jobs import live_rows_processed
+        return live_rows_processed(obj)
+
+    def get_throughput(self, obj):
+        """Filas por segundo desde que el trabajo empezó."""
+        if not obj.started_at:
+            return None
+        end = obj.finished_at or timezone.now()
+        elapsed = (end - obj.started_at).total_seconds()
+        return round(self.get_rows_processed(obj) / elapsed, 1) if elapsed > 0 else None
+
+
+class OutboundEmailSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OutboundEmail
+        fields = ('id', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at',
+                  'last_error', 'created_at', 'sent_at')
+        read_only_fields = fields
+
+
+class AttendanceRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttendanceRecord
+        fields = ('student', 'status')
+        list_serializer_class = ScopedListSerializer
+
+
+class AttendanceSessionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    records = AttendanceRecordSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AttendanceSession
+        fields = ('id', 'subject', 'date', 'created_by', 'created_at', 'records')
+        read_only_fields = fields
+
+
+class AttendanceMarkItemSerializer(serializers.Serializer):
+    student_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=AttendanceRecord.STATUS_CHOICES)
+
+
+class AttendanceMarkSerializer(serializers.Serializer):
+    """
+    Toma de asistencia de una clase completa: ``records`` trae la marca de
+    cada estudiante. Se valida con una sola consulta para toda la nómina y se
+    guarda con un único INSERT ... ON CONFLICT DO UPDATE.
+    """
+    subject_id = serializers.IntegerField()
+    date = serializers.DateField()
+    records = AttendanceMarkItemSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        request = self.context.get('request')
+        try:
+            self.subject = scoped_subjects(request).get(id=data['subject_id'])
+        except Subject.DoesNotExist:
+            raise serializers.ValidationError("Materia no encontrada")
+
+        student_ids = [record['student_id'] for record in data['records']]
+        if len(set(student_ids)) != len(student_ids):
+            raise serializers.ValidationError({"records": "Hay estudiantes repetidos"})
+
+        # En una materia compartida solo se marcan los estudiantes de las carreras del usuario
+        enrolled = set(scoped_students(request, self.subject.students.filter(id__in=student_ids))
+                       .values_list('id', flat=True))
+        missing = sorted(set(student_ids) - enrolled)
+        if missing:
+            raise serializers.ValidationError(
+                {"records": f"Estudiantes no inscritos en la materia: {missing}"})
+        return data
+
+    def save(self, user=None):
+        records = self.validated_data['records']
+        with transaction.atomic():
+            session, created = AttendanceSession.objects.get_or_create(
+                subject=self.subject, date=self.validated_data['date'],
+                defaults={'created_by': user})
+            if not created:
+                # Otra toma de la misma clase espera aquí hasta el commit y lee
+                # las marcas ya guardadas; sin el bloqueo, en READ COMMITTED las
+                # dos verían "sin marca" y sumarían dos veces al resumen
+                session = AttendanceSession.objects.select_for_update().get(pk=session.pk)
+            previous = {} if created else dict(session.records.filter(
+                student_id__in=[record['student_id'] for record in records]
+            ).values_list('student_id', 'status'))
+            AttendanceRecord.objects.bulk_create(
+                [AttendanceRecord(session=session, student_id=record['student_id'], status=record['status'])
+                 for record in records],
+                update_conflicts=True,
+                unique_fields=['session', 'student'],
+                update_fields=['status'],
+            )
+            apply_changes(self.subject.id, [
+                (record['student_id'], previous.get(record['student_id']), record['status'])
+                for record in records])
+        return session
+
+
+class AttendanceUnmarkSerializer(serializers.Serializer):
+    """Borra las marcas de ``student_ids`` en la clase de ``subject_id`` y ``date``."""
+    subject_id = serializers.IntegerField()
+    date = serializers.DateField()
+    student_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate(self, data):
+        try:
+            self.session = scoped_sessions(self.context.get('request')).get(
+                subject_id=data['subject_id'], date=data['date'])
+        except AttendanceSession.DoesNotExist:
+            raise serializers.ValidationError("Clase no encontrada")
+        return data
+
+    def save(self):
+        with transaction.atomic():
+            # Igual que al marcar: las marcas se leen con la clase bloqueada
+            AttendanceSession.objects.select_for_update().get(pk=self.session.pk)
+            records = scoped_records(self.context.get('request'), self.session.records.filter(
+                student_id__in=self.validated_data['student_ids']))
+            removed = list(records.values_list('student_id', 'status'))
+            records.delete()
+            apply_changes(self.session.subject_id, [
+                (student_id, status, None) for student_id, status in removed])
+        return len(removed)
+
+
+class AttendanceSummarySerializer(serializers.ModelSerializer):
+    rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttendanceSummary
+        fields = ('student', 'subject', 'present', 'absent', 'late', 'excused', 'rate')
+        read_only_fields = fields
+
+    def get_rate(self, obj):
+        return attendance_rate(obj.present, obj.absent, obj.late, obj.excused)
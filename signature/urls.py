@@ -1,12 +1,16 @@
 from rest_framework import routers
 from django.urls import path, include
-from .views import MajorViewSet, SubjectViewSet, StudentViewSet, UserViewSet, login, signup, userExists, isAdmin, sendEmail, uploadUserCSV, uploadStudentCSV, uploadStudentSubjectCSV
+from .views import MajorViewSet, SubjectViewSet, StudentViewSet, UserViewSet, ImportJobViewSet, OutboundEmailViewSet, AttendanceSessionViewSet, AttendanceSummaryViewSet, login, signup, userExists, isAdmin, sendEmail, sendEmailBatch, uploadUserCSV, uploadStudentCSV, uploadStudentSubjectCSV
 
 router = routers.DefaultRouter()
 router.register('majors', MajorViewSet, basename='majors')
 router.register('subjects', SubjectViewSet, basename='subjects')
 router.register('students', StudentViewSet, basename='students')
 router.register('users', UserViewSet, basename='users')
+router.register('import-jobs', ImportJobViewSet, basename='import-jobs')
+router.register('emails', OutboundEmailViewSet, basename='emails')
+router.register('attendance-sessions', AttendanceSessionViewSet, basename='attendance-sessions')
+router.register('attendance-summary', AttendanceSummaryViewSet, basename='attendance-summary')
 
 urlpatterns = [
     path('api/', include(router.urls)),
@@ -15,6 +19,7 @@ urlpatterns = [
     path('userExists/', userExists, name='userExists'),
     path('isAdmin/', isAdmin, name='isAdmin'),
     path('sendEmail/', sendEmail, name='sendEmail'),
+    path('sendEmailBatch/', sendEmailBatch, name='sendEmailBatch'),
     path('uploadUserCSV/', uploadUserCSV, name='uploadUserCSV'),
     path('uploadStudentCSV/', uploadStudentCSV, name='uploadStudentCSV'),
     path('uploadStudentSubjectCSV/', uploadStudentSubjectCSV,
@@ -1,6 +1,3 @@
-from itertools import cycle
-
-
 def generate_email_text(filename, subject):
     parte_entre_parentesis = filename.split('(')[1].split(')')[0].strip()
 
@@ -29,10 +26,3 @@ def generate_email_text(filename, subject):
     carrera = ' '.join(carrera)
     return (f"Se envía adjunto el registro de asistencia para {subject} del {dia_semana} {dia} de "
             f"{mes_nombre} de la carrera de {carrera}.")
-
-
-def digito_verificador(rut):
-    reversed_digits = map(int, reversed(str(rut)))
-    factors = cycle(range(2, 8))
-    s = sum(d * f for d, f in zip(reversed_digits, factors))
-    return (-s) % 11
@@ -1,48 +1,87 @@
 import re
-import pandas as pd
-from validate_email import validate_email
-import socket
-import dns.resolver
-from Asistencia.settings import EMAIL_ADDRESS, EMAIL_APP_PASSWORD
-from signature.utils import generate_email_text, digito_verificador
-from .models import Major, Subject, Student, MajorCode
-from rest_framework import viewsets, status
-from .serializers import MajorSerializer, SubjectSerializer, StudentSerializer, UserSerializer, SubjectEnrollmentSerializer, UnenrollSubjectSerializer, DeleteStudentSerializer, CreateStudentSerializer, UpdateStudentSerializer
+import datetime
+from signature.utils import generate_email_text
+from signature.importers import import_students, enroll_students, provision_users, EnrollmentError, STUDENT_COLUMNS, ENROLLMENT_COLUMNS, USER_COLUMNS
+from signature.ingest import UploadReader, UploadFormatError
+from .models import Major, Subject, Student, ImportJob, OutboundEmail, AttendanceSession, AttendanceSummary
+from .attendance import COUNTERS, attendance_rate
+from .jobs import enqueue
+from .mailer import enqueue as enqueue_email, store_attachment
+from .recipients import check_recipient
+from .response_cache import cached_response
+from .scoping import scoped_majors, scoped_sessions, scoped_students, scoped_subjects, scoped_summaries, scoped_users
+from .rosters import ROSTER_FIELDS, ROSTER_FORMATS, stream_roster
+from .registers import register_filename, register_rows, write_register, STUDENT_FIELDS, XLSX_CONTENT_TYPE
+from rest_framework import viewsets, mixins, status
+from .serializers import MajorSerializer, SubjectSerializer, StudentSerializer, UserSerializer, SessionUserSerializer, SubjectEnrollmentSerializer, UnenrollSubjectSerializer, DeleteStudentSerializer, CreateStudentSerializer, UpdateStudentSerializer, ImportJobSerializer, OutboundEmailSerializer, AttendanceSessionSerializer, AttendanceMarkSerializer, AttendanceUnmarkSerializer, AttendanceSummarySerializer, prefetches_for
 from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
-from rest_framework.authentication import TokenAuthentication, SessionAuthentication
+from rest_framework.authentication import SessionAuthentication
+from .authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.db.models import Sum
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-import smtplib
-from email.mime.application import MIMEApplication
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from numpy import dot
 
 User = get_user_model()  # This gets your custom PermissionUser
-SMPTP_SERVER = 'smtp.gmail.com'
-SMTP_PORT = 587
 
+class SerializerPrefetchMixin:
+    """
+    Prefetches exactly the relations the serializer is going to read in the
+    actions listed in ``prefetch_actions``, after ``?fields=``/``?expand=``/
+    ``?depth=`` have pruned it (see ``DynamicFieldsMixin``).
+    """
+    prefetch_actions = ('list', 'retrieve')
 
-class StudentViewSet(viewsets.ModelViewSet):
-    authentication_classes = (TokenAuthentication, SessionAuthentication, )
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.prefetch_actions:
+            queryset = queryset.prefetch_related(*prefetches_for(self.get_serializer(), self.request))
+        return queryset
+
+
+class MajorScopedMixin:
+    """
+    Filtra el queryset de todas las acciones (listado, detalle, acciones
+    propias) con ``scope``, una función de ``signature.scoping`` que lo deja
+    en las carreras del usuario.
+    """
+    scope = None
+
+    def get_queryset(self):
+        return self.scope(self.request, super().get_queryset())
+
+
+class StudentViewSet(MajorScopedMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication, )
     permission_classes = (IsAuthenticated, )
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    scope = staticmethod(scoped_students)
+    prefetch_actions = ('list', 'retrieve', 'get_student_bymajor')
+    # token + carreras del usuario + estudiantes + ids de asignaturas
+    query_budgets = {'list': 4, 'retrieve': 4, 'get_student_bymajor': 4}
 
     # below are the actions to create, delete and get students
     @action(detail=False, methods=['POST'], url_path='create-student')
     def create_student(self, request):
         try:
-            serializer = CreateStudentSerializer(data=request.data)
+            serializer = CreateStudentSerializer(data=request.data, context=self.get_serializer_context())
             if serializer.is_valid():
                 serializer.save()
                 return Response({'status': 'Estudiante creado'}, status=status.HTTP_201_CREATED)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -54,9 +93,9 @@ class StudentViewSet(viewsets.ModelViewSet):
             if not major_id:
                 return Response({'error': 'La carrera no existe'}, status=status.HTTP_400_BAD_REQUEST)
 
-            students = Student.objects.filter(major_id=major_id)
+            students = self.paginate_queryset(self.get_queryset().filter(major_id=major_id))
             serializer = self.get_serializer(students, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.get_paginated_response(serializer.data)
 
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -64,7 +103,7 @@ class StudentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['DELETE'], url_path='delete-student')
     def delete_student(self, request):
         try:
-            serializer = DeleteStudentSerializer(data=request.data)
+            serializer = DeleteStudentSerializer(data=request.data, context=self.get_serializer_context())
             if serializer.is_valid():
                 serializer.save()
                 return Response({'status': 'Estudiante borrado'}, status=status.HTTP_204_NO_CONTENT)
@@ -77,12 +116,14 @@ class StudentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['PUT'], url_path='update-student')
     def update_student(self, request):
         try:
-            serializer = UpdateStudentSerializer(data=request.data)
+            serializer = UpdateStudentSerializer(data=request.data, context=self.get_serializer_context())
             if serializer.is_valid():
                 serializer.save()
                 return Response({'status': 'Estudiante actualizado'}, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -90,7 +131,7 @@ class StudentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['POST'], url_path='add-subject')
     def add_subject(self, request):
         try:
-            serializer = SubjectEnrollmentSerializer(data=request.data)
+            serializer = SubjectEnrollmentSerializer(data=request.data, context=self.get_serializer_context())
             if serializer.is_valid():
                 serializer.save()
                 return Response({'status': 'subject added'}, status=status.HTTP_200_OK)
@@ -103,7 +144,7 @@ class StudentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['DELETE'], url_path='remove-subject')
     def unregister_subject(self, request):
         try:
-            serializer = UnenrollSubjectSerializer(data=request.data)
+            serializer = UnenrollSubjectSerializer(data=request.data, context=self.get_serializer_context())
             if serializer.is_valid():
                 serializer.save()
                 return Response({'status': 'subject removed'}, status=status.HTTP_200_OK)
@@ -114,11 +155,15 @@ class StudentViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class MajorViewSet(viewsets.ModelViewSet):
-    authentication_classes = (TokenAuthentication, SessionAuthentication, )
+class MajorViewSet(MajorScopedMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication, )
     permission_classes = (IsAuthenticated, )
     queryset = Major.objects.all()
     serializer_class = MajorSerializer
+    scope = staticmethod(scoped_majors)
+    # token + carreras del usuario + carreras + asignaturas (+ sus carreras)
+    # + estudiantes (+ sus asignaturas)
+    query_budgets = {'list': 7, 'retrieve': 7, 'getMajors': 3}
 
     def get_object(self):
         instance = super().get_object()
@@ -129,9 +174,15 @@ class MajorViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         major = serializer.save()
-        self.request._resource_name = major.name
+        self.request.META['RESOURCE_NAME'] = major.name
+
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
+    # Equivale a GET /majors/?fields=id,name; se mantiene por compatibilidad
     @action(detail=False, methods=["GET"])
+    @cached_response
     def getMajors(self, request):
         queryset = super().get_queryset()
         majors = [{"id": major.id, "name": major.name}
@@ -139,11 +190,15 @@ class MajorViewSet(viewsets.ModelViewSet):
         return Response(majors)
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
-    authentication_classes = (TokenAuthentication, SessionAuthentication, )
+class SubjectViewSet(MajorScopedMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication, )
     queryset = Subject.objects.all()
     permission_classes = (IsAuthenticated, )
     serializer_class = SubjectSerializer
+    scope = staticmethod(scoped_subjects)
+    # register: token + carreras del usuario + asignatura + carrera + estudiantes
+    # roster: token + carreras del usuario + asignatura + estudiantes
+    query_budgets = {'list': 6, 'retrieve': 6, 'register': 5, 'roster': 4}
 
     def get_object(self):
         instance = super().get_object()
@@ -156,19 +211,92 @@ class SubjectViewSet(viewsets.ModelViewSet):
         subject = serializer.save()
         self.request.META['RESOURCE_NAME'] = subject.name
 
-
-class UserViewSet(viewsets.ModelViewSet):
-    authentication_classes = (TokenAuthentication, SessionAuthentication)
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=True, methods=['GET'])
+    def register(self, request, pk=None):
+        """
+        Registro de asistencia (.xlsx) de la asignatura para ``?date=AAAA-MM-DD``
+        (hoy por defecto), con los estudiantes de ``?major_id=`` si se indica y
+        ``?section=`` en la columna SECCIÓN.
+        """
+        subject = self.get_object()
+        try:
+            date = datetime.date.fromisoformat(request.query_params['date']) \
+                if 'date' in request.query_params else timezone.localdate()
+        except ValueError:
+            return Response({"error": "Fecha inválida, use AAAA-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        majors = scoped_majors(request, subject.major.order_by('id'))
+        students = scoped_students(request, subject.students.order_by('last_name', 'second_last_name', 'first_name'))
+        major_id = request.query_params.get('major_id')
+        if major_id:
+            majors = majors.filter(id=major_id)
+            students = students.filter(major_id=major_id)
+        major = majors.first()
+        if major_id and major is None:
+            return Response({"error": "La carrera no dicta esta asignatura"}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = register_filename(date, major.name if major else 'SIN CARRERA')
+        rows = register_rows(students.values_list(*STUDENT_FIELDS).iterator(chunk_size=2000),
+                             subject.name, date, request.query_params.get('section', ''))
+        response = StreamingHttpResponse(write_register(rows), content_type=XLSX_CONTENT_TYPE)
+        response['Content-Disposition'] = content_disposition_header(True, f"{filename}.xlsx")
+        return response
+
+    @action(detail=True, methods=['GET'])
+    def roster(self, request, pk=None):
+        """
+        Nómina de la asignatura como NDJSON (``?fmt=ndjson``, por defecto) o CSV
+        (``?fmt=csv``), una línea por estudiante, solo de ``?major_id=`` si se
+        indica. Se lee la base de datos por bloques mientras se envía, así
+        que la memoria no crece con la cantidad de estudiantes.
+        """
+        subject = self.get_object()
+        fmt = request.query_params.get('fmt', 'ndjson')
+        if fmt not in ROSTER_FORMATS:
+            return Response({"error": f"Formato inválido, use {' o '.join(ROSTER_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        students = scoped_students(request, subject.students.order_by('last_name', 'second_last_name', 'first_name', 'id'))
+        major_id = request.query_params.get('major_id')
+        if major_id:
+            if not major_id.isdigit():
+                return Response({"error": "major_id debe ser un número"}, status=status.HTTP_400_BAD_REQUEST)
+            students = students.filter(major_id=major_id)
+
+        rows = students.values_list(*ROSTER_FIELDS).iterator(chunk_size=2000)
+        response = StreamingHttpResponse(stream_roster(rows, fmt), content_type=ROSTER_FORMATS[fmt])
+        if fmt == 'csv':
+            response['Content-Disposition'] = content_disposition_header(True, f"NOMINA {subject.name}.csv")
+        return response
+
+
+class UserViewSet(MajorScopedMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication)
     permission_classes = (IsAuthenticated,)
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    scope = staticmethod(scoped_users)
+    # Incluye las carreras del coordinador, para filtrar las relaciones anidadas
+    query_budgets = {'list': 8, 'retrieve': 8}
 
     def perform_create(self, serializer):
+        # Un coordinador solo puede editar su propio usuario (ver scoped_users), no crear otros
+        if not self.request.user.is_superuser:
+            raise PermissionDenied("Solo un superusuario puede crear usuarios")
         user = serializer.save()
         Token.objects.get_or_create(user=user)
 
         # Guardar el nombre del nuevo recurso
-        self.request._resource_name = user.username
+        self.request.META['RESOURCE_NAME'] = user.username
+
+    def perform_destroy(self, instance):
+        if not self.request.user.is_superuser:
+            raise PermissionDenied("Solo un superusuario puede borrar usuarios")
+        instance.delete()
 
     def get_object(self):
         instance = super().get_object()
@@ -179,39 +307,170 @@ class UserViewSet(viewsets.ModelViewSet):
         return instance
 
 
+class ImportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    POST encola una carga masiva y responde de inmediato con el id del trabajo;
+    GET /api/import-jobs/<id>/ informa el avance, la velocidad y los errores.
+    """
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ImportJobSerializer
+
+    def get_queryset(self):
+        queryset = ImportJob.objects.all()
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(created_by=request.user)
+        enqueue(job)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class OutboundEmailViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Estado de los correos encolados por /sendEmail/ (en cola, enviado, fallido)."""
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = OutboundEmailSerializer
+    query_budgets = {'list': 2, 'retrieve': 2}
+
+    def get_queryset(self):
+        queryset = OutboundEmail.objects.all()
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+
+class AttendanceSessionViewSet(MajorScopedMixin, SerializerPrefetchMixin, mixins.ListModelMixin,
+                               mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Clases con su asistencia; ``?subject_id=`` y ``?date=`` filtran el listado.
+    POST /api/attendance-sessions/mark/ registra la asistencia de una clase.
+    """
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication)
+    permission_classes = (IsAuthenticated,)
+    queryset = AttendanceSession.objects.all()
+    serializer_class = AttendanceSessionSerializer
+    scope = staticmethod(scoped_sessions)
+    # mark: token + carreras del usuario + materia + inscritos + clase
+    # (get_or_create) + bloqueo de la clase + marcas anteriores + upsert +
+    # resumen, más los savepoints de atomic()/get_or_create()
+    query_budgets = {'list': 4, 'retrieve': 4, 'mark': 14, 'unmark': 10}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        subject_id = self.request.query_params.get('subject_id')
+        date = self.request.query_params.get('date')
+        if subject_id:
+            queryset = queryset.filter(subject_id=subject_id)
+        if date:
+            try:
+                queryset = queryset.filter(date=datetime.date.fromisoformat(date))
+            except ValueError:
+                raise ValidationError({"date": "Fecha inválida, use AAAA-MM-DD"})
+        return queryset
+
+    @action(detail=False, methods=['POST'])
+    def mark(self, request):
+        serializer = AttendanceMarkSerializer(data=request.data, context=self.get_serializer_context())
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        session = serializer.save(user=request.user)
+        self.request.META['RESOURCE_NAME'] = str(session)
+        return Response({
+            'id': session.id,
+            'subject': session.subject_id,
+            'date': session.date,
+            'marked': len(serializer.validated_data['records']),
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['DELETE'])
+    def unmark(self, request):
+        serializer = AttendanceUnmarkSerializer(data=request.data, context=self.get_serializer_context())
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        removed = serializer.save()
+        self.request.META['RESOURCE_NAME'] = str(serializer.session)
+        return Response({'id': serializer.session.id, 'unmarked': removed}, status=status.HTTP_200_OK)
+
+
+class AttendanceSummaryViewSet(MajorScopedMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Porcentajes de asistencia leídos de AttendanceSummary, nunca de los
+    registros: por estudiante y asignatura (``?student_id=``, ``?subject_id=``,
+    ``?major_id=``), y sumados por asignatura o por carrera.
+    """
+    authentication_classes = (CachedTokenAuthentication, SessionAuthentication)
+    permission_classes = (IsAuthenticated,)
+    queryset = AttendanceSummary.objects.all()
+    serializer_class = AttendanceSummarySerializer
+    scope = staticmethod(scoped_summaries)
+    # token + carreras del usuario + resumen
+    query_budgets = {'list': 3, 'by_subject': 3, 'by_major': 3}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for param, lookup in (('student_id', 'student_id'), ('subject_id', 'subject_id'),
+                              ('major_id', 'student__major_id')):
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+    def totals(self, *group_by):
+        rows = self.get_queryset().order_by().values(*group_by).annotate(
+            **{counter: Sum(counter) for counter in COUNTERS}).order_by(group_by[0])
+        for row in rows:
+            row['rate'] = attendance_rate(*(row[counter] for counter in COUNTERS))
+        return Response(list(rows), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['GET'], url_path='by-subject')
+    def by_subject(self, request):
+        return self.totals('subject', 'subject__name')
+
+    @action(detail=False, methods=['GET'], url_path='by-major')
+    def by_major(self, request):
+        return self.totals('student__major', 'student__major__name')
+
+
 @api_view(['POST'])
 def login(request):
     user = get_object_or_404(User, username=request.data['username'])
+    # Un solo hash; si cambió PASSWORD_HASHER o su costo, check_password lo actualiza
     if not user.check_password(request.data['password']):
         return Response({"error": "Invalid password"}, status=status.HTTP_401_UNAUTHORIZED)
     token, _ = Token.objects.get_or_create(user=user)
 
-    serializer = UserSerializer(instance=user)
-
-    return Response({"token": token.key, "user": serializer.data})
+    return Response({"token": token.key, "user": SessionUserSerializer(instance=user).data})
 
 
 @api_view(['POST'])
 def signup(request):
-    serializer = UserSerializer(data=request.data)
+    data = request.data.copy()
+    # El frontend manda las carreras como 'majors'; el serializer las lee de 'major_ids'
+    if 'major_ids' not in data and 'majors' in data:
+        if hasattr(data, 'setlist'):
+            data.setlist('major_ids', request.data.getlist('majors'))
+        else:
+            data['major_ids'] = data['majors']
+    serializer = UserSerializer(data=data)
     if serializer.is_valid():
-        serializer.save()
-        user = User.objects.get(username=serializer.data['username'])
-        user.set_password(request.data['password'])
-        if 'majors' in request.data:
-            majors = request.data['majors']
-            for major in majors:
-                major_obj = Major.objects.get(id=major)
-                user.majors.add(major_obj)
-        user.save()
+        # UserSerializer.create hashea la contraseña y asigna las carreras
+        user = serializer.save()
         token = Token.objects.create(user=user)
-        return Response({"token": token.key, "user": serializer.data})
+        return Response({"token": token.key, "user": SessionUserSerializer(instance=user).data})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # Podriamos usar esta ruta para deslogear al usuario en caso de que se borre su cuenta
 @api_view(['GET'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def userExists(request):
     print(request)
@@ -219,7 +478,7 @@ def userExists(request):
 
 
 @api_view(['POST'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def isAdmin(request):
     print(request)
@@ -229,33 +488,15 @@ def isAdmin(request):
 
 
 @api_view(['POST'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def uploadStudentSubjectCSV(request):
     print("Uploading CSV file")
 
-    expected_columns = ['Rut']
-
-    csv = request.FILES['file']
     major_id = request.data.get('major_id')
     subject_id = request.data.get('subject_id')
     print(f"Major ID: {major_id}")
     print(f"Subject ID: {subject_id}")
-    df = pd.read_csv(csv)
-
-    columns = df.columns.tolist()
-    print(f"CSV columns: {columns}")
-
-    if not all(col in columns for col in expected_columns):
-        print("CSV file does not contain the expected columns")
-        return Response({"error": "El CSV no contiene las columnas correctas"}, status=status.HTTP_400_BAD_REQUEST)
-    else:
-        print("CSV file contains the expected columns")
-
-    students = df['Rut'].drop_duplicates().tolist()
-
-    if len(students) > 2000:
-        return Response({"error": "El archivo CSV no puede tener más de 2000 alumnos"}, status=status.HTTP_400_BAD_REQUEST)
 
     if not major_id:
         print(f"Major is empty ")
@@ -264,189 +505,76 @@ def uploadStudentSubjectCSV(request):
         print(f"Subject is empty ")
         return Response({"error": "El ID de la asignatura no puede estar vacío"}, status=status.HTTP_400_BAD_REQUEST)
 
-    for rut in students:
-        found_student = None
-        try:
-            found_student = Student.objects.get(rut=rut)
-            found_student_major = found_student.major.id
-            if found_student_major != int(major_id):
-                print(f"El estudiante {
-                      found_student.first_name} no pertenece a la carrera")
-                return Response({"error": f"El estudiante {found_student.first_name} no pertenece a la carrera"}, status=status.HTTP_400_BAD_REQUEST)
-            print(f"Found student: {found_student.first_name}")
-        except Student.DoesNotExist:
-            print(f"Didn't find student {rut} by rut")
-            return Response({"error": f"El estudiante con RUT {rut} no fue encontrado"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = SubjectEnrollmentSerializer(
-            data={'student_id': found_student.id, 'subject_id': subject_id})
-        if serializer.is_valid():
-            serializer.save()
-            print(f"Student {found_student.first_name} enrolled in subject")
-        else:
-            print(f"Error creating subject enrollment for student {
-                  rut}: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        rows = UploadReader(request.FILES['file'], ENROLLMENT_COLUMNS)
+        print(f"CSV columns: {rows.columns}")
+        report = enroll_students(rows, subject_id, major_id,
+                                 subjects=scoped_subjects(request), majors=scoped_majors(request))
+    except UploadFormatError as e:
+        print(f"Invalid upload: {e}")
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except EnrollmentError as e:
+        print(f"Enrollment rejected: {e}")
+        return Response({"error": str(e)}, status=e.status_code)
+    print(f"Enrolled {len(report.enrolled)} students, "
+          f"{len(report.already_enrolled)} already enrolled, {len(report.rejected)} rejected")
 
-    return Response({"status": "CSV file uploaded successfully"}, status=status.HTTP_204_NO_CONTENT)
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def uploadStudentCSV(request):
     print("Uploading CSV file")
 
-    expected_columns = ['Rut', 'Nombre', 'Segundo_Nombre',
-                        'Apellido', 'Segundo_Apellido']
-
-    csv = request.FILES['file']
     major_id = request.data.get('major_id')
     print(f"Major ID: {major_id}")
-    df = pd.read_csv(csv)
-
-    columns = df.columns.tolist()
-    print(f"CSV columns: {columns}")
-
-    if not all(col in columns for col in expected_columns):
-        print("CSV file does not contain the expected columns")
-        return Response({"error": "El CSV no contiene las columnas correctas"}, status=status.HTTP_400_BAD_REQUEST)
-    else:
-        print("CSV file contains the expected columns")
-
-    students = df['Rut'].drop_duplicates().tolist()
-
-    if len(students) > 2000:
-        return Response({"error": "El archivo CSV no puede tener más de 2000 alumnos"}, status=status.HTTP_400_BAD_REQUEST)
 
     if not major_id:
         print(f"Major is empty ")
         return Response({"error": "El ID de la carrera no puede estar vacío"}, status=status.HTTP_400_BAD_REQUEST)
 
-    for student in students:
-        print(f"Processing student: {student}")
-        nombre = df[df['Rut'] ==
-                    student]['Nombre'].drop_duplicates().tolist()[0].upper()
-        if not nombre:
-            print(f"Nombre is empty for student {student}")
-            return Response({"error": f"El nombre del estudiante {student} no puede estar vacío"}, status=status.HTTP_400_BAD_REQUEST)
-        print(f"Nombre: {nombre}")
-        segundo_nombre = df[df['Rut'] ==
-                            student]['Segundo_Nombre'].drop_duplicates().tolist()[0].upper()
-        if not segundo_nombre:
-            print(f"Segundo nombre is empty for student {student}")
-            return Response({"error": f"El segundo nombre del estudiante {student} no puede estar vacío"}, status=status.HTTP_400_BAD_REQUEST)
-        apellido = df[df['Rut'] ==
-                      student]['Apellido'].drop_duplicates().tolist()[0].upper()
-        if not apellido:
-            print(f"Apellido is empty for student {student}")
-            return Response({"error": f"El apellido del estudiante {student} no puede estar vacío"}, status=status.HTTP_400_BAD_REQUEST)
-        segundo_apellido = df[df['Rut'] ==
-                              student]['Segundo_Apellido'].drop_duplicates().tolist()[0].upper()
-        if not segundo_apellido:
-            print(f"Segundo apellido is empty for student {student}")
-            return Response({"error": f"El segundo apellido del estudiante {student} no puede estar vacío"}, status=status.HTTP_400_BAD_REQUEST)
-
-        found_student = None
-        try:
-            found_student = Student.objects.get(rut=student)
-            print(f"Found student: {found_student.first_name}")
-            return Response({"error": f"El estudiante {found_student.first_name} ya existe"}, status=status.HTTP_400_BAD_REQUEST)
-        except Student.DoesNotExist:
-            print(f"Didn't find student {student} by rut")
-        print(digito_verificador(student))
-        new_student = {
-            "rut": student,
-            "dv": str(digito_verificador(student)),
-            "first_name": nombre if nombre else "",
-            "second_name": segundo_nombre if segundo_nombre else "",
-            "last_name": apellido if apellido else "",
-            "second_last_name": segundo_apellido[0] if segundo_apellido else "",
-            "major_id": major_id
-        }
-        serializer = CreateStudentSerializer(data=new_student)
-        if serializer.is_valid():
-            serializer.save()
-            print(f"Student {serializer.data['first_name']} created")
-        else:
-            print(f"Error creating student {student}: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        rows = UploadReader(request.FILES['file'], STUDENT_COLUMNS)
+        print(f"CSV columns: {rows.columns}")
+        report = import_students(rows, major_id, majors=scoped_majors(request))
+    except UploadFormatError as e:
+        print(f"Invalid upload: {e}")
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not report.ok:
+        print(f"Student import rejected: {report.error_count} errors")
+        return Response({"error": "El archivo CSV contiene errores", **report.as_dict()}, status=status.HTTP_400_BAD_REQUEST)
+    print(f"{report.created} students created")
 
     return Response({"status": "Archivo CSV subido correctamente"}, status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(['POST'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def uploadUserCSV(request):
     print("Uploading CSV file")
 
-    expected_columns = ['Usuario', 'Contraseña',
-                        'Nombre_Carrera', 'Codigo_Carrera']
+    try:
+        rows = UploadReader(request.FILES['file'], USER_COLUMNS)
+        print(f"CSV columns: {rows.columns}")
+        report = provision_users(rows, majors=scoped_majors(request))
+    except UploadFormatError as e:
+        print(f"Invalid upload: {e}")
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    csv = request.FILES['file']
-    df = pd.read_csv(csv)
-
-    columns = df.columns.tolist()
-
-    if not all(col in columns for col in expected_columns):
-        print("CSV file does not contain the expected columns")
-        return Response({"error": "El CSV no contiene las columnas correctas"}, status=status.HTTP_400_BAD_REQUEST)
-    else:
-        print("CSV file contains the expected columns")
-
-    users = df['Usuario'].drop_duplicates().tolist()
-
-    if len(users) > 2000:
-        return Response({"error": "El archivo CSV no puede tener más de 2000 usuarios"}, status=status.HTTP_400_BAD_REQUEST)
-
-    for user in users:
-        print(f"Processing user: {user}")
-        password = df[df['Usuario'] ==
-                      user]['Contraseña'].drop_duplicates().tolist()
-        majors = df[df['Usuario'] ==
-                    user]['Nombre_Carrera'].drop_duplicates().tolist()
-        major_codes = df[df['Usuario'] ==
-                         user]['Codigo_Carrera'].drop_duplicates().tolist()
-
-        found_majors = []
-
-        for major, code in zip(majors, major_codes):
-            found = False
-            try:
-                major_obj = Major.objects.get(name=major.upper())
-                if major_obj:
-                    found_majors.append(major_obj.id)
-                    found = True
-                    print(f"Found major: {major_obj.name} by name")
-            except Major.DoesNotExist:
-                print(f"Didn't find major {major} by name")
-
-            if not found:
-                try:
-                    major_obj_code = MajorCode.objects.get(code=code)
-
-                    if major_obj_code:
-                        found_majors.append(major_obj_code.major.id)
-                        print(f"Found major {major} with code {code}")
-                except MajorCode.DoesNotExist:
-                    print(f"Major {major} with code {code} does not exist")
-                    return Response({"error": f"Major {major} with code {code} does not exist"}, status=status.HTTP_400_BAD_REQUEST)
-
-        serializer = UserSerializer(
-            data={"username": user, "password": password[0], "major_ids": found_majors})
-        if serializer.is_valid():
-            user_instance = serializer.save()
-            print(f"User {user_instance.username} created")
-        else:
-            print(f"Error creating user {user}: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not report.ok:
+        print(f"User import rejected: {report.error_count} errors")
+        return Response({"error": "El archivo CSV contiene errores", **report.as_dict()}, status=status.HTTP_400_BAD_REQUEST)
+    print(f"{report.created} users created")
 
     return Response({"status": "Archivo CSV subido correctamente"}, status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(['POST'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
 @permission_classes([IsAuthenticated])
 def sendEmail(request):
     filename = request.POST['filename']
@@ -461,37 +589,92 @@ def sendEmail(request):
     if match == None:
         return Response({"error": "Email inválido"}, status=status.HTTP_400_BAD_REQUEST)
 
-    email_domain = recipient.split('@')[1]
-
-    is_valid = validate_email(
-        email_address=recipient,
-        check_format=True,
-        check_blacklist=True,
-        check_dns=True,
-        dns_timeout=10,
-        check_smtp=True,
-        smtp_timeout=10,
-        smtp_helo_host=email_domain,
-        smtp_from_address=EMAIL_ADDRESS,
-        smtp_skip_tls=False,
-        smtp_tls_context=None,
-        smtp_debug=False)
-
-    if is_valid:
-        email = MIMEMultipart()
-        email['From'] = EMAIL_ADDRESS
-        email['To'] = recipient
-        email['Subject'] = filename
-        email.attach(MIMEText(generate_email_text(filename, subject), 'plain'))
-
-        with smtplib.SMTP(SMPTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(EMAIL_ADDRESS, EMAIL_APP_PASSWORD)
-            excel_data = excel.read()
-            part = MIMEApplication(excel_data, Name=filename)
-            part['Content-Disposition'] = f'attachment; filename="{filename}"'
-            email.attach(part)
-            server.sendmail(EMAIL_ADDRESS, recipient, email.as_string())
-        return Response(200)
-    else:
+    # Cacheado y con plazo; None (no se pudo verificar a tiempo) no bloquea el envío:
+    # si el servidor rechaza la dirección, el correo queda como fallido
+    if check_recipient(recipient) is False:
         return Response({"error": "El email ingresado no existe"}, status=status.HTTP_400_BAD_REQUEST)
+
+    # El correo queda en cola y lo envía el worker de signature.mailer;
+    # el estado se consulta en /api/emails/<id>/
+    email = OutboundEmail.objects.create(
+        recipient=recipient,
+        subject=filename,
+        body=generate_email_text(filename, subject),
+        attachment=excel,
+        attachment_name=filename,
+        created_by=request.user,
+    )
+    enqueue_email()
+    email.refresh_from_db()
+    return Response(OutboundEmailSerializer(email).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
+@permission_classes([IsAuthenticated])
+def sendEmailBatch(request):
+    """
+    Varios registros en un solo request multipart: ``file`` repetido (uno por
+    registro), ``filename`` y ``subject`` en el mismo orden (un solo ``subject``
+    vale para todos; sin ``filename`` se usa el nombre del archivo) y ``email``
+    repetido con los destinatarios. Cada registro se envía a cada destinatario.
+
+    Los adjuntos se guardan una vez por archivo y todo el lote sale por la
+    misma conexión SMTP. Responde con el resultado de cada correo.
+    """
+    files = request.FILES.getlist('file')
+    filenames = request.POST.getlist('filename') or [f.name.rsplit('.', 1)[0] for f in files]
+    subjects = request.POST.getlist('subject')
+    recipients = list(dict.fromkeys(request.POST.getlist('email')))
+    print(f"Batch: {len(files)} files to {len(recipients)} recipients")
+
+    if not files or not recipients:
+        return Response({"error": "Se requiere al menos un archivo y un email"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(subjects) == 1:
+        subjects = subjects * len(files)
+    if len(filenames) != len(files) or len(subjects) != len(files):
+        return Response({"error": "Cada archivo debe tener su filename y subject"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(files) * len(recipients) > settings.MAIL_BATCH_MAX_MESSAGES:
+        return Response({"error": f"El lote no puede superar {settings.MAIL_BATCH_MAX_MESSAGES} correos"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    rejected = {}
+    for recipient in recipients:
+        if not re.match(r"[^@]+@[^@]+\.[^@]+", recipient):
+            rejected[recipient] = "Email inválido"
+        elif check_recipient(recipient) is False:
+            rejected[recipient] = "El email ingresado no existe"
+
+    results, emails = [], []
+    for excel, filename, subject in zip(files, filenames, subjects):
+        try:
+            body = generate_email_text(filename, subject)
+        except IndexError:
+            results += [{"filename": filename, "recipient": r, "status": "rejected",
+                         "error": "Nombre de archivo inválido"} for r in recipients]
+            continue
+        valid = [r for r in recipients if r not in rejected]
+        attachment = store_attachment(excel) if valid else None
+        for recipient in recipients:
+            if recipient in rejected:
+                results.append({"filename": filename, "recipient": recipient, "status": "rejected",
+                                "error": rejected[recipient]})
+                continue
+            email = OutboundEmail(recipient=recipient, subject=filename, body=body, attachment=attachment,
+                                  attachment_name=filename, created_by=request.user)
+            emails.append(email)
+            results.append({"filename": filename, "recipient": recipient, "email": email})
+
+    OutboundEmail.objects.bulk_create(emails)
+    if emails:
+        enqueue_email()
+
+    statuses = dict(OutboundEmail.objects.filter(id__in=[e.id for e in emails]).values_list('id', 'status'))
+    for result in results:
+        email = result.pop('email', None)
+        if email is not None:
+            result.update(id=email.id, status=statuses[email.id], error=None)
+
+    print(f"Batch queued {len(emails)} emails, {len(results) - len(emails)} rejected")
+    return Response({"queued": len(emails), "rejected": len(results) - len(emails), "results": results},
+                    status=status.HTTP_202_ACCEPTED if emails else status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,86 @@
+import time
+import pytest
+from django.core.cache import cache, caches
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from signature.authentication import CachedTokenAuthentication, token_cache
+from validate_email.exceptions import AddressNotDeliverableError, DomainNotFoundError, SMTPMessage
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    # En los tests, superar el presupuesto de consultas de una vista es un error
+    settings.QUERY_BUDGET_ACTION = 'raise'
+
+
+@pytest.fixture(autouse=True)
+def cheap_password_hashing(settings):
+    # El costo de producción no aporta nada en los tests y los hace lentos
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1_000
+
+
+@pytest.fixture
+def auth_client(django_user_model):
+    # Superusuario: ve todas las carreras (el filtro por carrera se prueba en test_scoping)
+    user = django_user_model.objects.create_user(username='testuser', password='testpass123', is_superuser=True)
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client, user
+
+
+@pytest.fixture
+def cached_auth_client(auth_client):
+    # Token ya validado (en caché), como el de un cliente que hace polling:
+    # así todos los requests que se comparan hacen las mismas consultas
+    client, user = auth_client
+    CachedTokenAuthentication().authenticate_credentials(user.auth_token.key)
+    return client, user
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    caches['catalog'].clear()
+    yield
+    caches['catalog'].clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+class FakeResolver:
+    """Resolver sin red: ``domains`` con sus MX y ``mailboxes`` que existen."""
+
+    def __init__(self):
+        self.domains = {'example.com': ['mx.example.com']}
+        self.mailboxes = {'coordinacion@example.com'}
+        self.delay = 0
+        self.calls = []
+
+    def mx_hosts(self, address, timeout):
+        self.calls.append(('mx', address.domain))
+        if address.domain not in self.domains:
+            raise DomainNotFoundError
+        return self.domains[address.domain]
+
+    def probe(self, address, hosts, timeout):
+        self.calls.append(('probe', address.ace))
+        if self.delay:
+            time.sleep(self.delay)
+        if address.ace not in self.mailboxes:
+            raise AddressNotDeliverableError({hosts[0]: SMTPMessage('RCPT TO', 550, 'User unknown', ())})
+        return True
+
+
+@pytest.fixture(autouse=True)
+def recipient_resolver(monkeypatch):
+    # La validación de destinatarios nunca sale a la red en los tests
+    resolver = FakeResolver()
+    monkeypatch.setattr('signature.recipients.get_resolver', lambda: resolver)
+    cache.clear()
+    yield resolver
+    cache.clear()
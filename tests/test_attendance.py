@@ -0,0 +1,181 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from signature.models import Major, Subject, Student, AttendanceSession, AttendanceRecord, AttendanceSummary
+
+
+@pytest.fixture
+def test_major():
+    return Major.objects.create(name='Computer Science', faculty='Engineering')
+
+@pytest.fixture
+def roster(test_major):
+    subject = Subject.objects.create(name='Programming 101')
+    subject.major.add(test_major)
+    students = Student.objects.bulk_create([
+        Student(rut=str(30_000_000 + n), dv='0', first_name='Ana', second_name='María',
+                last_name=f'Apellido{n:03}', second_last_name='Rojas', major=test_major)
+        for n in range(120)
+    ])
+    subject.students.add(*students)
+    return subject, students
+
+
+def mark(client, subject, students, status_for=lambda n: 'P', date='2025-05-14'):
+    return client.post(reverse('attendance-sessions-mark'), {
+        'subject_id': subject.id,
+        'date': date,
+        'records': [{'student_id': s.id, 'status': status_for(n)} for n, s in enumerate(students)],
+    }, format='json')
+
+
+@pytest.mark.django_db
+class TestAttendanceMarking:
+
+    def test_whole_roster_in_one_insert(self, auth_client, roster):
+        client, user = auth_client
+        subject, students = roster
+
+        with CaptureQueriesContext(connection) as queries:
+            response = mark(client, subject, students)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['marked'] == 120
+        inserts = [q['sql'] for q in queries if 'INSERT INTO "signature_attendancerecord"' in q['sql']]
+        assert len(inserts) == 1
+        session = AttendanceSession.objects.get()
+        assert session.created_by == user
+        assert session.records.filter(status=AttendanceRecord.PRESENT).count() == 120
+
+    def test_marking_again_updates_in_place(self, auth_client, roster):
+        client, _ = auth_client
+        subject, students = roster
+        mark(client, subject, students)
+
+        response = mark(client, subject, students[:10], status_for=lambda n: 'A')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert AttendanceSession.objects.count() == 1
+        assert AttendanceRecord.objects.count() == 120
+        assert AttendanceRecord.objects.filter(status=AttendanceRecord.ABSENT).count() == 10
+
+    def test_marks_are_read_with_the_session_locked(self, auth_client, roster, monkeypatch):
+        client, _ = auth_client
+        subject, students = roster
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def spy(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        # SQLite ignora FOR UPDATE, así que se revisa que se pida el bloqueo
+        monkeypatch.setattr(QuerySet, 'select_for_update', spy)
+        mark(client, subject, students[:2])
+        assert locked == []
+
+        mark(client, subject, students[:2], status_for=lambda n: 'A')
+        client.delete(reverse('attendance-sessions-unmark'), {
+            'subject_id': subject.id, 'date': '2025-05-14', 'student_ids': [students[0].id]}, format='json')
+        assert locked == [AttendanceSession, AttendanceSession]
+
+    def test_rejects_students_not_enrolled(self, auth_client, roster, test_major):
+        client, _ = auth_client
+        subject, students = roster
+        outsider = Student.objects.create(rut='22222222', dv='2', first_name='Ana', second_name='María',
+                                          last_name='Alvarez', second_last_name='Rojas', major=test_major)
+
+        response = mark(client, subject, [students[0], outsider])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert str(outsider.id) in str(response.data['records'])
+        assert not AttendanceRecord.objects.exists()
+
+    def test_rejects_unknown_status_and_repeated_students(self, auth_client, roster):
+        client, _ = auth_client
+        subject, students = roster
+
+        assert mark(client, subject, students[:2], status_for=lambda n: 'X').status_code == \
+            status.HTTP_400_BAD_REQUEST
+        assert mark(client, subject, [students[0], students[0]]).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_session_lists_its_records(self, auth_client, roster):
+        client, _ = auth_client
+        subject, students = roster
+        mark(client, subject, students[:3], status_for=lambda n: 'PAT'[n])
+        mark(client, subject, students[:3], date='2025-05-15')
+
+        response = client.get(reverse('attendance-sessions-list'), {'subject_id': subject.id, 'date': '2025-05-14'})
+
+        [session] = response.data['results']
+        assert session['date'] == '2025-05-14'
+        assert sorted(r['status'] for r in session['records']) == ['A', 'P', 'T']
+        assert client.get(reverse('attendance-sessions-list'), {'date': 'ayer'}).status_code == \
+            status.HTTP_400_BAD_REQUEST
+
+
+def summary():
+    return {row[0]: row[1:] for row in AttendanceSummary.objects.values_list(
+        'student_id', 'present', 'absent', 'late', 'excused')}
+
+
+@pytest.mark.django_db
+class TestAttendanceSummary:
+
+    def test_counters_follow_marks_and_unmarks(self, auth_client, roster):
+        client, _ = auth_client
+        subject, students = roster
+        first, second, third = students[:3]
+
+        mark(client, subject, students[:3], status_for=lambda n: 'PAT'[n])
+        assert summary() == {first.id: (1, 0, 0, 0), second.id: (0, 1, 0, 0), third.id: (0, 0, 1, 0)}
+
+        mark(client, subject, [second], status_for=lambda n: 'J')
+        mark(client, subject, students[:2], date='2025-05-15')
+        assert summary()[first.id] == (2, 0, 0, 0)
+        assert summary()[second.id] == (1, 0, 0, 1)
+
+        response = client.delete(reverse('attendance-sessions-unmark'), {
+            'subject_id': subject.id, 'date': '2025-05-14', 'student_ids': [first.id, second.id]}, format='json')
+        assert response.data['unmarked'] == 2
+        assert summary()[first.id] == (1, 0, 0, 0)
+        assert summary()[second.id] == (1, 0, 0, 0)
+
+    def test_rebuild_matches_incremental_counters(self, auth_client, roster):
+        client, _ = auth_client
+        subject, students = roster
+        mark(client, subject, students, status_for=lambda n: 'PATJ'[n % 4])
+        mark(client, subject, students[:50], status_for=lambda n: 'AP'[n % 2], date='2025-05-15')
+        incremental = summary()
+
+        AttendanceSummary.objects.update(present=0)
+        call_command('rebuild_attendance_summary', '--subject', str(subject.id))
+
+        assert summary() == incremental
+
+    def test_rebuild_without_records(self, roster):
+        call_command('rebuild_attendance_summary')
+        assert not AttendanceSummary.objects.exists()
+
+    def test_read_endpoints(self, auth_client, roster, test_major):
+        client, _ = auth_client
+        subject, students = roster
+        mark(client, subject, students[:4], status_for=lambda n: 'PATJ'[n])
+
+        response = client.get(reverse('attendance-summary-list'), {'student_id': students[1].id})
+        [row] = response.data['results']
+        assert (row['absent'], row['rate']) == (1, 0.0)
+
+        [by_subject] = client.get(reverse('attendance-summary-by-subject')).data
+        assert by_subject['subject__name'] == 'Programming 101'
+        assert (by_subject['present'], by_subject['absent'], by_subject['late'], by_subject['excused']) == (1, 1, 1, 1)
+        # Presente + atrasado sobre presente + ausente + atrasado; el justificado no cuenta
+        assert by_subject['rate'] == 66.7
+
+        [by_major] = client.get(reverse('attendance-summary-by-major'), {'major_id': test_major.id}).data
+        assert by_major['student__major'] == test_major.id
+        assert by_major['rate'] == 66.7
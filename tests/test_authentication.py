@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from signature.authentication import token_cache
+
+User = get_user_model()
+
+
+@pytest.fixture
+def auth_client():
+    user = User.objects.create_user(username='testuser', password='testpass123')
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client, user
+
+
+def token_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('majors-list'))
+    return response, [q for q in queries if 'authtoken_token' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+
+    def test_repeat_requests_skip_the_token_query(self, auth_client):
+        client, user = auth_client
+
+        response, queries = token_queries(client)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 1
+
+        response, queries = token_queries(client)
+        assert response.status_code == status.HTTP_200_OK
+        assert queries == []
+
+    def test_deleted_token_is_rejected(self, auth_client):
+        client, user = auth_client
+        token_queries(client)
+
+        Token.objects.filter(user=user).delete()
+
+        response, _ = token_queries(client)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_is_rejected(self, auth_client):
+        client, user = auth_client
+        token_queries(client)
+
+        user.is_active = False
+        user.save()
+
+        response, _ = token_queries(client)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_entries_expire(self, auth_client, settings):
+        settings.AUTH_TOKEN_CACHE_TTL = 0
+        client, _ = auth_client
+        token_queries(client)
+
+        _, queries = token_queries(client)
+        assert len(queries) == 1
+
+    def test_shared_cache_serves_other_processes(self, auth_client, settings):
+        settings.AUTH_TOKEN_SHARED_CACHE = 'default'
+        client, _ = auth_client
+        token_queries(client)
+
+        token_cache.clear()  # como si fuera otro proceso
+        response, queries = token_queries(client)
+        assert response.status_code == status.HTTP_200_OK
+        assert queries == []
+
+
+class TestTokenCache:
+
+    def test_least_recently_used_is_evicted(self, settings):
+        settings.AUTH_TOKEN_CACHE_SIZE = 2
+        for key in 'abc':
+            token_cache.set(key, key)
+            token_cache.get('a')
+
+        assert token_cache.get('a') == 'a'
+        assert token_cache.get('b') is None
+        assert token_cache.get('c') == 'c'
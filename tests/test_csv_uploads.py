@@ -0,0 +1,265 @@
+import pytest
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from django.contrib.auth.hashers import check_password
+from signature import importers
+from signature.models import Student, Major, Subject, MajorCode
+
+User = get_user_model()
+
+
+REGISTER_XLSX = 'tests/REGISTROS DE ASISTENCIA - SAAC ( MARTES 14-05 ARQUITECTURA ).xlsx'
+
+
+def csv_file(text, name='archivo.csv'):
+    return SimpleUploadedFile(name, text.encode('utf-8'), content_type='text/csv')
+
+
+@pytest.fixture
+def test_major():
+    return Major.objects.create(name='Computer Science', faculty='Engineering')
+
+
+@pytest.mark.django_db
+class TestUploadStudentCSV:
+
+    def test_upload_students_success(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "22222222,flavio,alexander,jara,labrin\n"
+            "18765432,juan,pablo,perez,soto\n"
+            "18765432,juan,pablo,perez,soto\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Student.objects.filter(major=test_major).count() == 2
+        student = Student.objects.get(rut='22222222')
+        assert student.dv == '2'
+        assert student.first_name == 'FLAVIO'
+        assert student.second_last_name == 'LABRIN'
+
+    def test_upload_students_reports_every_invalid_row(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "22222222,flavio,alexander,jara,labrin\n"
+            "12A45678,juan,pablo,perez,soto\n"
+            "11111111,,pablo,perez,soto\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [error['row'] for error in response.data['errors']] == [3, 4]
+        # Un archivo con errores no inserta ninguna fila
+        assert not Student.objects.filter(major=test_major).exists()
+
+    def test_upload_students_existing_rut(self, auth_client, test_major):
+        client, _ = auth_client
+        Student.objects.create(rut='15555555', dv='6', first_name='FLAVIO', second_name='ALEXANDER',
+                               last_name='JARA', second_last_name='LABRIN', major=test_major)
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "15555555,flavio,alexander,jara,labrin\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['errors'][0]['rut'] == '15555555'
+
+    def test_upload_students_wrong_dv_column(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut,DV,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "22222222,3,flavio,alexander,jara,labrin\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['errors'][0]['error'] == "El RUT no es válido"
+
+    def test_upload_students_semicolon_csv(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut;Nombre;Segundo_Nombre;Apellido;Segundo_Apellido\n"
+            "22222222;flavio;alexander;jara;labrin\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Student.objects.filter(rut='22222222', major=test_major).exists()
+
+    def test_upload_students_too_many_rows(self, auth_client, test_major, settings):
+        settings.IMPORT_MAX_ROWS = 1
+        client, _ = auth_client
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "22222222,flavio,alexander,jara,labrin\n"
+            "18765432,juan,pablo,perez,soto\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Student.objects.filter(major=test_major).exists()
+
+    def test_upload_students_nonexistent_major(self, auth_client):
+        client, _ = auth_client
+        url = reverse('uploadStudentCSV')
+        data = csv_file(
+            "Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "21075353,flavio,alexander,jara,labrin\n"
+        )
+        response = client.post(
+            url, {'file': data, 'major_id': 99999}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestUploadStudentSubjectCSV:
+
+    @pytest.fixture
+    def test_subject(self, test_major):
+        subject = Subject.objects.create(name='Programming 101')
+        subject.major.add(test_major)
+        return subject
+
+    def make_student(self, rut, dv, major):
+        return Student.objects.create(rut=rut, dv=dv, first_name='JUAN', second_name='PABLO',
+                                      last_name='PEREZ', second_last_name='SOTO', major=major)
+
+    def test_enroll_students_report(self, auth_client, test_major, test_subject):
+        client, _ = auth_client
+        other_major = Major.objects.create(name='Biology', faculty='Science')
+        enrolled = self.make_student('22222222', '2', test_major)
+        already = self.make_student('18765432', '7', test_major)
+        self.make_student('15555555', '6', other_major)
+        test_subject.students.add(already)
+
+        url = reverse('uploadStudentSubjectCSV')
+        data = csv_file("Rut\n22222222\n18765432\n15555555\n11111111\n22222222\n")
+        response = client.post(url, {'file': data, 'major_id': test_major.id,
+                                     'subject_id': test_subject.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['enrolled'] == ['22222222']
+        assert response.data['already_enrolled'] == ['18765432']
+        assert [r['rut'] for r in response.data['rejected']] == ['15555555', '11111111']
+        assert set(test_subject.students.all()) == {enrolled, already}
+
+    def test_enroll_from_attendance_register_xlsx(self, auth_client, test_major, test_subject):
+        client, _ = auth_client
+        student = self.make_student('11111111', '1', test_major)
+
+        url = reverse('uploadStudentSubjectCSV')
+        with open(REGISTER_XLSX, 'rb') as register:
+            response = client.post(url, {'file': register, 'major_id': test_major.id,
+                                         'subject_id': test_subject.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['enrolled'] == ['11111111']
+        assert list(test_subject.students.all()) == [student]
+
+    def test_enroll_subject_not_in_major(self, auth_client, test_subject):
+        client, _ = auth_client
+        other_major = Major.objects.create(name='Biology', faculty='Science')
+        url = reverse('uploadStudentSubjectCSV')
+        data = csv_file("Rut\n22222222\n")
+        response = client.post(url, {'file': data, 'major_id': other_major.id,
+                                     'subject_id': test_subject.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_enroll_nonexistent_subject(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('uploadStudentSubjectCSV')
+        data = csv_file("Rut\n22222222\n")
+        response = client.post(url, {'file': data, 'major_id': test_major.id,
+                                     'subject_id': 99999}, format='multipart')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestUploadUserCSV:
+
+    def test_upload_users_success(self, auth_client, test_major):
+        client, _ = auth_client
+        other_major = Major.objects.create(name='BIOLOGY', faculty='Science')
+        MajorCode.objects.create(code='BIO_101', major=other_major)
+
+        url = reverse('uploadUserCSV')
+        data = csv_file(
+            "Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n"
+            "coordinador1,clave123,Computer Science,XX\n"
+            "coordinador1,clave123,Biologia,BIO_101\n"
+            "coordinador2,clave456,Computer Science,XX\n"
+        )
+        response = client.post(url, {'file': data}, format='multipart')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        user = User.objects.get(username='coordinador1')
+        assert user.check_password('clave123')
+        assert not user.is_superuser
+        assert set(user.majors.all()) == {test_major, other_major}
+        assert Token.objects.filter(user__username__in=['coordinador1', 'coordinador2']).count() == 2
+
+    def test_upload_users_reports_errors(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('uploadUserCSV')
+        data = csv_file(
+            "Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n"
+            "testuser,clave123,Computer Science,XX\n"
+            "nuevo,clave123,Carrera Inventada,NOPE\n"
+            "otro@user,clave123,Computer Science,XX\n"
+        )
+        response = client.post(url, {'file': data}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [e['username'] for e in response.data['errors']] == ['nuevo', 'testuser', 'otro@user']
+        assert not User.objects.filter(username='nuevo').exists()
+
+    def test_hash_passwords_in_process_pool(self, settings, monkeypatch):
+        settings.IMPORT_HASH_WORKERS = 2
+        monkeypatch.setattr(importers, 'PARALLEL_HASH_MIN', 0)
+
+        hashes = importers.hash_passwords(['uno', 'dos'])
+
+        assert check_password('uno', hashes[0])
+        assert check_password('dos', hashes[1])
+        # Los workers usan el costo de los tests (conftest), no el de producción
+        assert [h.split('$')[1] for h in hashes] == ['1000', '1000']
+
+    def test_upload_users_hashes_once(self, auth_client, test_major, monkeypatch):
+        client, _ = auth_client
+        monkeypatch.setattr(importers, 'BATCH_SIZE', 1)
+        calls = []
+        hash_passwords = importers.hash_passwords
+        monkeypatch.setattr(importers, 'hash_passwords', lambda passwords, progress=None: calls.append(passwords) or
+                            hash_passwords(passwords, progress))
+        data = csv_file(
+            "Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n"
+            "coordinador1,clave123,Computer Science,XX\n"
+            "coordinador2,clave456,Computer Science,XX\n"
+        )
+        response = client.post(reverse('uploadUserCSV'), {'file': data}, format='multipart')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert calls == [['clave123', 'clave456']]
+        assert User.objects.get(username='coordinador2').check_password('clave456')
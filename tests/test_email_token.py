@@ -25,4 +25,4 @@ def test_email():
         "file": open("tests/REGISTROS DE ASISTENCIA - SAAC ( MARTES 14-05 ARQUITECTURA ).xlsx", "rb")
     }
     response = requests.post(url, headers=headers,data=data, files=files)
-    assert response.status_code == 200
+    assert response.status_code == 202
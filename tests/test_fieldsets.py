@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from signature.models import Student, Major, Subject
+
+
+@pytest.fixture
+def test_major():
+    major = Major.objects.create(name='Computer Science', faculty='Engineering')
+    subject = Subject.objects.create(name='Algoritmos')
+    subject.major.add(major)
+    student = Student.objects.create(
+        rut='22222222', dv='2', first_name='FLAVIO', second_name='ALEXANDER',
+        last_name='JARA', second_last_name='LABRIN', major=major)
+    subject.students.add(student)
+    return major
+
+
+def get(client, url, params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data, len(queries)
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_default_output_is_unchanged(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        data, _ = get(client, reverse('majors-detail', kwargs={'pk': test_major.id}), {})
+
+        assert set(data) == {'id', 'name', 'faculty', 'subjects'}
+        subject = data['subjects'][0]
+        assert set(subject) == {'id', 'name', 'major', 'students'}
+        assert subject['students'][0]['rut'] == '22222222'
+
+    def test_fields_selects_per_level(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        url = reverse('majors-detail', kwargs={'pk': test_major.id})
+        data, _ = get(client, url, {'fields': 'id,name,subjects.name'})
+
+        assert data == {'id': test_major.id, 'name': 'Computer Science',
+                        'subjects': [{'name': 'Algoritmos'}]}
+
+    def test_depth_zero_skips_nested_relations(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        full, full_queries = get(client, reverse('majors-list'), {})
+        data, queries = get(client, reverse('majors-list'), {'depth': '0'})
+
+        assert all(set(major) == {'id', 'name', 'faculty'} for major in data['results'])
+        assert queries < full_queries
+
+    def test_expand_only_listed_relations(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        url = reverse('majors-detail', kwargs={'pk': test_major.id})
+        _, full_queries = get(client, url, {})
+        data, queries = get(client, url, {'expand': 'subjects'})
+
+        subject = data['subjects'][0]
+        assert 'students' not in subject
+        assert subject['major'] == [test_major.id]
+        assert queries < full_queries
+
+    def test_fields_naming_a_nested_relation_expands_it(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        url = reverse('subjects-list')
+        data, _ = get(client, url, {'fields': 'name,students.rut', 'expand': ''})
+
+        assert data['results'][-1] == {'name': 'Algoritmos', 'students': [{'rut': '22222222'}]}
+
+    def test_pk_lists_are_not_prefetched_when_dropped(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        url = reverse('students-list')
+        _, full_queries = get(client, url, {})
+        data, queries = get(client, url, {'fields': 'rut,dv'})
+
+        assert set(data['results'][0]) == {'rut', 'dv'}
+        assert queries == full_queries - 1
+
+    def test_invalid_depth(self, cached_auth_client, test_major):
+        client, _ = cached_auth_client
+        response = client.get(reverse('majors-list'), {'depth': 'mucho'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,210 @@
+import time
+from datetime import timedelta
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from signature import importers, jobs
+from signature.jobs import progress_key, run_job
+from signature.models import Student, Major, ImportJob
+
+User = get_user_model()
+
+STUDENTS_CSV = (
+    "Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+    "22222222,flavio,alexander,jara,labrin\n"
+    "18765432,juan,pablo,perez,soto\n"
+)
+
+
+def csv_file(text, name='archivo.csv'):
+    return SimpleUploadedFile(name, text.encode('utf-8'), content_type='text/csv')
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+@pytest.fixture
+def auth_client(test_major):
+    user = User.objects.create_user(username='testuser', password='testpass123')
+    user.majors.add(test_major)
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client, user
+
+@pytest.fixture
+def test_major():
+    return Major.objects.create(name='Computer Science', faculty='Engineering')
+
+
+@pytest.mark.django_db
+class TestImportJobsAPI:
+
+    @pytest.fixture(autouse=True)
+    def eager_jobs(self, settings):
+        settings.IMPORT_JOBS_EAGER = True
+
+    def test_create_student_import_job(self, auth_client, test_major):
+        client, user = auth_client
+        url = reverse('import-jobs-list')
+        response = client.post(url, {'kind': 'students', 'file': csv_file(STUDENTS_CSV),
+                                     'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = ImportJob.objects.get(id=response.data['id'])
+        assert job.created_by == user
+
+        response = client.get(reverse('import-jobs-detail', kwargs={'pk': job.id}))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'completed'
+        assert response.data['rows_processed'] == 2
+        assert response.data['result']['created'] == 2
+        assert Student.objects.filter(major=test_major).count() == 2
+
+    def test_failed_job_reports_errors(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('import-jobs-list')
+        data = csv_file(STUDENTS_CSV + "12A45678,juan,pablo,perez,soto\n")
+        response = client.post(url, {'kind': 'students', 'file': data,
+                                     'major_id': test_major.id}, format='multipart')
+
+        response = client.get(reverse('import-jobs-detail', kwargs={'pk': response.data['id']}))
+        assert response.data['status'] == 'failed'
+        assert response.data['result']['errors'][0]['row'] == 4
+
+    def test_enrollment_job_requires_subject(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('import-jobs-list')
+        response = client.post(url, {'kind': 'enrollments', 'file': csv_file("Rut\n22222222\n"),
+                                     'major_id': test_major.id}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_user_job_reports_every_row(self, auth_client, test_major, settings, workers):
+        settings.IMPORT_HASH_WORKERS = workers
+        client, _ = auth_client
+        users = "".join(f"coordinador{n},clave123,Computer Science,XX\n" for n in range(20))
+        response = client.post(reverse('import-jobs-list'), {
+            'kind': 'users', 'file': csv_file("Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n" + users)},
+            format='multipart')
+
+        response = client.get(reverse('import-jobs-detail', kwargs={'pk': response.data['id']}))
+        assert response.data['status'] == 'completed'
+        assert response.data['rows_processed'] == 20
+        assert response.data['throughput'] > 0
+
+    def test_user_job_keeps_reporting_while_hashing(self, auth_client, test_major, settings, monkeypatch):
+        settings.IMPORT_HASH_WORKERS = 1
+        monkeypatch.setattr(importers, 'HASH_CHUNK_SIZE', 4)
+        reports = []
+        report_progress = jobs.report_progress
+        monkeypatch.setattr(jobs, 'report_progress', lambda job_id, rows: reports.append(rows) or
+                            report_progress(job_id, rows))
+        client, _ = auth_client
+        users = "".join(f"coordinador{n},clave123,Computer Science,XX\n" for n in range(20))
+        client.post(reverse('import-jobs-list'), {
+            'kind': 'users', 'file': csv_file("Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n" + users)},
+            format='multipart')
+
+        # Inicio, fin de la lectura, cada 4 contraseñas y el lote insertado
+        assert reports == [0] + [20] * 7
+
+    def test_jobs_of_other_users_are_hidden(self, auth_client, test_major):
+        client, _ = auth_client
+        other = User.objects.create_user(username='otro', password='otro123')
+        job = ImportJob.objects.create(kind='users', file='imports/x.csv', created_by=other)
+
+        response = client.get(reverse('import-jobs-detail', kwargs={'pk': job.id}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestRecoverImportJobs:
+
+    @pytest.fixture(autouse=True)
+    def progress_cache(self, settings):
+        settings.IMPORT_JOB_STALE_AFTER = 300
+        caches[settings.IMPORT_PROGRESS_CACHE].clear()
+        return caches[settings.IMPORT_PROGRESS_CACHE]
+
+    def job(self, user, major, status=ImportJob.PENDING, age=0):
+        job = ImportJob(kind='students', params={'major_id': major.id}, created_by=user, status=status)
+        job.file.save('alumnos.csv', csv_file(STUDENTS_CSV), save=False)
+        job.save()
+        then = timezone.now() - timedelta(seconds=age)
+        ImportJob.objects.filter(id=job.id).update(
+            created_at=then, started_at=then if status == ImportJob.RUNNING else None)
+        return job
+
+    def test_live_progress_is_read_from_the_shared_cache(self, auth_client, test_major, progress_cache):
+        client, user = auth_client
+        job = self.job(user, test_major, status=ImportJob.RUNNING)
+        progress_cache.set(progress_key(job.id), 1500)
+
+        response = client.get(reverse('import-jobs-detail', kwargs={'pk': job.id}))
+        assert response.data['rows_processed'] == 1500
+
+    def test_dead_running_job_is_failed(self, auth_client, test_major, progress_cache):
+        _, user = auth_client
+        dead = self.job(user, test_major, status=ImportJob.RUNNING, age=301)
+        alive = self.job(user, test_major, status=ImportJob.RUNNING, age=301)
+        recent = self.job(user, test_major, status=ImportJob.RUNNING)
+        progress_cache.set(progress_key(alive.id), 500)
+
+        dead_file = dead.file.name
+        call_command('recover_import_jobs')
+
+        dead.refresh_from_db()
+        assert dead.status == ImportJob.FAILED
+        assert dead.finished_at is not None
+        assert not dead.file
+        assert not alive.file.storage.exists(dead_file)
+        assert ImportJob.objects.get(id=alive.id).status == ImportJob.RUNNING
+        assert ImportJob.objects.get(id=recent.id).status == ImportJob.RUNNING
+
+    def test_lost_pending_job_is_run(self, auth_client, test_major, progress_cache):
+        _, user = auth_client
+        lost = self.job(user, test_major, age=301)
+        queued = self.job(user, test_major)
+
+        call_command('recover_import_jobs')
+
+        assert ImportJob.objects.get(id=lost.id).status == ImportJob.COMPLETED
+        assert ImportJob.objects.get(id=queued.id).status == ImportJob.PENDING
+        assert Student.objects.filter(major=test_major).count() == 2
+        assert progress_cache.get(progress_key(lost.id)) is None
+
+    def test_job_runs_once(self, auth_client, test_major):
+        _, user = auth_client
+        job = self.job(user, test_major)
+
+        assert run_job(job.id) is True
+        assert run_job(job.id) is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_job_runs_in_background(auth_client, test_major):
+    client, _ = auth_client
+    url = reverse('import-jobs-list')
+    response = client.post(url, {'kind': 'students', 'file': csv_file(STUDENTS_CSV),
+                                 'major_id': test_major.id}, format='multipart')
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+    detail = reverse('import-jobs-detail', kwargs={'pk': response.data['id']})
+    for _ in range(100):
+        response = client.get(detail)
+        if response.data['status'] in ('completed', 'failed'):
+            break
+        time.sleep(0.05)
+
+    assert response.data['status'] == 'completed'
+    assert Student.objects.filter(major=test_major).count() == 2
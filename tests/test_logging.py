@@ -0,0 +1,143 @@
+import json
+import logging
+import queue
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+from signature.middleware.logging_formatters import ColorFormatter, JsonFormatter
+from signature.middleware.logging_handlers import BoundedQueueHandler
+from signature.models import Major
+
+
+def make_record(msg='GET /api/majors/ - 200', level=logging.INFO, **extra):
+    record = logging.makeLogRecord({'msg': msg, 'levelno': level,
+                                    'levelname': logging.getLevelName(level), 'name': 'api'})
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLoggingPipeline:
+
+    def test_json_formatter_includes_extra_fields(self):
+        line = JsonFormatter().format(make_record(status_code=200, duration_ms=1.5))
+        entry = json.loads(line)
+
+        assert entry['message'] == 'GET /api/majors/ - 200'
+        assert entry['level'] == 'INFO'
+        assert entry['status_code'] == 200
+        assert entry['duration_ms'] == 1.5
+        assert '\x1b[' not in line
+
+    def test_color_only_in_console_formatter(self):
+        colored = ColorFormatter('{levelname} {message}', style='{').format(
+            make_record(level=logging.WARNING))
+
+        assert colored.startswith('\x1b[33m')
+        assert colored.endswith('\x1b[0m')
+
+    def test_full_queue_drops_and_counts(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(make_record())
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+        handler.queue.get_nowait()
+        handler.handle(make_record())
+        assert handler.queue.queue[-1].dropped_records == 3
+
+    def test_configured_listener_is_running(self):
+        handler = logging.getHandlerByName('queue')
+
+        assert isinstance(handler, BoundedQueueHandler)
+        assert handler.listener._thread is not None
+
+    @pytest.mark.django_db
+    def test_request_log_has_structured_fields(self, auth_client, caplog, settings):
+        settings.REQUEST_LOG_SAMPLE_RATE = 1
+        client, _ = auth_client
+        with caplog.at_level(logging.INFO, logger='api'):
+            client.get(reverse('majors-list'))
+
+        record = next(r for r in caplog.records if getattr(r, 'status_code', None))
+        assert record.method == 'GET'
+        assert record.path == '/api/majors/'
+        assert record.user == 'testuser'
+        assert record.operation == 'Retrieved Major '
+
+
+def request_records(caplog):
+    return [r for r in caplog.records if r.name == 'api' and hasattr(r, 'status_code')]
+
+
+@pytest.mark.django_db
+class TestRequestLoggingMiddleware:
+
+    def test_successful_reads_are_sampled(self, auth_client, caplog, settings):
+        settings.REQUEST_LOG_SAMPLE_RATE = 0
+        client, _ = auth_client
+        with caplog.at_level(logging.INFO):
+            client.get(reverse('majors-list'))
+
+        assert request_records(caplog) == []
+        assert not any(r.name == 'api.queries' for r in caplog.records)
+
+    def test_errors_are_always_logged(self, auth_client, caplog, settings):
+        settings.REQUEST_LOG_SAMPLE_RATE = 0
+        client, _ = auth_client
+        with caplog.at_level(logging.INFO, logger='api'):
+            client.get(reverse('majors-detail', kwargs={'pk': 999999}))
+
+        [record] = request_records(caplog)
+        assert record.status_code == 404
+
+    def test_writes_log_the_redacted_body(self, caplog, settings):
+        settings.REQUEST_LOG_SAMPLE_RATE = 0
+        client = APIClient()
+        with caplog.at_level(logging.INFO, logger='api'):
+            client.post(reverse('login'), {'username': 'nadie', 'password': 'secreta'}, format='json')
+
+        [record] = request_records(caplog)
+        assert record.request_body == {'username': 'nadie', 'password': '[REDACTED]'}
+
+    def test_writes_log_the_redacted_form_body(self, caplog, settings):
+        settings.REQUEST_LOG_SAMPLE_RATE = 0
+        client = APIClient()
+        with caplog.at_level(logging.INFO, logger='api'):
+            client.post(reverse('login'), 'username=nadie&password=secreta',
+                        content_type='application/x-www-form-urlencoded')
+
+        [record] = request_records(caplog)
+        assert record.request_body == {'username': 'nadie', 'password': '[REDACTED]'}
+        assert 'secreta' not in json.dumps(record.request_body)
+
+    def test_invalid_body_is_not_logged_raw(self, caplog, settings):
+        settings.REQUEST_LOG_SAMPLE_RATE = 0
+        client = APIClient()
+        with caplog.at_level(logging.INFO, logger='api'):
+            client.post(reverse('login'), '{"password": "secreta"', content_type='application/json')
+
+        [record] = request_records(caplog)
+        assert record.request_body == '[cuerpo no válido]'
+
+    def test_uploaded_files_are_not_captured(self, auth_client, caplog):
+        client, _ = auth_client
+        with caplog.at_level(logging.INFO, logger='api'):
+            upload = SimpleUploadedFile('a.csv', b'Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n')
+            client.post(reverse('uploadStudentCSV'), {'major_id': 1, 'file': upload}, format='multipart')
+
+        [record] = request_records(caplog)
+        assert not hasattr(record, 'request_body')
+
+    def test_operation_model_comes_from_the_resolved_viewset(self, auth_client, caplog):
+        client, _ = auth_client
+        major = Major.objects.create(name='Computer Science', faculty='Engineering')
+        with caplog.at_level(logging.INFO, logger='api'):
+            client.delete(reverse('majors-detail', kwargs={'pk': major.id}))
+            client.post(reverse('students-get-student-bymajor'), {'major_id': major.id}, format='json')
+
+        deleted, by_major = request_records(caplog)
+        assert deleted.operation == 'Deleted Major Computer Science'
+        assert by_major.operation.startswith('Created Student')
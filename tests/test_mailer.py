@@ -0,0 +1,286 @@
+import smtplib
+from datetime import timedelta
+import pytest
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.fields.files import FieldFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from signature.mailer import claim_due, deliver_pending, renew_claim
+from signature.models import OutboundEmail
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+@pytest.fixture
+def auth_client():
+    user = User.objects.create_user(username='testuser', password='testpass123')
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client, user
+
+
+def queue_email(recipient='coordinacion@example.com', user=None):
+    email = OutboundEmail(recipient=recipient, subject='REGISTRO ( LUNES 13-05 ARQUITECTURA )',
+                          body='Se envía adjunto el registro', attachment_name='registro.xlsx',
+                          created_by=user)
+    email.attachment.save('registro.xlsx', ContentFile(b'PK\x03\x04 excel'), save=False)
+    email.save()
+    return email
+
+
+class FlakyBackend(EmailBackend):
+    """locmem que pierde la conexión en los primeros ``failures`` envíos."""
+
+    def __init__(self, failures=1, error=smtplib.SMTPServerDisconnected, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.error = error
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise self.error('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestMailQueue:
+
+    def test_delivers_queued_emails(self):
+        first, second = queue_email(), queue_email('otra@example.com')
+
+        assert deliver_pending() == {'sent': 2, 'retry': 0, 'failed': 0}
+        assert [m.to for m in mail.outbox] == [['coordinacion@example.com'], ['otra@example.com']]
+        assert mail.outbox[0].attachments[0][0] == 'registro.xlsx'
+
+        first.refresh_from_db()
+        assert first.status == OutboundEmail.SENT
+        assert first.attempts == 1
+        assert not first.attachment
+
+    def test_lost_connection_is_retried_with_backoff(self, settings):
+        settings.MAIL_RETRY_DELAY = 60
+        first, second = queue_email(), queue_email('otra@example.com')
+
+        counts = deliver_pending(connection=FlakyBackend(failures=1))
+
+        assert counts == {'sent': 1, 'retry': 1, 'failed': 0}
+        first.refresh_from_db()
+        assert first.status == OutboundEmail.QUEUED
+        assert 'unexpectedly closed' in first.last_error
+        assert first.next_attempt_at > timezone.now() + timedelta(seconds=50)
+
+        # Todavía no toca
+        assert deliver_pending() == {'sent': 0, 'retry': 0, 'failed': 0}
+
+        OutboundEmail.objects.filter(id=first.id).update(next_attempt_at=timezone.now())
+        assert deliver_pending()['sent'] == 1
+        first.refresh_from_db()
+        assert first.status == OutboundEmail.SENT
+        assert first.attempts == 2
+
+    def test_gives_up_after_max_attempts(self, settings):
+        settings.MAIL_MAX_ATTEMPTS = 2
+        email = queue_email()
+        for _ in range(2):
+            OutboundEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+            deliver_pending(connection=FlakyBackend(failures=1))
+
+        email.refresh_from_db()
+        assert email.status == OutboundEmail.FAILED
+        assert email.attempts == 2
+
+    def test_refused_recipient_is_not_retried(self):
+        email = queue_email()
+        refused = lambda message: smtplib.SMTPRecipientsRefused({email.recipient: (550, b'No such user')})
+
+        assert deliver_pending(connection=FlakyBackend(error=refused))['failed'] == 1
+        email.refresh_from_db()
+        assert email.status == OutboundEmail.FAILED
+
+    def test_interrupted_send_is_requeued_after_the_lease(self, settings):
+        settings.MAIL_SENDING_LEASE = 600
+        stale, fresh = queue_email(), queue_email('otra@example.com')
+        # Un worker los tomó y murió antes de guardar el resultado
+        OutboundEmail.objects.filter(id=stale.id).update(
+            status=OutboundEmail.SENDING, claimed_at=timezone.now() - timedelta(seconds=601))
+        OutboundEmail.objects.filter(id=fresh.id).update(
+            status=OutboundEmail.SENDING, claimed_at=timezone.now())
+
+        assert deliver_pending() == {'sent': 1, 'retry': 0, 'failed': 0}
+        assert [m.to for m in mail.outbox] == [['coordinacion@example.com']]
+        stale.refresh_from_db()
+        assert (stale.status, stale.attempts, stale.claimed_at) == (OutboundEmail.SENT, 2, None)
+        fresh.refresh_from_db()
+        assert fresh.status == OutboundEmail.SENDING
+
+    def test_interrupted_send_counts_as_an_attempt(self, settings):
+        settings.MAIL_MAX_ATTEMPTS = 2
+        email = queue_email()
+        OutboundEmail.objects.filter(id=email.id).update(
+            status=OutboundEmail.SENDING, attempts=1, claimed_at=None)
+
+        assert deliver_pending() == {'sent': 0, 'retry': 0, 'failed': 0}
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (OutboundEmail.FAILED, 2)
+        assert email.last_error == "El envío se interrumpió"
+
+    def test_claim_taken_over_is_not_sent_twice(self):
+        email = queue_email()
+        emails = list(claim_due(10))
+        # Otro worker lo volvió a tomar después de vencido el plazo
+        OutboundEmail.objects.filter(id=email.id).update(claimed_at=timezone.now() + timedelta(seconds=1))
+
+        assert [renew_claim(e) for e in emails] == [False]
+
+    def test_management_command(self):
+        queue_email()
+        call_command('send_queued_mail')
+
+        assert len(mail.outbox) == 1
+
+
+@pytest.mark.django_db
+class TestEmailStatusAPI:
+
+    def test_status_of_own_emails(self, auth_client):
+        client, user = auth_client
+        email = queue_email(user=user)
+        queue_email(user=User.objects.create_user(username='otro', password='otro123'))
+
+        response = client.get(reverse('emails-list'))
+        assert [e['id'] for e in response.data['results']] == [email.id]
+
+        deliver_pending()
+        response = client.get(reverse('emails-detail', kwargs={'pk': email.id}))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == OutboundEmail.SENT
+        assert response.data['sent_at'] is not None
+
+
+@pytest.mark.django_db
+def test_reuses_one_smtp_session(settings):
+    aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+    class Handler:
+        def __init__(self):
+            self.sessions = set()
+            self.messages = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            self.sessions.add(id(session))
+            self.messages += 1
+            return '250 OK'
+
+    handler = Handler()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=0)
+    controller.start()
+    try:
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST, settings.EMAIL_PORT = '127.0.0.1', controller.server.sockets[0].getsockname()[1]
+        settings.EMAIL_USE_TLS = False
+        settings.EMAIL_HOST_USER = settings.EMAIL_HOST_PASSWORD = ''
+        for n in range(3):
+            queue_email(f'coordinacion{n}@example.com')
+
+        assert deliver_pending()['sent'] == 3
+    finally:
+        controller.stop()
+
+    assert handler.messages == 3
+    assert len(handler.sessions) == 1
+
+
+@pytest.mark.django_db
+class TestSendEmailBatch:
+
+    REGISTERS = ['REGISTRO ( LUNES 13-05 ARQUITECTURA )', 'REGISTRO ( MARTES 14-05 ARQUITECTURA )']
+
+    def send(self, client, recipients, filenames=None, subjects=('RAMO DE PRUEBA',)):
+        files = [SimpleUploadedFile(f'{name}.xlsx', b'PK\x03\x04 excel') for name in self.REGISTERS]
+        return client.post(reverse('sendEmailBatch'), {
+            'file': files,
+            'filename': filenames if filenames is not None else self.REGISTERS,
+            'subject': list(subjects),
+            'email': recipients,
+        }, format='multipart')
+
+    def test_sends_every_register_to_every_recipient_over_one_connection(self, auth_client, recipient_resolver,
+                                                                         settings, monkeypatch):
+        settings.MAIL_QUEUE_EAGER = True
+        recipient_resolver.mailboxes.add('secretaria@example.com')
+        connections = []
+        monkeypatch.setattr('signature.mailer.get_connection',
+                            lambda: connections.append(EmailBackend()) or connections[-1])
+        client, _ = auth_client
+
+        response = self.send(client, ['coordinacion@example.com', 'secretaria@example.com'])
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['queued'] == 4
+        assert {r['status'] for r in response.data['results']} == {OutboundEmail.SENT}
+        assert len(mail.outbox) == 4
+        assert len(connections) == 1
+
+    def test_attachments_are_stored_once_per_file(self, auth_client, recipient_resolver, tmp_path):
+        recipient_resolver.mailboxes.add('secretaria@example.com')
+        client, _ = auth_client
+
+        response = self.send(client, ['coordinacion@example.com', 'secretaria@example.com'])
+
+        assert {r['status'] for r in response.data['results']} == {OutboundEmail.QUEUED}
+        assert len(list((tmp_path / 'outbox').iterdir())) == 2
+        assert deliver_pending()['sent'] == 4
+        assert list((tmp_path / 'outbox').iterdir()) == []
+        assert not OutboundEmail.objects.exclude(attachment='').exists()
+
+    def test_attachments_are_read_once_per_batch(self, auth_client, recipient_resolver, monkeypatch):
+        recipient_resolver.mailboxes.add('secretaria@example.com')
+        client, _ = auth_client
+        self.send(client, ['coordinacion@example.com', 'secretaria@example.com'])
+        opened = []
+        open_file = FieldFile.open
+        monkeypatch.setattr(FieldFile, 'open', lambda f, mode='rb': opened.append(f.name) or open_file(f, mode))
+
+        assert deliver_pending()['sent'] == 4
+        assert len(opened) == 2
+        assert {m.attachments[0][1] for m in mail.outbox} == {b'PK\x03\x04 excel'}
+
+    def test_reports_rejected_messages(self, auth_client):
+        client, _ = auth_client
+
+        response = self.send(client, ['coordinacion@example.com', 'nadie@example.com'],
+                             filenames=['REGISTRO ( LUNES 13-05 ARQUITECTURA )', 'sin parentesis'])
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        results = {(r['filename'], r['recipient']): r for r in response.data['results']}
+        assert results[('REGISTRO ( LUNES 13-05 ARQUITECTURA )', 'coordinacion@example.com')]['status'] == 'queued'
+        assert results[('REGISTRO ( LUNES 13-05 ARQUITECTURA )', 'nadie@example.com')]['error'] == \
+            'El email ingresado no existe'
+        assert results[('sin parentesis', 'coordinacion@example.com')]['error'] == 'Nombre de archivo inválido'
+        assert response.data['queued'] == 1
+        assert OutboundEmail.objects.count() == 1
+
+    def test_each_file_needs_its_filename(self, auth_client):
+        client, _ = auth_client
+
+        response = self.send(client, ['coordinacion@example.com'], filenames=self.REGISTERS[:1])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -12,14 +12,6 @@ User = get_user_model()
 def api_client():
     return APIClient()
 
-@pytest.fixture
-def auth_client():
-    user = User.objects.create_user(username='testuser', password='testpass123')
-    client = APIClient()
-    token, _ = Token.objects.get_or_create(user=user)
-    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
-    return client, user
-
 @pytest.fixture
 def admin_client():
     admin_user = User.objects.create_superuser(username='admin', password='admin123')
@@ -42,8 +34,8 @@ class TestMajorAPI:
         response = client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) >= 1
-        assert any(major['name'] == test_major.name for major in response.data)
+        assert len(response.data['results']) >= 1
+        assert any(major['name'] == test_major.name for major in response.data['results'])
     
     def test_get_major_detail(self, auth_client, test_major):
         """Probar que un usuario autorizado puede ver los detalles de una carrera"""
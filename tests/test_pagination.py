@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from signature.models import Student, Major
+
+
+@pytest.fixture
+def test_major():
+    major = Major.objects.create(name='Computer Science', faculty='Engineering')
+    Student.objects.bulk_create([
+        Student(rut=str(30_000_000 + i), dv='0', first_name='A', second_name='B',
+                last_name='C', second_last_name='D', major=major)
+        for i in range(25)
+    ])
+    return major
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_walks_every_student_once_in_id_order(self, auth_client, test_major):
+        client, _ = auth_client
+        url, params, ids = reverse('students-list'), {'page_size': 10}, []
+        while url:
+            response = client.get(url, params)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 10
+            ids += [student['id'] for student in response.data['results']]
+            url, params = response.data['next'], None
+
+        assert ids == list(Student.objects.order_by('id').values_list('id', flat=True))
+
+    def test_page_size_is_capped(self, auth_client, test_major, settings):
+        settings.API_MAX_PAGE_SIZE = 5
+        client, _ = auth_client
+        response = client.get(reverse('students-list'), {'page_size': 1000})
+
+        assert len(response.data['results']) == 5
+        assert response.data['next'] is not None
+
+    def test_deep_pages_do_not_use_offset(self, auth_client, test_major):
+        client, _ = auth_client
+        response = client.get(reverse('students-list'), {'page_size': 20})
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(response.data['next'])
+
+        assert response.status_code == status.HTTP_200_OK
+        student_query = next(q['sql'] for q in queries if 'signature_student' in q['sql'])
+        assert 'OFFSET' not in student_query
+
+    def test_students_by_major_is_paginated(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('students-get-student-bymajor')
+        response = client.post(url + '?page_size=20', {'major_id': test_major.id}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 20
+
+        response = client.post(response.data['next'], {'major_id': test_major.id}, format='json')
+        assert len(response.data['results']) == 5
+        assert response.data['next'] is None
@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from signature.models import Student, Major, Subject
+
+User = get_user_model()
+
+
+def add_catalog(majors, subjects_per_major, students_per_subject):
+    """Crea carreras con asignaturas y estudiantes inscritos en ellas."""
+    rut = Student.objects.count() + 30_000_000
+    for m in range(majors):
+        major = Major.objects.create(name=f'MAJOR {rut}-{m}', faculty='TEST')
+        for s in range(subjects_per_major):
+            subject = Subject.objects.create(name=f'SUBJECT {rut}-{m}-{s}')
+            subject.major.add(major)
+            students = []
+            for _ in range(students_per_subject):
+                rut += 1
+                students.append(Student.objects.create(
+                    rut=str(rut), dv='0', first_name='A', second_name='B',
+                    last_name='C', second_last_name='D', major=major))
+            subject.students.add(*students)
+
+
+def count_queries(client, url, method='get', data=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, data, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    return len(queries)
+
+
+@pytest.mark.django_db
+class TestQueryCounts:
+
+    @pytest.mark.parametrize('url_name', ['majors-list', 'subjects-list', 'students-list', 'users-list'])
+    def test_list_query_count_is_constant(self, cached_auth_client, url_name):
+        client, user = cached_auth_client
+        url = reverse(url_name)
+
+        add_catalog(majors=1, subjects_per_major=1, students_per_subject=1)
+        user.majors.add(Major.objects.last())
+        small = count_queries(client, url)
+
+        add_catalog(majors=3, subjects_per_major=3, students_per_subject=4)
+        User.objects.create_user(username='otro', password='otro123').majors.add(*Major.objects.all())
+        large = count_queries(client, url)
+
+        assert small == large
+
+    def test_major_detail_query_count_is_constant(self, cached_auth_client):
+        client, _ = cached_auth_client
+        add_catalog(majors=1, subjects_per_major=1, students_per_subject=1)
+        small = count_queries(client, reverse('majors-detail', kwargs={'pk': Major.objects.last().id}))
+
+        add_catalog(majors=1, subjects_per_major=4, students_per_subject=5)
+        large = count_queries(client, reverse('majors-detail', kwargs={'pk': Major.objects.last().id}))
+
+        assert small == large
+
+    def test_students_by_major_query_count_is_constant(self, cached_auth_client):
+        client, _ = cached_auth_client
+        url = reverse('students-get-student-bymajor')
+
+        add_catalog(majors=1, subjects_per_major=1, students_per_subject=1)
+        small = count_queries(client, url, 'post', {'major_id': Major.objects.last().id})
+
+        add_catalog(majors=1, subjects_per_major=3, students_per_subject=5)
+        large = count_queries(client, url, 'post', {'major_id': Major.objects.last().id})
+
+        assert small == large
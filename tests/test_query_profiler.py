@@ -0,0 +1,67 @@
+import logging
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+from signature.middleware.query_profiler import (
+    QueryBudgetExceeded, QueryProfilerMiddleware, fingerprint, query_budget)
+from signature.models import Major, Student
+from signature.views import MajorViewSet
+
+
+def n_plus_one_view(request):
+    for major in Major.objects.all()[:12]:
+        Student.objects.filter(major_id=major.id).count()
+    return HttpResponse()
+
+
+def run(view, budget=None):
+    request = RequestFactory().get('/n-plus-one/')
+    middleware = QueryProfilerMiddleware(view)
+    middleware.process_view(request, query_budget(budget)(view) if budget else view, (), {})
+    return middleware(request)
+
+
+@pytest.mark.django_db
+class TestQueryProfiler:
+
+    def test_server_timing_header(self, auth_client):
+        client, _ = auth_client
+        response = client.get(reverse('students-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Server-Timing'].startswith('db;dur=')
+        assert 'desc="3 queries"' in response['Server-Timing']
+
+    def test_logs_duplicate_queries(self, caplog):
+        with caplog.at_level(logging.INFO, logger='api.queries'):
+            run(n_plus_one_view)
+
+        record = caplog.records[-1]
+        assert record.levelno == logging.WARNING
+        assert record.db_queries == 13
+        assert len(record.slow_queries) == 3
+        assert list(record.duplicate_queries.values()) == [12]
+
+    def test_budget_raises_in_tests(self):
+        with pytest.raises(QueryBudgetExceeded):
+            run(n_plus_one_view, budget=5)
+
+    def test_budget_warns_in_production(self, settings, caplog):
+        settings.QUERY_BUDGET_ACTION = 'warn'
+        with caplog.at_level(logging.INFO, logger='api.queries'):
+            response = run(n_plus_one_view, budget=5)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'over budget of 5' in caplog.records[-1].getMessage()
+
+    def test_viewset_budget_per_action(self):
+        view = MajorViewSet.as_view({'get': 'list'})
+        request = RequestFactory().get('/api/majors/')
+
+        assert QueryProfilerMiddleware(None).get_budget(request, view) == 7
+
+    def test_fingerprint_ignores_parameters(self):
+        assert fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s) LIMIT 21') == \
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s) LIMIT 5')
@@ -0,0 +1,102 @@
+import time
+import pytest
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from signature.models import OutboundEmail
+from signature.recipients import check_recipient
+
+User = get_user_model()
+
+
+@pytest.fixture
+def auth_client():
+    user = User.objects.create_user(username='testuser', password='testpass123')
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client, user
+
+
+class TestCheckRecipient:
+
+    def test_valid_address_is_cached(self, recipient_resolver):
+        assert check_recipient('coordinacion@example.com') is True
+        assert recipient_resolver.calls == [('mx', 'example.com'), ('probe', 'coordinacion@example.com')]
+
+        assert check_recipient('Coordinacion@example.com') is True
+        assert len(recipient_resolver.calls) == 2
+
+    def test_unknown_mailbox_is_cached_as_invalid(self, recipient_resolver):
+        assert check_recipient('nadie@example.com') is False
+        assert check_recipient('nadie@example.com') is False
+
+        assert recipient_resolver.calls == [('mx', 'example.com'), ('probe', 'nadie@example.com')]
+
+    def test_mx_records_are_shared_by_the_domain(self, recipient_resolver):
+        recipient_resolver.mailboxes.add('secretaria@example.com')
+        check_recipient('coordinacion@example.com')
+        check_recipient('secretaria@example.com')
+
+        assert [c for c in recipient_resolver.calls if c[0] == 'mx'] == [('mx', 'example.com')]
+
+    def test_missing_domain_is_cached_as_invalid(self, recipient_resolver):
+        assert check_recipient('uno@no-existe.cl') is False
+        assert check_recipient('dos@no-existe.cl') is False
+
+        assert recipient_resolver.calls == [('mx', 'no-existe.cl')]
+
+    def test_bad_format_never_touches_the_network(self, recipient_resolver):
+        assert check_recipient('coordinacion@@example.com') is False
+        assert recipient_resolver.calls == []
+
+    def test_deadline_returns_unknown_and_caches_late_answer(self, recipient_resolver, settings):
+        settings.RECIPIENT_VALIDATION_DEADLINE = 0.1
+        recipient_resolver.delay = 0.3
+
+        start = time.monotonic()
+        assert check_recipient('coordinacion@example.com') is None
+        assert time.monotonic() - start < 0.25
+
+        time.sleep(0.4)
+        assert check_recipient('coordinacion@example.com') is True
+        assert len(recipient_resolver.calls) == 2
+
+
+@pytest.mark.django_db
+class TestSendEmailValidation:
+
+    @pytest.fixture(autouse=True)
+    def eager_mail(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.MAIL_QUEUE_EAGER = True
+
+    def send(self, client, recipient):
+        upload = SimpleUploadedFile('registro.xlsx', b'PK\x03\x04 excel')
+        return client.post(reverse('sendEmail'), {
+            'filename': 'REGISTROS DE ASISTENCIA - SAAC ( MARTES 14-05 ARQUITECTURA )',
+            'email': recipient,
+            'subject': 'RAMO DE PRUEBA',
+            'file': upload,
+        }, format='multipart')
+
+    def test_repeat_sends_skip_validation(self, auth_client, recipient_resolver):
+        client, _ = auth_client
+        for _ in range(3):
+            response = self.send(client, 'coordinacion@example.com')
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            assert response.data['status'] == OutboundEmail.SENT
+
+        assert len(mail.outbox) == 3
+        assert len(recipient_resolver.calls) == 2
+
+    def test_unknown_recipient_is_rejected(self, auth_client):
+        client, _ = auth_client
+        response = self.send(client, 'nadie@example.com')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not OutboundEmail.objects.exists()
@@ -0,0 +1,123 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from signature.importers import import_students
+from signature.models import Major, MajorCode, Student, Subject
+
+
+@pytest.fixture
+def catalog():
+    major = Major.objects.create(name='CARRERA CACHE', faculty='TEST')
+    subject = Subject.objects.create(name='RAMO CACHE')
+    subject.major.add(major)
+    student = Student.objects.create(rut='22222222', dv='2', first_name='ANA', second_name='',
+                                     last_name='SOTO', second_last_name='', major=major)
+    subject.students.add(student)
+    return major, subject, student
+
+
+def get(client, url, **headers):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, **headers)
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    @pytest.mark.parametrize('url_name', ['majors-list', 'majors-getMajors', 'subjects-list'])
+    def test_repeat_reads_skip_the_database(self, cached_auth_client, catalog, url_name):
+        client, _ = cached_auth_client
+        first, first_queries = get(client, reverse(url_name))
+        second, second_queries = get(client, reverse(url_name))
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first_queries > 0
+        assert second_queries == 0
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+
+    def test_if_none_match_returns_304(self, cached_auth_client, catalog):
+        client, _ = cached_auth_client
+        etag = client.get(reverse('majors-list'))['ETag']
+
+        response, queries = get(client, reverse('majors-list'), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert response.content == b''
+        assert queries == 0
+
+    def test_query_string_is_part_of_the_key(self, cached_auth_client, catalog):
+        client, _ = cached_auth_client
+        full = client.get(reverse('majors-list'))
+        slim = client.get(reverse('majors-list'), {'fields': 'id,name'})
+
+        assert 'subjects' in full.data['results'][0]
+        assert set(slim.json()['results'][0]) == {'id', 'name'}
+        assert full['ETag'] != slim['ETag']
+
+    def test_unauthenticated_requests_are_not_served_from_cache(self, cached_auth_client, catalog):
+        client, _ = cached_auth_client
+        client.get(reverse('majors-list'))
+
+        response = APIClient().get(reverse('majors-list'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.parametrize('change, changes_payload', [
+        (lambda major, subject, student: Major.objects.create(name='OTRA', faculty='TEST'), True),
+        (lambda major, subject, student: student.delete(), True),
+        (lambda major, subject, student: subject.students.remove(student), True),
+        (lambda major, subject, student: subject.major.clear(), True),
+        (lambda major, subject, student: MajorCode.objects.create(code='X1', major=major), False),
+    ])
+    def test_writes_invalidate(self, cached_auth_client, catalog, change, changes_payload):
+        client, _ = cached_auth_client
+        etag = client.get(reverse('majors-list'))['ETag']
+
+        change(*catalog)
+        response, queries = get(client, reverse('majors-list'), HTTP_IF_NONE_MATCH=etag)
+
+        assert queries > 0
+        if changes_payload:
+            assert response.status_code == status.HTTP_200_OK
+            assert response['ETag'] != etag
+        else:
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_unchanged_content_keeps_its_etag(self, cached_auth_client, catalog):
+        client, _ = cached_auth_client
+        _, _, student = catalog
+        etag = client.get(reverse('majors-list'))['ETag']
+
+        student.save()
+        response, queries = get(client, reverse('majors-list'), HTTP_IF_NONE_MATCH=etag)
+
+        assert queries > 0
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_bulk_import_invalidates(self, cached_auth_client, catalog):
+        client, _ = cached_auth_client
+        major, _, _ = catalog
+        before = client.get(reverse('majors-getMajors'))
+        client.get(reverse('subjects-list'))
+
+        rows = [(2, {'Rut': '18765432', 'Nombre': 'JUAN', 'Segundo_Nombre': 'PABLO',
+                     'Apellido': 'PEREZ', 'Segundo_Apellido': 'ROJAS'})]
+        assert import_students(rows, major.id).ok
+
+        _, queries = get(client, reverse('majors-getMajors'))
+        assert queries > 0
+        assert client.get(reverse('majors-getMajors')).content == before.content
+
+    def test_can_be_disabled(self, cached_auth_client, catalog, settings):
+        settings.RESPONSE_CACHE = ''
+        client, _ = cached_auth_client
+        client.get(reverse('majors-list'))
+
+        response, queries = get(client, reverse('majors-list'))
+        assert queries > 0
+        assert 'ETag' not in response
@@ -0,0 +1,114 @@
+import random
+import pytest
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from signature.models import Major, Student
+from signature.rut import check_digit, check_digits, is_valid_rut, is_well_formed, valid_ruts
+
+
+def reference_dv(rut):
+    """El cálculo carácter por carácter que tenían los serializers."""
+    total = 0
+    multiplier = 2
+    for digit in reversed(rut):
+        total += int(digit) * multiplier
+        multiplier = multiplier + 1 if multiplier < 7 else 2
+    dv = 11 - total % 11
+    return {11: '0', 10: 'K'}.get(dv, str(dv))
+
+
+def sample_ruts(count=5_000, seed=20240611):
+    rng = random.Random(seed)
+    ruts = [str(rng.randrange(1, 10 ** rng.randint(1, 9))) for _ in range(count)]
+    # Todos los de 1 a 4 dígitos y los bordes del rango
+    return ruts + [str(n) for n in range(10_000)] + ['0', '000000000', '999999999', '100000000']
+
+
+MALFORMED = ['', '12A45678', '1234567890', '12.345.678', ' 2222222', '-1', '１２３', '²']
+
+
+class TestCheckDigit:
+
+    @pytest.mark.parametrize('rut, dv', [
+        ('22222222', '2'), ('18765432', '7'), ('15555555', '6'), ('12345678', '5'), ('10000013', 'K'),
+    ])
+    def test_known_ruts(self, rut, dv):
+        assert check_digit(rut) == dv
+        assert check_digits([rut]).tolist() == [dv]
+        assert is_valid_rut(rut, dv)
+
+    def test_scalar_and_vectorized_agree_with_reference(self):
+        ruts = sample_ruts()
+        expected = [reference_dv(rut) for rut in ruts]
+
+        assert [check_digit(rut) for rut in ruts] == expected
+        assert check_digits(ruts).tolist() == expected
+
+    def test_mixed_lengths_in_one_batch(self):
+        ruts = ['1', '22222222', '999999999', '0012', '12']
+        assert check_digits(ruts).tolist() == [reference_dv(rut) for rut in ruts]
+
+    @pytest.mark.parametrize('rut', MALFORMED)
+    def test_malformed(self, rut):
+        with pytest.raises(ValueError):
+            check_digit(rut)
+        assert not is_valid_rut(rut, '0')
+        assert check_digits([rut, '22222222']).tolist() == ['', '2']
+
+    def test_empty_batch(self):
+        assert check_digits([]).tolist() == []
+        assert valid_ruts([], []).tolist() == []
+
+
+class TestValidRuts:
+
+    def test_agrees_with_scalar_validator(self):
+        rng = random.Random(7)
+        ruts = sample_ruts(2_000) + MALFORMED
+        # La mitad con el DV correcto, la otra mitad con uno al azar
+        dvs = [reference_dv(rut) if is_well_formed(rut) and rng.random() < 0.5
+               else rng.choice('0123456789Kk') for rut in ruts]
+
+        assert valid_ruts(ruts, dvs).tolist() == [is_valid_rut(rut, dv) for rut, dv in zip(ruts, dvs)]
+
+    def test_lowercase_k(self):
+        assert is_valid_rut('10000013', 'k')
+        assert valid_ruts(['10000013', '10000027'], ['k', 'K']).tolist() == [True, True]
+        assert valid_ruts(['22222222'], ['k']).tolist() == [False]
+
+
+@pytest.mark.django_db
+class TestImportedRuts:
+
+    def test_dv_column_is_checked_for_the_whole_file(self, auth_client):
+        client, _ = auth_client
+        major = Major.objects.create(name='Computer Science', faculty='Engineering')
+        data = SimpleUploadedFile('archivo.csv', (
+            "Rut,DV,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "10000013,k,flavio,alexander,jara,labrin\n"
+            "22222222,3,juan,pablo,perez,soto\n"
+            "12A45678,5,ana,maria,soto,rojas\n"
+        ).encode('utf-8'), content_type='text/csv')
+
+        response = client.post(reverse('uploadStudentCSV'), {'file': data, 'major_id': major.id},
+                               format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [(error['row'], error['error']) for error in response.data['errors']] == [
+            (3, "El RUT no es válido"), (4, "El RUT solo debe contener números")]
+        assert not Student.objects.filter(major=major).exists()
+
+    def test_lowercase_k_is_stored_uppercase(self, auth_client):
+        client, _ = auth_client
+        major = Major.objects.create(name='Computer Science', faculty='Engineering')
+        data = SimpleUploadedFile('archivo.csv', (
+            "Rut,DV,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"
+            "10000013,k,flavio,alexander,jara,labrin\n"
+        ).encode('utf-8'), content_type='text/csv')
+
+        response = client.post(reverse('uploadStudentCSV'), {'file': data, 'major_id': major.id},
+                               format='multipart')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Student.objects.get(rut='10000013').dv == 'K'
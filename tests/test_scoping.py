@@ -0,0 +1,412 @@
+from io import BytesIO
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from openpyxl import load_workbook
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from signature.jobs import run_job
+from signature.models import AttendanceRecord, AttendanceSession, ImportJob, Major, Student, Subject
+
+User = get_user_model()
+
+
+def client_for(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client
+
+
+@pytest.fixture
+def campus():
+    """Dos carreras con un ramo propio cada una y un ramo compartido."""
+    own = Major.objects.create(name='INFORMATICA', faculty='INGENIERIA')
+    other = Major.objects.create(name='ARQUITECTURA', faculty='ARTE')
+    own_student = Student.objects.create(rut='22222222', dv='2', first_name='ANA', second_name='',
+                                         last_name='SOTO', second_last_name='', major=own)
+    other_student = Student.objects.create(rut='18765432', dv='7', first_name='JUAN', second_name='',
+                                           last_name='PEREZ', second_last_name='', major=other)
+    own_subject = Subject.objects.create(name='PROGRAMACION')
+    own_subject.major.add(own)
+    other_subject = Subject.objects.create(name='DIBUJO')
+    other_subject.major.add(other)
+    shared = Subject.objects.create(name='MATEMATICAS')
+    shared.major.add(own, other)
+    shared.students.add(own_student, other_student)
+    return {'own': own, 'other': other, 'own_student': own_student, 'other_student': other_student,
+            'own_subject': own_subject, 'other_subject': other_subject, 'shared': shared}
+
+
+@pytest.fixture
+def coordinator(campus):
+    user = User.objects.create_user(username='coordinador', password='clave123')
+    user.majors.add(campus['own'])
+    return client_for(user), user
+
+
+def ids(response):
+    return [item['id'] for item in response.data['results']]
+
+
+def read_register(response):
+    sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+    return [[cell.value for cell in row] for row in sheet.iter_rows()]
+
+
+@pytest.mark.django_db
+class TestMajorScoping:
+
+    def test_lists_only_show_the_users_majors(self, coordinator, campus):
+        client, _ = coordinator
+
+        assert ids(client.get(reverse('majors-list'))) == [campus['own'].id]
+        assert [m['id'] for m in client.get(reverse('majors-getMajors')).data] == [campus['own'].id]
+        assert ids(client.get(reverse('students-list'))) == [campus['own_student'].id]
+        # El ramo compartido aparece una sola vez
+        assert ids(client.get(reverse('subjects-list'))) == [campus['own_subject'].id, campus['shared'].id]
+
+    def test_superuser_sees_everything(self, campus):
+        client = client_for(User.objects.create_user(username='jefe', password='clave123', is_superuser=True))
+
+        params = {'page_size': 500}
+        assert {campus['own'].id, campus['other'].id} <= set(ids(client.get(reverse('majors-list'), params)))
+        assert {campus['own_student'].id, campus['other_student'].id} <= set(
+            ids(client.get(reverse('students-list'), params)))
+        assert {campus['own_subject'].id, campus['other_subject'].id, campus['shared'].id} <= set(
+            ids(client.get(reverse('subjects-list'), params)))
+
+    def test_user_without_majors_sees_nothing(self, campus):
+        client = client_for(User.objects.create_user(username='nuevo', password='clave123'))
+        assert ids(client.get(reverse('students-list'))) == []
+
+    @pytest.mark.parametrize('url_name, key', [
+        ('majors-detail', 'other'),
+        ('students-detail', 'other_student'),
+        ('subjects-detail', 'other_subject'),
+    ])
+    def test_detail_outside_scope_is_not_found(self, coordinator, campus, url_name, key):
+        client, _ = coordinator
+        response = client.get(reverse(url_name, kwargs={'pk': campus[key].id}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_students_by_major_outside_scope_is_empty(self, coordinator, campus):
+        client, _ = coordinator
+        response = client.post(reverse('students-get-student-bymajor'), {'major_id': campus['other'].id}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert ids(response) == []
+
+    def test_custom_actions_cannot_touch_other_majors(self, coordinator, campus):
+        client, _ = coordinator
+        other_student = campus['other_student']
+
+        response = client.delete(reverse('students-delete-student'), {'student_id': other_student.id}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        response = client.post(reverse('students-create-student'), {
+            'first_name': 'PEDRO', 'last_name': 'ROJAS', 'rut': '15555555', 'dv': '6',
+            'major_id': campus['other'].id}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.put(reverse('students-update-student'), {
+            'id': campus['own_student'].id, 'first_name': 'ANA', 'last_name': 'SOTO', 'rut': '22222222',
+            'dv': '2', 'major_id': campus['other'].id}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(reverse('students-add-subject'), {
+            'student_id': campus['own_student'].id, 'subject_id': campus['other_subject'].id}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        assert Student.objects.filter(id=other_student.id, major=campus['other']).exists()
+        assert not Student.objects.filter(rut='15555555').exists()
+        assert Student.objects.get(id=campus['own_student'].id).major == campus['own']
+
+    def test_standard_routes_cannot_assign_other_majors(self, coordinator, campus):
+        client, _ = coordinator
+        own_student = campus['own_student']
+        student_url = reverse('students-detail', kwargs={'pk': own_student.id})
+
+        response = client.patch(student_url, {'major': campus['other'].id}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.patch(student_url, {'subjects': [campus['other_subject'].id]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        new_student = {'first_name': 'PEDRO', 'second_name': 'LUIS', 'last_name': 'ROJAS', 'second_last_name': 'DIAZ',
+                       'rut': '15555555', 'dv': '6', 'major': campus['other'].id, 'subjects': []}
+        response = client.post(reverse('students-list'), new_student, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(response.data) == ['major']
+
+        response = client.patch(reverse('subjects-detail', kwargs={'pk': campus['own_subject'].id}),
+                                {'major': [campus['own'].id, campus['other'].id]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        assert Student.objects.get(id=own_student.id).major == campus['own']
+        assert list(own_student.subjects.all()) == [campus['shared']]
+        assert not Student.objects.filter(rut='15555555').exists()
+        assert list(campus['own_subject'].major.all()) == [campus['own']]
+
+        # Dentro de sus carreras las mismas rutas funcionan
+        response = client.patch(student_url, {'subjects': [campus['own_subject'].id, campus['shared'].id]},
+                                format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert set(own_student.subjects.all()) == {campus['own_subject'], campus['shared']}
+        response = client.post(reverse('students-list'), {**new_student, 'major': campus['own'].id}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_register_only_lists_own_students(self, coordinator, campus):
+        client, _ = coordinator
+
+        response = client.get(reverse('subjects-register', kwargs={'pk': campus['shared'].id}))
+
+        assert 'INFORMATICA' in response['Content-Disposition']
+        _, *rows = read_register(response)
+        assert [row[1] for row in rows] == ['22222222']
+
+    def test_roster_only_lists_own_students(self, coordinator, campus):
+        client, _ = coordinator
+
+        response = client.get(reverse('subjects-roster', kwargs={'pk': campus['shared'].id}))
+
+        assert b''.join(response.streaming_content).count(b'\n') == 1
+        assert client.get(reverse('subjects-roster', kwargs={'pk': campus['other_subject'].id})).status_code == \
+            status.HTTP_404_NOT_FOUND
+
+    def test_nested_students_only_show_own_major(self, coordinator, campus):
+        client, _ = coordinator
+        own_student = campus['own_student'].id
+
+        subject = client.get(reverse('subjects-detail', kwargs={'pk': campus['shared'].id})).data
+        assert [s['id'] for s in subject['students']] == [own_student]
+        listed = {s['id']: s for s in client.get(reverse('subjects-list')).data['results']}
+        assert [s['id'] for s in listed[campus['shared'].id]['students']] == [own_student]
+
+        major = client.get(reverse('majors-detail', kwargs={'pk': campus['own'].id})).data
+        shared = next(s for s in major['subjects'] if s['id'] == campus['shared'].id)
+        assert [s['id'] for s in shared['students']] == [own_student]
+        listed = client.get(reverse('majors-list')).data['results'][0]
+        shared = next(s for s in listed['subjects'] if s['id'] == campus['shared'].id)
+        assert [s['id'] for s in shared['students']] == [own_student]
+
+    def test_nested_students_are_scoped_without_prefetch(self, coordinator, campus):
+        client, _ = coordinator
+
+        # La respuesta de un PATCH se serializa sin el caché de prefetch
+        response = client.patch(reverse('majors-detail', kwargs={'pk': campus['own'].id}),
+                                {'name': 'INFORMATICA'}, format='json')
+
+        shared = next(s for s in response.data['subjects'] if s['id'] == campus['shared'].id)
+        assert [s['id'] for s in shared['students']] == [campus['own_student'].id]
+
+    def test_major_ids_are_cached_per_token(self, coordinator, campus, settings):
+        settings.RESPONSE_CACHE = ''
+        client, user = coordinator
+
+        def majors_queries():
+            with CaptureQueriesContext(connection) as queries:
+                client.get(reverse('students-list'))
+            return [q for q in queries if 'signature_permissionuser_majors' in q['sql']]
+
+        assert len(majors_queries()) == 1
+        assert majors_queries() == []
+
+        user.majors.add(campus['other'])
+        assert len(majors_queries()) == 1
+        assert len(ids(client.get(reverse('students-list')))) == 2
+
+    def test_reverse_relation_changes_invalidate(self, coordinator, campus):
+        client, _ = coordinator
+        client.get(reverse('majors-list'))
+
+        campus['own'].users.clear()
+        assert ids(client.get(reverse('majors-list'))) == []
+
+    def test_response_cache_is_per_scope(self, coordinator, campus):
+        client, _ = coordinator
+        other = User.objects.create_user(username='otro', password='clave123')
+        other.majors.add(campus['other'])
+
+        assert ids(client.get(reverse('majors-list'))) == [campus['own'].id]
+        assert ids(client_for(other).get(reverse('majors-list'))) == [campus['other'].id]
+
+
+@pytest.mark.django_db
+class TestUserScoping:
+
+    def test_coordinator_only_sees_itself(self, coordinator, campus):
+        client, user = coordinator
+        other = User.objects.create_user(username='otro', password='clave123')
+        other.majors.add(campus['other'])
+
+        assert ids(client.get(reverse('users-list'))) == [user.id]
+        assert client.get(reverse('users-detail', kwargs={'pk': other.id})).status_code == \
+            status.HTTP_404_NOT_FOUND
+        response = client.patch(reverse('users-detail', kwargs={'pk': other.id}),
+                                {'major_ids': [campus['own'].id]}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert list(other.majors.all()) == [campus['other']]
+
+    def test_coordinator_cannot_grant_itself_majors_or_superuser(self, coordinator, campus):
+        client, user = coordinator
+        url = reverse('users-detail', kwargs={'pk': user.id})
+
+        response = client.patch(url, {'major_ids': [campus['own'].id, campus['other'].id]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        client.patch(url, {'major_ids': [campus['own'].id], 'is_superuser': True}, format='json')
+
+        user.refresh_from_db()
+        assert not user.is_superuser
+        assert list(user.majors.all()) == [campus['own']]
+        assert ids(client.get(reverse('students-list'))) == [campus['own_student'].id]
+
+        # Su propia contraseña sí la puede cambiar
+        response = client.patch(url, {'password': 'nueva123', 'major_ids': [campus['own'].id]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.check_password('nueva123')
+
+    def test_only_superusers_create_or_delete_users(self, coordinator, campus):
+        client, user = coordinator
+
+        response = client.post(reverse('users-list'), {
+            'username': 'nuevo', 'password': 'clave123', 'major_ids': [campus['own'].id]}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert client.delete(reverse('users-detail', kwargs={'pk': user.id})).status_code == \
+            status.HTTP_403_FORBIDDEN
+        assert set(User.objects.values_list('username', flat=True)) == {'coordinador'}
+
+        admin = client_for(User.objects.create_superuser(username='jefe', password='clave123'))
+        response = admin.post(reverse('users-list'), {
+            'username': 'nuevo', 'password': 'clave123', 'major_ids': [campus['other'].id],
+            'is_superuser': True}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        response = admin.patch(reverse('users-detail', kwargs={'pk': user.id}),
+                               {'major_ids': [campus['other'].id], 'is_superuser': True}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.is_superuser
+
+
+def csv_file(text):
+    return SimpleUploadedFile('archivo.csv', text.encode('utf-8'), content_type='text/csv')
+
+
+def mark(client, subject, students, status='P'):
+    return client.post(reverse('attendance-sessions-mark'), {
+        'subject_id': subject.id, 'date': '2025-05-14',
+        'records': [{'student_id': s.id, 'status': status} for s in students]}, format='json')
+
+
+@pytest.mark.django_db
+class TestScopedUploadsAndAttendance:
+
+    def test_uploads_only_target_own_majors(self, coordinator, campus):
+        client, _ = coordinator
+
+        response = client.post(reverse('uploadStudentCSV'), {
+            'file': csv_file("Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n15555555,pedro,luis,rojas,diaz\n"),
+            'major_id': campus['other'].id}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Student.objects.filter(rut='15555555').exists()
+
+        response = client.post(reverse('uploadStudentSubjectCSV'), {
+            'file': csv_file("Rut\n18765432\n"), 'major_id': campus['other'].id,
+            'subject_id': campus['other_subject'].id}, format='multipart')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        response = client.post(reverse('uploadStudentSubjectCSV'), {
+            'file': csv_file("Rut\n18765432\n"), 'major_id': campus['other'].id,
+            'subject_id': campus['shared'].id}, format='multipart')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not campus['other_subject'].students.exists()
+
+    def test_import_jobs_only_target_own_majors(self, coordinator, campus, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        client, _ = coordinator
+
+        response = client.post(reverse('import-jobs-list'), {
+            'kind': 'students', 'file': csv_file("Rut,Nombre,Segundo_Nombre,Apellido,Segundo_Apellido\n"),
+            'major_id': campus['other'].id}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'major_id' in response.data
+
+        response = client.post(reverse('import-jobs-list'), {
+            'kind': 'enrollments', 'file': csv_file("Rut\n"), 'major_id': campus['own'].id,
+            'subject_id': campus['other_subject'].id}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'subject_id' in response.data
+        assert not ImportJob.objects.exists()
+
+    def test_user_uploads_only_assign_own_majors(self, coordinator, campus):
+        client, _ = coordinator
+        users = ("Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n"
+                 "nuevo,clave123,INFORMATICA,X\n"
+                 "ajeno,clave123,ARQUITECTURA,X\n")
+
+        response = client.post(reverse('uploadUserCSV'), {'file': csv_file(users)}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [e['username'] for e in response.data['errors']] == ['ajeno']
+        assert not User.objects.filter(username__in=['nuevo', 'ajeno']).exists()
+
+    def test_import_jobs_check_majors_when_they_run(self, coordinator, campus, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.IMPORT_JOBS_EAGER = True
+        client, user = coordinator
+
+        response = client.post(reverse('import-jobs-list'), {
+            'kind': 'users', 'file': csv_file("Usuario,Contraseña,Nombre_Carrera,Codigo_Carrera\n"
+                                              "ajeno,clave123,ARQUITECTURA,X\n")}, format='multipart')
+        assert response.data['status'] == ImportJob.FAILED
+        assert not User.objects.filter(username='ajeno').exists()
+
+        # Le quitaron la carrera mientras el trabajo esperaba en la cola
+        job = ImportJob.objects.create(kind='students', created_by=user, params={'major_id': campus['own'].id},
+                                       file=SimpleUploadedFile('alumnos.csv', b'Rut,Nombre,Segundo_Nombre,'
+                                                               b'Apellido,Segundo_Apellido\n15555555,pedro,luis,'
+                                                               b'rojas,diaz\n'))
+        user.majors.clear()
+        run_job(job.id)
+        job.refresh_from_db()
+        assert job.status == ImportJob.FAILED
+        assert not Student.objects.filter(rut='15555555').exists()
+
+    def test_attendance_only_for_own_subjects_and_students(self, coordinator, campus):
+        client, _ = coordinator
+        campus['other_subject'].students.add(campus['other_student'])
+
+        response = mark(client, campus['other_subject'], [campus['other_student']])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        # En la materia compartida no puede marcar a los estudiantes de otra carrera
+        response = mark(client, campus['shared'], [campus['own_student'], campus['other_student']])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not AttendanceSession.objects.exists()
+
+    def test_attendance_reads_only_show_own_students(self, coordinator, campus):
+        client, _ = coordinator
+        superuser = client_for(User.objects.create_user(username='jefe', password='clave123', is_superuser=True))
+        mark(superuser, campus['shared'], [campus['own_student'], campus['other_student']])
+        campus['other_subject'].students.add(campus['other_student'])
+        mark(superuser, campus['other_subject'], [campus['other_student']])
+        shared_session = AttendanceSession.objects.get(subject=campus['shared'])
+
+        assert ids(client.get(reverse('attendance-sessions-list'))) == [shared_session.id]
+        session = client.get(reverse('attendance-sessions-detail', kwargs={'pk': shared_session.id})).data
+        assert [r['student'] for r in session['records']] == [campus['own_student'].id]
+
+        summaries = client.get(reverse('attendance-summary-list'), {'major_id': campus['other'].id}).data
+        assert summaries['results'] == []
+        by_major = client.get(reverse('attendance-summary-by-major')).data
+        assert [row['student__major'] for row in by_major] == [campus['own'].id]
+
+        # Desmarcar a un estudiante de otra carrera no borra su marca
+        response = client.delete(reverse('attendance-sessions-unmark'), {
+            'subject_id': campus['shared'].id, 'date': '2025-05-14',
+            'student_ids': [campus['other_student'].id]}, format='json')
+        assert response.data['unmarked'] == 0
+        assert AttendanceRecord.objects.filter(session=shared_session).count() == 2
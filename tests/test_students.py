@@ -12,14 +12,6 @@ User = get_user_model()
 def api_client():
     return APIClient()
 
-@pytest.fixture
-def auth_client():
-    user = User.objects.create_user(username='testuser', password='testpass123')
-    client = APIClient()
-    token, _ = Token.objects.get_or_create(user=user)
-    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
-    return client, user
-
 @pytest.fixture
 def admin_client():
     admin_user = User.objects.create_superuser(username='admin', password='admin123')
@@ -53,8 +45,8 @@ class TestStudentAPI:
         response = client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) >= 1
-        assert response.data[-1]['first_name'] == test_student.first_name
+        assert len(response.data['results']) >= 1
+        assert response.data['results'][-1]['first_name'] == test_student.first_name
     
     def test_filter_students_by_major(self, auth_client, test_major, test_student):
         client, _ = auth_client
@@ -74,8 +66,8 @@ class TestStudentAPI:
         response = client.post(url, {'major_id': test_major.id}, format='json')
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['first_name'] == test_student.first_name
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['first_name'] == test_student.first_name
     
     def test_create_student_success(self, auth_client, test_major):
         client, _ = auth_client
@@ -233,4 +225,43 @@ class TestStudentAPI:
     def test_unauthorized_access(self, api_client):
         url = reverse('students-list')
         response = api_client.get(url)
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_create_existing_valid_student(self, auth_client, test_major):
+        client, _ = auth_client
+        url = reverse('students-create-student')
+        data = {
+            'rut': '22222222',
+            'dv': '2',
+            'first_name': 'Flavio',
+            'second_name': 'Alexander',
+            'last_name': 'Jara',
+            'second_last_name': 'Labrin',
+            'major_id': test_major.id
+        }
+        assert client.post(url, data, format='json').status_code == status.HTTP_201_CREATED
+
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['rut'] == ['El estudiante ya existe']
+        assert Student.objects.filter(rut='22222222').count() == 1
+
+    def test_update_student_to_existing_rut(self, auth_client, test_major, test_student):
+        client, _ = auth_client
+        Student.objects.create(rut='22222222', dv='2', first_name='FLAVIO', second_name='',
+                               last_name='JARA', second_last_name='', major=test_major)
+        url = reverse('students-update-student')
+        data = {
+            'id': test_student.id,
+            'rut': '22222222',
+            'dv': '2',
+            'first_name': 'John',
+            'last_name': 'Doe',
+            'major_id': test_major.id
+        }
+        response = client.put(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['rut'] == ['Ya existe otro estudiante con este RUT.']
+        test_student.refresh_from_db()
+        assert test_student.rut == '12345678'
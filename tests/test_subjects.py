@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import pytest
 from django.urls import reverse
 from rest_framework import status
@@ -12,14 +15,6 @@ User = get_user_model()
 def api_client():
     return APIClient()
 
-@pytest.fixture
-def auth_client():
-    user = User.objects.create_user(username='testuser', password='testpass123')
-    client = APIClient()
-    token, _ = Token.objects.get_or_create(user=user)
-    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
-    return client, user
-
 @pytest.fixture
 def admin_client():
     admin_user = User.objects.create_superuser(username='admin', password='admin123')
@@ -59,8 +54,8 @@ class TestSubjectAPI:
         response = client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) >= 1
-        assert response.data[-1]['name'] == test_subject.name
+        assert len(response.data['results']) >= 1
+        assert response.data['results'][-1]['name'] == test_subject.name
     
     def test_get_subject_detail(self, auth_client, test_subject):
         client, _ = auth_client
@@ -207,3 +202,121 @@ class TestSubjectAPI:
         url = reverse('subjects-list')
         response = api_client.get(url)
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+TEMPLATE = 'tests/REGISTROS DE ASISTENCIA - SAAC ( MARTES 14-05 ARQUITECTURA ).xlsx'
+
+
+def read_register(response):
+    from io import BytesIO
+    from openpyxl import load_workbook
+    sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+    return [[cell.value for cell in row] for row in sheet.iter_rows()]
+
+
+@pytest.mark.django_db
+class TestSubjectRegister:
+
+    def test_register_matches_the_template(self, auth_client, test_subject, test_student):
+        from openpyxl import load_workbook
+        client, _ = auth_client
+        test_subject.students.add(test_student)
+
+        response = client.get(reverse('subjects-register', kwargs={'pk': test_subject.id}),
+                              {'date': '2025-05-14', 'section': '1'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response['Content-Disposition'] == (
+            "attachment; filename*=utf-8''REGISTROS%20DE%20ASISTENCIA%20-%20SAAC%20%28%20"
+            "MI%C3%89RCOLES%2014-05%20COMPUTER%20SCIENCE%20%29.xlsx")
+
+        header, *rows = read_register(response)
+        template = load_workbook(TEMPLATE).active
+        assert header == [cell.value for cell in template[1]]
+        assert rows == [['14/05/2025', '12345678', '9', 'John Robert', 'Doe Smith', '1',
+                         'Programming 101', None, None]]
+
+    def test_register_filters_by_major(self, auth_client, test_subject, test_student):
+        client, _ = auth_client
+        other_major = Major.objects.create(name='Arquitectura', faculty='Arte')
+        test_subject.major.add(other_major)
+        other = Student.objects.create(rut='22222222', dv='2', first_name='Ana', second_name='María',
+                                       last_name='Alvarez', second_last_name='Rojas', major=other_major)
+        test_subject.students.add(test_student, other)
+
+        response = client.get(reverse('subjects-register', kwargs={'pk': test_subject.id}),
+                              {'date': '2025-05-13', 'major_id': other_major.id})
+
+        assert 'ARQUITECTURA' in response['Content-Disposition']
+        _, *rows = read_register(response)
+        assert [row[1] for row in rows] == ['22222222']
+
+    def test_register_rejects_bad_parameters(self, auth_client, test_subject):
+        client, _ = auth_client
+        url = reverse('subjects-register', kwargs={'pk': test_subject.id})
+        other_major = Major.objects.create(name='Arquitectura', faculty='Arte')
+
+        assert client.get(url, {'date': '14/05/2025'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(url, {'major_id': other_major.id}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestSubjectRoster:
+
+    @pytest.fixture
+    def roster(self, test_subject, test_student):
+        other_major = Major.objects.create(name='Arquitectura', faculty='Arte')
+        test_subject.major.add(other_major)
+        other = Student.objects.create(rut='22222222', dv='2', first_name='Ana', second_name='María',
+                                       last_name='Alvarez', second_last_name='Rojas', major=other_major)
+        test_subject.students.add(test_student, other)
+        return test_subject, other_major
+
+    def test_ndjson_is_the_default(self, auth_client, roster):
+        client, _ = auth_client
+        subject, _ = roster
+
+        response = client.get(reverse('subjects-roster', kwargs={'pk': subject.id}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert [line['rut'] for line in lines] == ['22222222', '12345678']
+        assert lines[0] == {'id': lines[0]['id'], 'rut': '22222222', 'dv': '2', 'first_name': 'Ana',
+                            'second_name': 'María', 'last_name': 'Alvarez', 'second_last_name': 'Rojas',
+                            'major_id': roster[1].id}
+
+    def test_csv(self, auth_client, roster):
+        client, _ = auth_client
+        subject, other_major = roster
+
+        response = client.get(reverse('subjects-roster', kwargs={'pk': subject.id}),
+                              {'fmt': 'csv', 'major_id': other_major.id})
+
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert response['Content-Disposition'].startswith('attachment;')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        assert rows[0] == ['id', 'rut', 'dv', 'first_name', 'second_name', 'last_name',
+                           'second_last_name', 'major_id']
+        assert [row[1:7] for row in rows[1:]] == [['22222222', '2', 'Ana', 'María', 'Alvarez', 'Rojas']]
+
+    def test_large_roster_is_sent_in_chunks(self, auth_client, test_subject, test_major):
+        client, _ = auth_client
+        test_subject.students.add(*Student.objects.bulk_create([
+            Student(rut=str(30_000_000 + n), dv='0', first_name='A', second_name='B', last_name='C',
+                    second_last_name='D', major=test_major) for n in range(1200)]))
+
+        response = client.get(reverse('subjects-roster', kwargs={'pk': test_subject.id}), {'fmt': 'csv'})
+
+        chunks = list(response.streaming_content)
+        assert len(chunks) == 3
+        assert sum(chunk.count(b'\n') for chunk in chunks) == 1201
+
+    def test_rejects_bad_parameters(self, auth_client, test_subject):
+        client, _ = auth_client
+        url = reverse('subjects-roster', kwargs={'pk': test_subject.id})
+
+        assert client.get(url, {'fmt': 'xml'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(url, {'major_id': 'x'}).status_code == status.HTTP_400_BAD_REQUEST
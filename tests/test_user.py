@@ -1,7 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from signature.models import Major
+from signature.hashers import PBKDF2PasswordHasher
+from signature.models import Major, Student, Subject
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
@@ -40,7 +43,7 @@ class TestUserAPI:
         url = reverse('users-list')
         response = client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) > 0
+        assert len(response.data['results']) > 0
     
     def test_create_user_success(self, admin_client):
         client, _ = admin_client
@@ -129,4 +132,86 @@ class TestUserAPI:
     def test_unauthorized_access(self, api_client):
         url = reverse('users-list')
         response = api_client.get(url)
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.django_db
+class TestLoginSignup:
+
+    def add_roster(self, major, students):
+        subject = Subject.objects.create(name=f'RAMO {major.name}')
+        subject.major.add(major)
+        subject.students.add(*[
+            Student.objects.create(rut=str(30_000_000 + major.id * 1_000 + n), dv='0', first_name='A',
+                                   second_name='B', last_name='C', second_last_name='D', major=major)
+            for n in range(students)
+        ])
+
+    def login(self, api_client, password='testpass123'):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(reverse('login'), {'username': 'profe', 'password': password}, format='json')
+        return response, len(queries)
+
+    def test_login_returns_slim_user(self, api_client, test_major):
+        user = User.objects.create_user(username='profe', password='testpass123')
+        user.majors.add(test_major)
+        self.add_roster(test_major, students=3)
+
+        response, _ = self.login(api_client)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['token'] == Token.objects.get(user=user).key
+        assert response.data['user'] == {
+            'id': user.id, 'username': 'profe', 'major_ids': [test_major.id], 'is_superuser': False}
+
+    def test_login_query_count_does_not_grow_with_roster(self, api_client, test_major):
+        user = User.objects.create_user(username='profe', password='testpass123')
+        user.majors.add(test_major)
+        self.login(api_client)  # el primer login crea el token
+        _, small = self.login(api_client)
+
+        for n in range(3):
+            major = Major.objects.create(name=f'CARRERA {n}', faculty='TEST')
+            self.add_roster(major, students=10)
+            user.majors.add(major)
+        response, large = self.login(api_client)
+
+        assert len(response.data['user']['major_ids']) == 4
+        assert small == large
+
+    def test_login_wrong_password(self, api_client):
+        User.objects.create_user(username='profe', password='testpass123')
+        response, _ = self.login(api_client, password='otra')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_login_rehashes_when_cost_changes(self, api_client, settings):
+        user = User.objects.create_user(username='profe', password='testpass123')
+        settings.PASSWORD_PBKDF2_ITERATIONS = 2_000
+
+        response, _ = self.login(api_client)
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.password.startswith('pbkdf2_sha256$2000$')
+
+    def test_signup_hashes_password_once(self, api_client, test_major, monkeypatch):
+        calls = []
+        encode = PBKDF2PasswordHasher.encode
+        monkeypatch.setattr(PBKDF2PasswordHasher, 'encode',
+                            lambda self, *args, **kwargs: calls.append(1) or encode(self, *args, **kwargs))
+
+        response = api_client.post(reverse('signup'), {
+            'username': 'nuevo', 'password': 'clave123', 'majors': [test_major.id]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(calls) == 1
+        user = User.objects.get(username='nuevo')
+        assert user.check_password('clave123')
+        assert response.data['user'] == {
+            'id': user.id, 'username': 'nuevo', 'major_ids': [test_major.id], 'is_superuser': False}
+        assert response.data['token'] == Token.objects.get(user=user).key
+
+    def test_signup_without_majors(self, api_client):
+        response = api_client.post(reverse('signup'), {'username': 'nuevo', 'password': 'clave123'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not User.objects.filter(username='nuevo').exists()